@@ -2,6 +2,10 @@ import cv2
 import numpy as np
 import glob
 import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 
 def check_realsense_connection():
     """
@@ -35,7 +39,82 @@ def check_realsense_connection():
         pipeline.stop()
         print("相机连接测试完成。")
 
-def calibrate_camera(images_dir, chessboard_size=(9, 6), square_size=0.025, save_path="config/d455_intrinsics.npz"):
+# 角点缓存文件名（与标定结果保存在同一目录）
+CORNER_CACHE_FILENAME = "chessboard_corners_cache.json"
+# 角点检测流程版本；检测方式变化时递增，旧缓存（含旧流程的未检出结果）随之失效
+CORNER_DETECTOR_VERSION = 2
+
+# 亚像素角点优化终止条件
+SUBPIX_CRITERIA = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001)
+
+def _file_hash(path):
+    """计算图片文件内容的SHA1，用作角点缓存的键"""
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def _detect_chessboard_corners(fname, chessboard_size, downscale_width=640):
+    """
+    在单张图片中检测棋盘格角点（可在子进程中运行）。
+    先在缩小图上用 CALIB_CB_FAST_CHECK 快速检测，找到后把角点放大回原图
+    再做亚像素优化；缩小图上失败时才在原图上用默认标志（不带 FAST_CHECK）重新检测，
+    未检出的结果会写入缓存，不能让快速预检的漏检成为永久结论。
+    Returns:
+        tuple: (found, corners, image_size)，corners 为原图坐标的 (N,1,2) float32
+    """
+    img = cv2.imread(fname)
+    if img is None:
+        return False, None, None
+
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    h, w = gray.shape
+    flags = cv2.CALIB_CB_ADAPTIVE_THRESH + cv2.CALIB_CB_NORMALIZE_IMAGE
+
+    corners = None
+    scale = downscale_width / float(w) if downscale_width and w > downscale_width else 1.0
+    if scale < 1.0:
+        small = cv2.resize(gray, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+        ret, small_corners = cv2.findChessboardCorners(small, chessboard_size, flags + cv2.CALIB_CB_FAST_CHECK)
+        if ret:
+            corners = (small_corners / scale).astype(np.float32)
+
+    if corners is None:
+        ret, corners = cv2.findChessboardCorners(gray, chessboard_size, flags)
+        if not ret:
+            return False, None, (w, h)
+
+    # 在全分辨率图上提高角点检测精度
+    corners = cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1), criteria=SUBPIX_CRITERIA)
+    return True, corners, (w, h)
+
+def _load_corner_cache(cache_path, chessboard_size):
+    """读取角点缓存，棋盘格尺寸或检测流程版本不一致时视为无缓存"""
+    if not cache_path or not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if (tuple(data.get('chessboard_size', ())) != tuple(chessboard_size)
+                or data.get('detector_version') != CORNER_DETECTOR_VERSION):
+            return {}
+        return data.get('entries', {})
+    except (OSError, ValueError) as e:
+        print(f"角点缓存读取失败，将重新检测: {e}")
+        return {}
+
+def _save_corner_cache(cache_path, chessboard_size, entries):
+    """保存角点缓存"""
+    try:
+        cache_dir = os.path.dirname(cache_path)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump({'chessboard_size': list(chessboard_size), 'detector_version': CORNER_DETECTOR_VERSION,
+                       'entries': entries}, f)
+    except OSError as e:
+        print(f"角点缓存保存失败: {e}")
+
+def calibrate_camera(images_dir, chessboard_size=(9, 6), square_size=0.025, save_path="config/d455_intrinsics.npz",
+                     show_corners=True, workers=None, use_cache=True, downscale_width=640):
     """
     使用棋盘格图片对相机进行标定。
     Args:
@@ -43,10 +122,15 @@ def calibrate_camera(images_dir, chessboard_size=(9, 6), square_size=0.025, save
         chessboard_size (tuple): 棋盘格内部角点的数量（列, 行）。
         square_size (float): 棋盘格方块的实际边长（单位：米）。
         save_path (str): 标定参数文件的保存路径。
+        show_corners (bool): 是否逐张显示检测到的角点；为 False 时为无头批处理模式。
+        workers (int): 角点检测进程数，None 表示使用CPU核数，1 表示串行。
+        use_cache (bool): 是否按图片内容哈希缓存角点，新增图片时只处理新文件。
+        downscale_width (int): 快速预检测时缩小到的图像宽度。
     Returns:
         tuple: (camera_matrix, distortion_coeffs) 如果成功，否则返回 (None, None)
     """
     print("\n开始相机标定流程...")
+    chessboard_size = tuple(chessboard_size)
     # 准备棋盘格角点的世界坐标 (0,0,0), (1,0,0), (2,0,0) ....,(8,5,0)
     objp = np.zeros((chessboard_size[0] * chessboard_size[1], 3), np.float32)
     objp[:, :2] = np.mgrid[0:chessboard_size[0], 0:chessboard_size[1]].T.reshape(-1, 2)
@@ -61,39 +145,68 @@ def calibrate_camera(images_dir, chessboard_size=(9, 6), square_size=0.025, save
         print(f"错误：图片文件夹不存在 -> {images_dir}")
         return None, None
         
-    images = glob.glob(os.path.join(images_dir, '*.jpg'))
+    images = sorted(glob.glob(os.path.join(images_dir, '*.jpg')))
     if len(images) == 0:
         print(f"未在 '{images_dir}' 文件夹中找到 .jpg 格式的标定图片。")
         return None, None
 
     print(f"找到 {len(images)} 张图片用于标定。")
 
+    # 读取角点缓存，只检测新增或修改过的图片
+    save_dir = os.path.dirname(save_path)
+    cache_path = os.path.join(save_dir, CORNER_CACHE_FILENAME) if use_cache else None
+    cache = _load_corner_cache(cache_path, chessboard_size)
+    hashes = {fname: _file_hash(fname) for fname in images}
+    pending = [fname for fname in images if hashes[fname] not in cache]
+    if len(pending) < len(images):
+        print(f"缓存命中 {len(images) - len(pending)} 张，需要检测 {len(pending)} 张。")
+
+    if pending:
+        if workers is None:
+            workers = os.cpu_count() or 1
+        workers = max(1, min(workers, len(pending)))
+        if workers > 1:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                results = list(executor.map(_detect_chessboard_corners, pending,
+                                            repeat(chessboard_size), repeat(downscale_width)))
+        else:
+            results = [_detect_chessboard_corners(fname, chessboard_size, downscale_width) for fname in pending]
+
+        for fname, (found, corners, image_size) in zip(pending, results):
+            if image_size is None:
+                print(f"无法读取图片: {fname}")
+                continue
+            cache[hashes[fname]] = {
+                'found': bool(found),
+                'image_size': list(image_size),
+                'corners': corners.reshape(-1, 2).tolist() if found else None
+            }
+        if cache_path:
+            _save_corner_cache(cache_path, chessboard_size, cache)
+
+    image_size = None
     for fname in images:
-        img = cv2.imread(fname)
-        if img is None:
-            print(f"无法读取图片: {fname}")
+        entry = cache.get(hashes[fname])
+        if entry is None:
+            continue
+        if not entry['found']:
+            print(f"在图片 {os.path.basename(fname)} 中未能检测到棋盘格角点。")
             continue
-            
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
 
-        # 寻找棋盘格角点
-        ret, corners = cv2.findChessboardCorners(gray, chessboard_size, None)
+        corners2 = np.array(entry['corners'], dtype=np.float32).reshape(-1, 1, 2)
+        objpoints.append(objp)
+        imgpoints.append(corners2)
+        image_size = tuple(entry['image_size'])
 
-        if ret:
-            objpoints.append(objp)
-            # 提高角点检测精度
-            corners2 = cv2.cornerSubPix(gray, corners, (11, 11), (-1, -1),
-                                        criteria=(cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.001))
-            imgpoints.append(corners2)
-
-            # 绘制并显示角点（可选）
-            cv2.drawChessboardCorners(img, chessboard_size, corners2, ret)
+        # 绘制并显示角点（可选）
+        if show_corners:
+            img = cv2.imread(fname)
+            cv2.drawChessboardCorners(img, chessboard_size, corners2, True)
             cv2.imshow('Corners Found', img)
             cv2.waitKey(500)  # 等待0.5秒
-        else:
-            print(f"在图片 {os.path.basename(fname)} 中未能检测到棋盘格角点。")
 
-    cv2.destroyAllWindows()
+    if show_corners:
+        cv2.destroyAllWindows()
 
     if len(objpoints) < 5: # 至少需要几张有效的图片才能得到可靠的结果
         print(f"错误：检测到角点的有效图片数量不足 ({len(objpoints)} 张)，无法进行标定。")
@@ -102,7 +215,7 @@ def calibrate_camera(images_dir, chessboard_size=(9, 6), square_size=0.025, save
     print("\n正在计算相机内参和畸变系数...")
     # 执行相机标定
     ret, mtx, dist, rvecs, tvecs = cv2.calibrateCamera(
-        objpoints, imgpoints, gray.shape[::-1], None, None)
+        objpoints, imgpoints, image_size, None, None)
 
     if not ret:
         print("相机标定失败。")
@@ -115,13 +228,12 @@ def calibrate_camera(images_dir, chessboard_size=(9, 6), square_size=0.025, save
     print(dist)
 
     # 确保保存路径的文件夹存在
-    save_dir = os.path.dirname(save_path)
     if save_dir and not os.path.exists(save_dir):
         os.makedirs(save_dir)
         print(f"已创建文件夹: {save_dir}")
 
     # 保存标定结果
-    np.savez(save_path, mtx=mtx, dist=dist, rvecs=rvecs, tvecs=tvecs)
+    np.savez(save_path, mtx=mtx, dist=dist, rvecs=rvecs, tvecs=tvecs, image_size=np.array(image_size))
     print(f"\n标定参数已成功保存到: {save_path}")
     
     return mtx, dist
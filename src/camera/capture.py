@@ -6,21 +6,125 @@ Camera Module - Unified Camera Interface
 """
 
 import os
+import glob
+import json
+import functools
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import cv2
 import numpy as np
-import pyrealsense2 as rs
 from typing import Optional, Tuple, Union
 import logging
 
-# 尝试导入Open3D，如果没有则使用fallback实现
-try:
-    import open3d as o3d
-    OPEN3D_AVAILABLE = True
-except ImportError:
-    OPEN3D_AVAILABLE = False
-
 logger = logging.getLogger(__name__)
 
+# pyrealsense2 和 Open3D 体积较大，只在真正用到时才导入
+rs = None
+o3d = None
+OPEN3D_AVAILABLE = None  # None 表示尚未检测
+
+def _load_realsense():
+    """按需导入pyrealsense2"""
+    global rs
+    if rs is None:
+        import pyrealsense2
+        rs = pyrealsense2
+    return rs
+
+def _load_open3d() -> bool:
+    """按需导入Open3D，返回是否可用"""
+    global o3d, OPEN3D_AVAILABLE
+    if OPEN3D_AVAILABLE is None:
+        try:
+            import open3d
+            o3d = open3d
+            OPEN3D_AVAILABLE = True
+        except ImportError:
+            OPEN3D_AVAILABLE = False
+    return OPEN3D_AVAILABLE
+
+class DepthFilterChain:
+    """
+    librealsense 深度后处理滤波链
+    
+    滤波器在启动时按配置顺序构建一次，每帧依次处理并统计各滤波器耗时。
+    配置格式: [(名称, {选项名: 值}), ...]，例如
+        [("decimation", {"filter_magnitude": 2}),
+         ("threshold", {"min_distance": 0.1, "max_distance": 4.0})]
+    选项名与 rs.option 的属性名一致。
+    """
+    
+    # 名称 -> rs 中的滤波器类名
+    FILTER_TYPES = {
+        "decimation": "decimation_filter",
+        "threshold": "threshold_filter",
+        "depth_to_disparity": "disparity_transform",
+        "spatial": "spatial_filter",
+        "temporal": "temporal_filter",
+        "disparity_to_depth": "disparity_transform",
+        "hole_filling": "hole_filling_filter",
+    }
+    
+    def __init__(self, filter_specs, filter_factory=None):
+        """
+        Args:
+            filter_specs: 有序的滤波器配置列表
+            filter_factory: (名称, 选项) -> 滤波器对象，默认用 pyrealsense2 构建
+        """
+        factory = filter_factory or self._create_rs_filter
+        self.filters = []
+        for name, options in filter_specs:
+            # 同一滤波器出现多次时，统计键加序号区分
+            key = name
+            index = 2
+            while any(key == existing for existing, _ in self.filters):
+                key = f"{name}#{index}"
+                index += 1
+            self.filters.append((key, factory(name, options or {})))
+        self._stats = {key: {"count": 0, "total_ms": 0.0, "last_ms": 0.0} for key, _ in self.filters}
+    
+    @classmethod
+    def _create_rs_filter(cls, name, options):
+        """用 pyrealsense2 构建单个滤波器并设置选项"""
+        _load_realsense()
+        if name not in cls.FILTER_TYPES:
+            raise ValueError(f"未知的深度滤波器: {name}")
+        if name == "depth_to_disparity":
+            flt = rs.disparity_transform(True)
+        elif name == "disparity_to_depth":
+            flt = rs.disparity_transform(False)
+        else:
+            flt = getattr(rs, cls.FILTER_TYPES[name])()
+        for option, value in options.items():
+            flt.set_option(getattr(rs.option, option), value)
+        return flt
+    
+    def process(self, depth_frame):
+        """依次应用所有滤波器并记录耗时"""
+        for name, flt in self.filters:
+            start = time.perf_counter()
+            depth_frame = flt.process(depth_frame)
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            stats = self._stats[name]
+            stats["count"] += 1
+            stats["total_ms"] += elapsed_ms
+            stats["last_ms"] = elapsed_ms
+        return depth_frame
+    
+    def get_stats(self) -> dict:
+        """各滤波器的调用次数、平均耗时和最近一次耗时（毫秒），按链顺序排列"""
+        result = {}
+        for name, _ in self.filters:
+            stats = self._stats[name]
+            count = stats["count"]
+            result[name] = {
+                "count": count,
+                "avg_ms": stats["total_ms"] / count if count else 0.0,
+                "last_ms": stats["last_ms"],
+            }
+        return result
+
 class CameraInterface:
     """相机接口基类"""
     
@@ -28,11 +132,42 @@ class CameraInterface:
         self.width = 640
         self.height = 480
         self.fps = 30
+        
+        # 帧元数据：最近一次 get_frames() 返回帧的帧号与采集时间
+        self.last_frame_info = None
+        self.frame_stats = {
+            'frames': 0,    # 从相机读到的帧数
+            'dropped': 0,   # 帧号不连续推断出的相机端丢帧
+            'skipped': 0,   # 读到但被更新的帧覆盖、未交给使用者的帧
+        }
+        self._last_read_frame_number = None
     
     def get_frames(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
         """获取彩色图像和深度图像"""
         raise NotImplementedError
     
+    def get_frame_info(self) -> Optional[dict]:
+        """
+        最近一次 get_frames() 返回帧的元数据
+        
+        Returns:
+            {'frame_number', 'capture_time'(秒，曝光时刻，与 time.time() 同一时钟),
+             'arrival_time'(主机收到时刻), 'timestamp_source'} 或 None
+        """
+        return self.last_frame_info
+    
+    def get_frame_stats(self) -> dict:
+        """帧统计：读取帧数、相机端丢帧数、被覆盖跳过的帧数"""
+        return dict(self.frame_stats)
+    
+    def _count_frame(self, frame_number: Optional[int]):
+        """按帧号连续性统计丢帧（帧号回退视为相机重启，不计丢帧）"""
+        self.frame_stats['frames'] += 1
+        last = self._last_read_frame_number
+        if frame_number is not None and last is not None and frame_number > last + 1:
+            self.frame_stats['dropped'] += frame_number - last - 1
+        self._last_read_frame_number = frame_number
+    
     def stop(self):
         """停止相机"""
         raise NotImplementedError
@@ -44,40 +179,115 @@ class CameraInterface:
 class RealSenseCapture(CameraInterface):
     """RealSense D455 相机采集类"""
     
-    def __init__(self, width=640, height=480, fps=30):
+    # stream 可选的图像流
+    STREAMS = ("color", "infrared")
+    
+    def __init__(self, width=640, height=480, fps=30, align_depth=True, depth_filters=None,
+                 depth_fps=None, serial=None, stream="color", ir_emitter=True, device=None,
+                 profile_cache=None):
+        """
+        Args:
+            align_depth: 是否每帧在主机端把深度对齐到彩色；为 False 时保留原始深度，
+                         通过 sample_depth() 用设备内参/外参只投影被查询的像素，
+                         需要整幅对齐深度的使用者调用 get_aligned_depth()
+            depth_filters: 深度后处理滤波链配置（见 DepthFilterChain），None 表示不滤波
+            depth_fps: 深度流帧率，可高于彩色帧率（如 90），供深度监听器高频避障；
+                       None 表示与彩色相同。高于彩色帧率时应配合 start_grabber() 使用
+            serial: 设备序列号，多相机时指定打开哪一台，None 表示第一台
+            stream: "color" 输出 BGR 彩色；"infrared" 输出左红外 Y8 灰度图。左红外成像器即深度的
+                    参考视角，深度与其逐像素对应，无需 rs.align 也无需灰度转换，且不依赖环境光；
+                    此时 align_depth 不起作用
+            ir_emitter: 红外模式下是否打开结构光投射器（提升弱纹理深度质量，但红外图上会有散斑）
+            device: discover_realsense_devices() 返回的设备描述；提供时直接从设备支持的配置中
+                    选出最接近的一组启动，不再逐个试错
+            profile_cache: 流配置缓存文件路径，按序列号记录上次成功启动的配置并优先使用
+        """
         super().__init__()
+        if stream not in self.STREAMS:
+            raise ValueError(f"未知的图像流: {stream}")
+        _load_realsense()
         self.pipeline = rs.pipeline()
         self.config = rs.config()
         self.align = None
+        self.stream = stream
+        self.infrared = stream == "infrared"
+        self.align_depth = align_depth or self.infrared  # 红外与深度天然对齐
+        if serial is None and device is not None:
+            serial = device['serial']
+        self.serial = serial
+        self.image_intrinsics = None  # 红外模式下输出图像的设备内参 [fx, fy, cx, cy]
+        self.projector = None
+        self.depth_scale = 0.001
+        self.depth_filters = DepthFilterChain(depth_filters) if depth_filters else None
         
-        # 尝试不同的配置
-        configs_to_try = [
-            (width, height, fps),
-            (640, 480, 30),  # 备用配置1
-            (1280, 720, 15), # 备用配置2
-            (848, 480, 30),  # 备用配置3
-        ]
+        # 最近一帧的原始帧集，按需对齐时使用
+        self._last_frameset = None
+        self._aligned_depth = None
+        self._last_depth_image = None
+        self._last_arrival_time = None
         
-        for w, h, f in configs_to_try:
+        # 后台取帧线程：深度帧按传感器帧率分发给监听器，彩色帧集留给 get_frames()
+        self.depth_fps = fps
+        self._depth_listeners = []
+        self._grabber_thread = None
+        self._grabber_running = False
+        self._frame_condition = threading.Condition()
+        self._pending_frameset = None
+        
+        # 候选配置：缓存的上次成功配置优先，其次按设备支持的配置直接选出的最佳匹配
+        request = (stream, width, height, fps, depth_fps)
+        cache = StreamProfileCache(profile_cache) if profile_cache else None
+        cached = cache.get(serial, request) if cache is not None and serial else None
+        configs_to_try = plan_stream_configs(width, height, fps, depth_fps, stream,
+                                             profiles=device['profiles'] if device else None,
+                                             cached=cached)
+        
+        for w, h, f, df in configs_to_try:
             try:
                 # 清除之前的配置
                 self.config = rs.config()
+                if serial:
+                    self.config.enable_device(serial)
                 
-                # 配置深度和彩色流
-                self.config.enable_stream(rs.stream.depth, w, h, rs.format.z16, f)
-                self.config.enable_stream(rs.stream.color, w, h, rs.format.bgr8, f)
+                # 配置深度和图像流
+                self.config.enable_stream(rs.stream.depth, w, h, rs.format.z16, df)
+                if self.infrared:
+                    # 左红外（索引1）与深度共用同一视角，红外与深度帧率必须一致
+                    self.config.enable_stream(rs.stream.infrared, 1, w, h, rs.format.y8, df)
+                else:
+                    self.config.enable_stream(rs.stream.color, w, h, rs.format.bgr8, f)
                 
                 # 启动管道
                 profile = self.pipeline.start(self.config)
                 
-                # 创建对齐对象（深度对齐到彩色）
-                align_to = rs.stream.color
-                self.align = rs.align(align_to)
+                if self.infrared:
+                    self._setup_infrared(profile, ir_emitter)
+                else:
+                    # 创建对齐对象（深度对齐到彩色）
+                    align_to = rs.stream.color
+                    self.align = rs.align(align_to)
+                    
+                    # 读取设备内的流内参/外参，用于稀疏投影
+                    try:
+                        from .projection import DepthColorProjector
+                        self.projector = DepthColorProjector.from_profile(profile)
+                        self.depth_scale = self.projector.depth_scale
+                    except Exception as e:
+                        logger.warning(f"读取流内参/外参失败，回退到主机端对齐: {e}")
+                        self.projector = None
+                        self.align_depth = True
                 
                 self.width = w
                 self.height = h
                 self.fps = f
-                logger.info(f"RealSense相机已启动: {w}x{h} @ {f}fps")
+                self.depth_fps = df
+                if self.infrared:
+                    self.fps = df
+                logger.info(f"RealSense相机已启动({stream}): {w}x{h} @ {self.fps}fps (深度 {df}fps)"
+                            f"{' [缓存配置]' if (w, h, f, df) == cached else ''}")
+                if cache is not None and (w, h, f, df) != cached:
+                    started_serial = serial or profile.get_device().get_info(rs.camera_info.serial_number)
+                    cache.put(started_serial, request, (w, h, f, df))
                 return
                 
             except Exception as e:
@@ -90,26 +300,151 @@ class RealSenseCapture(CameraInterface):
         
         raise RuntimeError("无法启动RealSense相机，请检查连接")
     
+    def _setup_infrared(self, profile, ir_emitter: bool):
+        """红外模式：读取深度比例与红外内参，设置结构光投射器"""
+        depth_sensor = profile.get_device().first_depth_sensor()
+        self.depth_scale = depth_sensor.get_depth_scale()
+        if depth_sensor.supports(rs.option.emitter_enabled):
+            depth_sensor.set_option(rs.option.emitter_enabled, 1 if ir_emitter else 0)
+        intr = profile.get_stream(rs.stream.infrared, 1).as_video_stream_profile().get_intrinsics()
+        self.image_intrinsics = [intr.fx, intr.fy, intr.ppx, intr.ppy]
+    
+    def _image_frame(self, frames):
+        """帧集中的图像帧：红外模式为左红外，否则为彩色"""
+        if self.infrared:
+            return frames.get_infrared_frame(1)
+        return frames.get_color_frame()
+    
+    def _read_frameset(self, timeout_ms=5000):
+        """
+        等待一组帧并做深度后处理（降采样后对齐和下游处理都更快）
+        
+        Returns:
+            (frames, arrival_time)
+        """
+        frames = self.pipeline.wait_for_frames(timeout_ms)
+        arrival_time = time.time()
+        self._last_arrival_time = arrival_time
+        image_frame = self._image_frame(frames)
+        if image_frame:
+            self._count_frame(image_frame.get_frame_number())
+        if self.depth_filters is not None:
+            frames = self.depth_filters.process(frames).as_frameset()
+        return frames, arrival_time
+    
+    @staticmethod
+    def _capture_time(frame, arrival_time: float) -> Tuple[float, str]:
+        """
+        帧的曝光时刻（秒）
+        
+        global_time/system_time 域的时间戳与主机时钟一致，可直接用于端到端延迟；
+        纯硬件时钟无法与主机比较，退回到主机收到帧的时刻。
+        """
+        domain = frame.get_frame_timestamp_domain()
+        if domain in (rs.timestamp_domain.global_time, rs.timestamp_domain.system_time):
+            return frame.get_timestamp() / 1000.0, "sensor"
+        return arrival_time, "arrival"
+    
+    def add_depth_listener(self, callback):
+        """
+        注册深度监听器 callback(depth_image, timestamp)
+        
+        后台取帧线程运行时，每个深度帧（按深度帧率）都会回调一次，
+        depth_image 为未对齐的深度副本，回调应尽快返回。
+        """
+        self._depth_listeners.append(callback)
+    
+    def start_grabber(self):
+        """启动后台取帧线程，使深度监听器与 get_frames() 的调用频率解耦"""
+        if self._grabber_running:
+            return
+        self._grabber_running = True
+        self._grabber_thread = threading.Thread(target=self._grab_loop, name="RealSenseGrabber", daemon=True)
+        self._grabber_thread.start()
+        logger.info("RealSense后台取帧线程已启动")
+    
+    def _grab_loop(self):
+        """取帧线程：深度帧分发给监听器，含彩色的帧集替换待取帧（旧帧直接丢弃）"""
+        while self._grabber_running:
+            try:
+                frames, arrival_time = self._read_frameset(timeout_ms=1000)
+            except Exception as e:
+                if self._grabber_running:
+                    logger.warning(f"后台取帧失败: {e}")
+                continue
+            
+            depth_frame = frames.get_depth_frame()
+            if depth_frame and self._depth_listeners:
+                depth_image = np.array(depth_frame.get_data())
+                timestamp, _ = self._capture_time(depth_frame, arrival_time)
+                for callback in self._depth_listeners:
+                    try:
+                        callback(depth_image, timestamp)
+                    except Exception as e:
+                        logger.error(f"深度监听器异常: {e}")
+            
+            if self._image_frame(frames):
+                frames.keep()
+                with self._frame_condition:
+                    if self._pending_frameset is not None:
+                        self.frame_stats['skipped'] += 1
+                    self._pending_frameset = (frames, arrival_time)
+                    self._frame_condition.notify_all()
+    
+    def _next_frameset(self, timeout=1.0):
+        """取一组新帧 (frames, arrival_time)：后台线程运行时取其最新帧集，否则同步等待"""
+        if not self._grabber_running:
+            return self._read_frameset()
+        with self._frame_condition:
+            if self._pending_frameset is None:
+                self._frame_condition.wait(timeout)
+            pending, self._pending_frameset = self._pending_frameset, None
+        return pending
+    
     def get_frames(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
-        """获取对齐的彩色和深度图像"""
+        """
+        获取图像和深度（彩色模式下 align_depth 为 False 时深度未对齐）
+        
+        红外模式返回 (H, W) uint8 灰度图，深度与其同视角（经降采样滤波后分辨率可能更低）。
+        """
         try:
-            frames = self.pipeline.wait_for_frames()
+            pending = self._next_frameset()
+            if pending is None:
+                return None, None
+            frames, arrival_time = pending
+            
+            self._last_frameset = frames
+            self._aligned_depth = None
             
-            # 对齐深度到彩色
-            if self.align:
+            # 对齐深度到彩色（红外与深度同视角，直接使用）
+            if self.infrared:
+                color_frame = frames.get_infrared_frame(1)
+                depth_frame = frames.get_depth_frame()
+            elif self.align and self.align_depth:
                 aligned_frames = self.align.process(frames)
                 color_frame = aligned_frames.get_color_frame()
                 depth_frame = aligned_frames.get_depth_frame()
             else:
                 color_frame = frames.get_color_frame()
                 depth_frame = frames.get_depth_frame()
+                if depth_frame and self.projector is not None:
+                    self._refresh_depth_intrinsics(depth_frame)
             
             if not color_frame or not depth_frame:
                 return None, None
             
+            capture_time, source = self._capture_time(color_frame, arrival_time)
+            self.last_frame_info = {
+                'frame_number': color_frame.get_frame_number(),
+                'capture_time': capture_time,
+                'arrival_time': arrival_time,
+                'timestamp_source': source,
+            }
+            
             # 转换为numpy数组
             color_image = np.asanyarray(color_frame.get_data())
             depth_image = np.asanyarray(depth_frame.get_data())
+            self._last_depth_image = depth_image
             
             return color_image, depth_image
             
@@ -117,8 +452,74 @@ class RealSenseCapture(CameraInterface):
             logger.error(f"获取RealSense帧失败: {e}")
             return None, None
     
+    def _refresh_depth_intrinsics(self, depth_frame):
+        """降采样滤波改变了深度分辨率时，改用处理后深度帧的内参做稀疏投影"""
+        intr = self.projector.depth_intrinsics
+        if depth_frame.get_width() != intr.width or depth_frame.get_height() != intr.height:
+            from .projection import StreamIntrinsics
+            profile = depth_frame.get_profile().as_video_stream_profile()
+            self.projector.depth_intrinsics = StreamIntrinsics.from_rs(profile.get_intrinsics())
+    
+    def get_filter_stats(self) -> dict:
+        """深度滤波链各滤波器耗时统计（毫秒），未启用滤波时为空"""
+        if self.depth_filters is None:
+            return {}
+        return self.depth_filters.get_stats()
+    
+    def get_aligned_depth(self) -> Optional[np.ndarray]:
+        """
+        按需把最近一帧深度对齐到彩色（每帧最多对齐一次）
+        
+        只有需要整幅对齐深度的使用者（点云、叠加显示）才调用，追踪主循环不付出这部分开销。
+        """
+        if self._last_frameset is None:
+            return None
+        if self._aligned_depth is None and self.infrared:
+            # 红外模式深度已同视角，只需在降采样后放大回图像分辨率
+            depth = self._last_depth_image
+            if depth is not None and depth.shape[:2] != (self.height, self.width):
+                depth = cv2.resize(depth, (self.width, self.height), interpolation=cv2.INTER_NEAREST)
+            self._aligned_depth = depth
+        if self._aligned_depth is None:
+            try:
+                depth_frame = self.align.process(self._last_frameset).get_depth_frame()
+                if depth_frame:
+                    self._aligned_depth = np.asanyarray(depth_frame.get_data())
+            except Exception as e:
+                logger.error(f"深度对齐失败: {e}")
+        return self._aligned_depth
+    
+    def sample_depth(self, depth_image: np.ndarray, color_pixels) -> np.ndarray:
+        """
+        查询彩色像素处的深度（米），无有效深度时为 NaN
+        
+        已对齐时直接取值；未对齐时只把这些像素沿极线投影到原始深度图上。
+        """
+        pixels = np.asarray(color_pixels, dtype=np.float64).reshape(-1, 2)
+        if self.infrared:
+            return sample_aligned_depth(depth_image, pixels, self.depth_scale, image_width=self.width)
+        if self.align_depth or self.projector is None:
+            return sample_aligned_depth(depth_image, pixels, self.depth_scale)
+        return self.projector.depth_at_color_pixels(depth_image, pixels)
+
+    def get_depth_sampler(self):
+        """
+        与 sample_depth 等价、但不引用相机对象的深度查询函数（可序列化，供感知进程使用）
+
+        深度内参在首帧降采样后才确定，应在取到首帧之后调用。
+        """
+        if self.infrared:
+            return functools.partial(sample_aligned_depth, depth_scale=self.depth_scale, image_width=self.width)
+        if self.align_depth or self.projector is None:
+            return functools.partial(sample_aligned_depth, depth_scale=self.depth_scale)
+        return self.projector.depth_at_color_pixels
+
     def stop(self):
         """停止相机"""
+        self._grabber_running = False
+        if self._grabber_thread is not None:
+            self._grabber_thread.join(timeout=2.0)
+            self._grabber_thread = None
         try:
             self.pipeline.stop()
             logger.info("RealSense相机已停止")
@@ -127,6 +528,10 @@ class RealSenseCapture(CameraInterface):
     
     def is_opened(self) -> bool:
         """检查相机是否打开"""
+        if self._grabber_running:
+            return self._grabber_thread is not None and self._grabber_thread.is_alive()
+        if self._last_arrival_time is not None and time.time() - self._last_arrival_time < 1.0:
+            return True  # 刚收到过帧，不必再阻塞等待
         try:
             # 尝试获取一帧来检查状态
             frames = self.pipeline.wait_for_frames(timeout_ms=100)
@@ -134,50 +539,325 @@ class RealSenseCapture(CameraInterface):
         except:
             return False
 
+def sample_aligned_depth(depth_image: np.ndarray, pixels, depth_scale: float = 0.001,
+                         image_width: Optional[int] = None) -> np.ndarray:
+    """
+    在已与图像对齐的深度图上取像素深度（米），越界或无效处为 NaN
+    
+    image_width 为像素坐标所在图像的宽度；深度经降采样比图像小时按比例换算坐标。
+    """
+    pixels = np.asarray(pixels, dtype=np.float64).reshape(-1, 2)
+    depths = np.full(len(pixels), np.nan)
+    if depth_image is None or len(pixels) == 0:
+        return depths
+    h, w = depth_image.shape[:2]
+    if image_width and image_width != w:
+        pixels = (pixels + 0.5) * (w / float(image_width)) - 0.5
+    pixels = np.rint(pixels).astype(np.int64)
+    inside = (pixels[:, 0] >= 0) & (pixels[:, 0] < w) & (pixels[:, 1] >= 0) & (pixels[:, 1] < h)
+    raw = np.zeros(len(pixels))
+    raw[inside] = depth_image[pixels[inside, 1], pixels[inside, 0]]
+    valid = raw > 0
+    depths[valid] = raw[valid] * depth_scale
+    return depths
+
+# 设备支持配置未知时，首选配置之后依次尝试的备用配置 (宽, 高, 帧率)
+FALLBACK_STREAM_CONFIGS = [(640, 480, 30), (1280, 720, 15), (848, 480, 30)]
+
+def discover_realsense_devices() -> list:
+    """
+    一次枚举已连接的 RealSense 设备及其支持的流配置（只创建一个 rs.context，不启动数据流）
+    
+    Returns:
+        [{'serial', 'name', 'profiles': {(流名, 宽, 高, 帧率), ...}}, ...]，按序列号排序；
+        流名为 "depth"(z16) / "color"(bgr8) / "infrared"(左红外 y8)
+    """
+    try:
+        _load_realsense()
+        wanted = {
+            (rs.stream.depth, rs.format.z16, 0): "depth",
+            (rs.stream.color, rs.format.bgr8, 0): "color",
+            (rs.stream.infrared, rs.format.y8, 1): "infrared",
+        }
+        devices = []
+        for dev in rs.context().query_devices():
+            profiles = set()
+            for sensor in dev.query_sensors():
+                for sp in sensor.get_stream_profiles():
+                    index = sp.stream_index() if sp.stream_type() == rs.stream.infrared else 0
+                    name = wanted.get((sp.stream_type(), sp.format(), index))
+                    if name is None or not sp.is_video_stream_profile():
+                        continue
+                    vp = sp.as_video_stream_profile()
+                    profiles.add((name, vp.width(), vp.height(), sp.fps()))
+            devices.append({
+                'serial': dev.get_info(rs.camera_info.serial_number),
+                'name': dev.get_info(rs.camera_info.name),
+                'profiles': profiles,
+            })
+        return sorted(devices, key=lambda d: d['serial'])
+    except Exception as e:
+        logger.error(f"枚举RealSense设备失败: {e}")
+        return []
+
+def select_stream_config(profiles, width: int, height: int, fps: int, depth_fps: Optional[int] = None,
+                         stream: str = "color") -> Optional[Tuple[int, int, int, int]]:
+    """
+    从设备支持的配置中选出与请求最接近的一组 (宽, 高, 图像帧率, 深度帧率)
+    
+    深度与图像流须同分辨率同帧率可用；优先分辨率最接近，其次帧率最接近。
+    独立深度帧率只在请求分辨率下且设备支持时使用（红外与深度同一传感器，帧率取深度帧率）。
+    
+    Returns:
+        配置元组，没有可用组合时为 None
+    """
+    candidates = [(w, h, f) for name, w, h, f in profiles
+                  if name == stream and ("depth", w, h, f) in profiles]
+    if not candidates:
+        return None
+    w, h, f = min(candidates, key=lambda c: (abs(c[0] * c[1] - width * height),
+                                             abs(c[0] - width), abs(c[2] - fps)))
+    df = f
+    if depth_fps and (w, h) == (width, height) and ("depth", w, h, depth_fps) in profiles:
+        if stream != "infrared" or ("infrared", w, h, depth_fps) in profiles:
+            df = depth_fps
+    if stream == "infrared":
+        f = df
+    return w, h, f, df
+
+def plan_stream_configs(width: int, height: int, fps: int, depth_fps: Optional[int] = None,
+                        stream: str = "color", profiles=None, cached=None) -> list:
+    """
+    按优先级排列待尝试的 (宽, 高, 图像帧率, 深度帧率)：缓存配置、最佳匹配配置
+    
+    设备支持的配置已知时只保留确实可用的组合，通常第一次 pipeline.start 即成功；
+    未知时退回请求配置加 FALLBACK_STREAM_CONFIGS 逐个尝试。
+    """
+    if profiles is not None:
+        planned = []
+        if cached is not None:
+            w, h, f, df = cached
+            if (stream, w, h, f) in profiles and ("depth", w, h, df) in profiles:
+                planned.append(tuple(cached))
+        best = select_stream_config(profiles, width, height, fps, depth_fps, stream)
+        if best is not None:
+            planned.append(best)
+    else:
+        planned = [tuple(cached)] if cached is not None else []
+        requested_df = depth_fps or fps
+        planned.append((width, height, requested_df if stream == "infrared" else fps, requested_df))
+        planned.extend((w, h, f, f) for w, h, f in FALLBACK_STREAM_CONFIGS)
+    
+    unique = []
+    for config in planned:
+        if config not in unique:
+            unique.append(config)
+    return unique
+
+class StreamProfileCache:
+    """
+    按设备序列号持久化上次成功启动的流配置（JSON）
+    
+    条目与请求参数 (流, 宽, 高, 帧率, 深度帧率) 绑定，配置改变后缓存自动失效。
+    多个相机进程可能同时写入，写入时重新读取并以替换方式落盘。
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+    
+    def _load(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    
+    def get(self, serial: str, request) -> Optional[Tuple[int, int, int, int]]:
+        """取该设备在相同请求下的上次成功配置"""
+        entry = self._load().get(serial)
+        if not entry or entry.get('request') != list(request):
+            return None
+        return tuple(entry['config'])
+    
+    def put(self, serial: str, request, config):
+        """记录成功启动的配置"""
+        data = self._load()
+        data[serial] = {'request': list(request), 'config': list(config), 'updated': time.time()}
+        try:
+            cache_dir = os.path.dirname(self.path)
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.warning(f"流配置缓存保存失败: {e}")
+
+def enumerate_realsense_serials() -> list:
+    """列出已连接的 RealSense 设备序列号（按序列号排序，保证多次运行顺序一致）"""
+    try:
+        _load_realsense()
+        serials = [dev.get_info(rs.camera_info.serial_number) for dev in rs.context().query_devices()]
+        return sorted(serials)
+    except Exception as e:
+        logger.error(f"枚举RealSense设备失败: {e}")
+        return []
+
+def create_camera(spec: dict) -> CameraInterface:
+    """
+    按描述创建相机，描述为可序列化的字典，便于传给工作进程
+    
+    Args:
+        spec: {"type": "realsense", "serial": ..., 其余为 RealSenseCapture 参数}
+              或 {"type": "usb", "camera_index": ..., 其余为 USBCapture 参数}
+    """
+    kwargs = {k: v for k, v in spec.items() if k not in ("type", "name", "role")}
+    camera_type = spec.get("type", "realsense")
+    if camera_type == "realsense":
+        return RealSenseCapture(**kwargs)
+    if camera_type == "usb":
+        return USBCapture(**kwargs)
+    raise ValueError(f"未知的相机类型: {camera_type}")
+
 class USBCapture(CameraInterface):
     """USB相机采集类"""
     
-    def __init__(self, camera_index=0, width=640, height=480):
+    def __init__(self, camera_index=0, width=640, height=480, fps=None, fourcc=None, threaded=True):
+        """
+        Args:
+            camera_index: 相机索引（也可以是视频文件路径，便于离线回放）
+            width, height: 期望分辨率
+            fps: 期望帧率，None 表示使用驱动默认值
+            fourcc: 像素格式，如 "MJPG"；YUYV 在 USB2 上 640x480 以上常被限制到低帧率，
+                    MJPG 压缩传输可获得更高分辨率/帧率，None 表示不协商
+            threaded: 是否启用后台取帧线程，只保留最新一帧；关闭时 get_frames() 同步读取，
+                      会拿到驱动缓冲区中排队的旧帧
+        """
         super().__init__()
         self.camera_index = camera_index
         self.width = width
         self.height = height
+        self.fourcc = None
         
         self.cap = cv2.VideoCapture(camera_index)
         
         if not self.cap.isOpened():
             raise RuntimeError(f"无法打开USB相机 {camera_index}")
         
+        # 像素格式需在设置分辨率之前协商（V4L2 按格式枚举可用分辨率）
+        if fourcc:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        
         # 设置分辨率
         self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
         self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if fps:
+            self.cap.set(cv2.CAP_PROP_FPS, fps)
+        
+        # 尽量缩小驱动缓冲区（部分后端不支持，后台线程仍保证取到最新帧）
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
         
         # 获取实际分辨率
         actual_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         actual_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         actual_fps = self.cap.get(cv2.CAP_PROP_FPS)
+        self.fourcc = self._decode_fourcc(self.cap.get(cv2.CAP_PROP_FOURCC))
+        if fourcc and self.fourcc and self.fourcc != fourcc:
+            logger.warning(f"USB相机不支持 {fourcc} 格式，实际格式: {self.fourcc}")
         
         self.width = actual_width
         self.height = actual_height
         self.fps = actual_fps
         
-        logger.info(f"USB相机已启动: {actual_width}x{actual_height} @ {actual_fps}fps")
+        # 后台取帧线程：最新帧槽位
+        self._frame_condition = threading.Condition()
+        self._latest = None
+        self._grabber_running = False
+        self._grabber_thread = None
+        self.read_failures = 0
+        
+        logger.info(f"USB相机已启动: {actual_width}x{actual_height} @ {actual_fps}fps ({self.fourcc or '默认格式'})")
+        
+        if threaded:
+            self.start_grabber()
+    
+    @staticmethod
+    def _decode_fourcc(value) -> Optional[str]:
+        """CAP_PROP_FOURCC 数值转字符串"""
+        code = int(value)
+        if code <= 0:
+            return None
+        return "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+    
+    def start_grabber(self):
+        """启动后台取帧线程，持续清空驱动缓冲区，只保留最新一帧"""
+        if self._grabber_running:
+            return
+        self._grabber_running = True
+        self._grabber_thread = threading.Thread(target=self._grab_loop, name="USBGrabber", daemon=True)
+        self._grabber_thread.start()
+    
+    def _grab_loop(self):
+        frame_number = 0
+        while self._grabber_running:
+            ret, frame = self.cap.read()
+            if not ret:
+                self.read_failures += 1
+                time.sleep(0.01)
+                continue
+            arrival_time = time.time()
+            self._count_frame(frame_number)
+            with self._frame_condition:
+                if self._latest is not None:
+                    self.frame_stats['skipped'] += 1
+                self._latest = (frame, arrival_time, frame_number)
+                self._frame_condition.notify_all()
+            frame_number += 1
+    
+    def _read_latest(self, timeout=1.0):
+        """取后台线程的最新帧 (frame, arrival_time, frame_number)，超时返回 None"""
+        with self._frame_condition:
+            if self._latest is None:
+                self._frame_condition.wait(timeout)
+            latest, self._latest = self._latest, None
+        return latest
+    
+    def _read_sync(self):
+        """同步读取一帧 (frame, arrival_time, frame_number)"""
+        ret, frame = self.cap.read()
+        if not ret:
+            return None
+        frame_number = self.frame_stats['frames']
+        self._count_frame(frame_number)
+        return frame, time.time(), frame_number
     
     def get_frames(self) -> Tuple[Optional[np.ndarray], Optional[np.ndarray]]:
         """获取彩色图像（USB相机没有深度）"""
         try:
-            ret, frame = self.cap.read()
-            if ret:
-                # USB相机没有深度图像，返回None作为深度
-                return frame, None
-            else:
+            latest = self._read_latest() if self._grabber_running else self._read_sync()
+            if latest is None:
                 return None, None
+            frame, arrival_time, frame_number = latest
+            # UVC 不提供与主机同步的曝光时间戳，以主机收到时刻代替
+            self.last_frame_info = {
+                'frame_number': frame_number,
+                'capture_time': arrival_time,
+                'arrival_time': arrival_time,
+                'timestamp_source': "arrival",
+            }
+            # USB相机没有深度图像，返回None作为深度
+            return frame, None
         except Exception as e:
             logger.error(f"获取USB相机帧失败: {e}")
             return None, None
     
     def stop(self):
         """停止相机"""
+        self._grabber_running = False
+        if self._grabber_thread is not None:
+            self._grabber_thread.join(timeout=2.0)
+            self._grabber_thread = None
         try:
             self.cap.release()
             logger.info("USB相机已停止")
@@ -191,13 +871,17 @@ class USBCapture(CameraInterface):
 class PointCloudGenerator:
     """点云生成器"""
     
-    def __init__(self, camera_intrinsics=None):
+    def __init__(self, camera_intrinsics=None, camera_model=None):
         """
         初始化点云生成器
         
         Args:
             camera_intrinsics: 相机内参 [fx, fy, cx, cy]
+            camera_model: 标定得到的 CameraModel；提供时使用其内参，并在反投影前去畸变
         """
+        self.camera_model = camera_model
+        if camera_intrinsics is None and camera_model is not None:
+            camera_intrinsics = camera_model.intrinsics
         self.camera_intrinsics = camera_intrinsics or [600.0, 600.0, 320.0, 240.0]
     
     def generate_point_cloud(self, color_image: np.ndarray, depth_image: np.ndarray, 
@@ -214,8 +898,20 @@ class PointCloudGenerator:
             points: 点云坐标 (N, 3)
             colors: 点云颜色 (N, 3)
         """
+        # 相机实际分辨率与模型不一致时（相机回退到备用配置），按新尺寸缩放一次
+        if self.camera_model is not None:
+            size = (depth_image.shape[1], depth_image.shape[0])
+            if self.camera_model.image_size != size:
+                self.camera_model = self.camera_model.scaled_to(size)
+                self.camera_intrinsics = self.camera_model.intrinsics
+        
         fx, fy, cx, cy = self.camera_intrinsics
         
+        # 用预计算映射表去畸变（深度图最近邻，避免边缘插值出伪深度）
+        if self.camera_model is not None and self.camera_model.has_distortion:
+            color_image = self.camera_model.undistort_image(color_image)
+            depth_image = self.camera_model.undistort_image(depth_image, cv2.INTER_NEAREST)
+        
         # 获取有效深度点
         h, w = depth_image.shape
         
@@ -244,7 +940,7 @@ class PointCloudGenerator:
     
     def save_point_cloud(self, points: np.ndarray, colors: np.ndarray, filename: str):
         """保存点云为PLY文件"""
-        if OPEN3D_AVAILABLE:
+        if _load_open3d():
             # 使用Open3D保存
             pcd = o3d.geometry.PointCloud()
             pcd.points = o3d.utility.Vector3dVector(points)
@@ -283,23 +979,39 @@ class PointCloudGenerator:
 def check_realsense_connection() -> bool:
     """检查RealSense相机连接"""
     try:
+        _load_realsense()
         ctx = rs.context()
         devices = ctx.query_devices()
         return len(devices) > 0
     except:
         return False
 
-def check_usb_cameras() -> list:
-    """检查可用的USB相机"""
-    available_cameras = []
-    for i in range(6):  # 检查前6个索引
-        cap = cv2.VideoCapture(i)
-        if cap.isOpened():
-            ret, frame = cap.read()
-            if ret and frame is not None:
-                available_cameras.append(i)
-            cap.release()
-    return available_cameras
+def _probe_usb_camera(index: int) -> bool:
+    """打开相机并读一帧，确认可用"""
+    cap = cv2.VideoCapture(index)
+    try:
+        if not cap.isOpened():
+            return False
+        ret, frame = cap.read()
+        return ret and frame is not None
+    finally:
+        cap.release()
+
+def check_usb_cameras(max_index: int = 6) -> list:
+    """
+    检查可用的USB相机
+    
+    Linux 下只探测存在的 /dev/videoN 节点，各索引并行打开（每个打开都要等驱动协商）。
+    """
+    indices = list(range(max_index))
+    if os.path.isdir("/sys/class/video4linux"):  # Linux V4L2
+        suffixes = (path[len("/dev/video"):] for path in glob.glob("/dev/video*"))
+        indices = sorted(int(n) for n in suffixes if n.isdigit() and int(n) < max_index)
+    if not indices:
+        return []
+    with ThreadPoolExecutor(max_workers=len(indices)) as pool:
+        results = list(pool.map(_probe_usb_camera, indices))
+    return [i for i, ok in zip(indices, results) if ok]
 
 # 向后兼容的别名
 StereoCamera = RealSenseCapture
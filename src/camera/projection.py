@@ -0,0 +1,180 @@
+"""
+深度-彩色稀疏投影模块
+Sparse depth/color projection using on-device stream calibration
+
+RealSense 在设备内存有每路流的内参和流之间的外参。保留未对齐的深度图时，
+只需把追踪器/障碍物检测器真正查询的少量彩色像素投影到深度图上取值，
+无需每帧在 CPU 上运行 rs.align 对整幅深度图重采样。
+"""
+
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+class StreamIntrinsics:
+    """单路流的内参（与 rs.intrinsics 字段对应，但不依赖 pyrealsense2）"""
+
+    def __init__(self, width: int, height: int, fx: float, fy: float, ppx: float, ppy: float,
+                 coeffs=None):
+        self.width = int(width)
+        self.height = int(height)
+        self.fx = float(fx)
+        self.fy = float(fy)
+        self.ppx = float(ppx)
+        self.ppy = float(ppy)
+        self.coeffs = np.asarray(coeffs if coeffs is not None else np.zeros(5), dtype=np.float64).reshape(1, -1)
+
+    @classmethod
+    def from_rs(cls, intr) -> 'StreamIntrinsics':
+        """从 rs.intrinsics 构造（Brown-Conrady 系数顺序与 OpenCV 一致）"""
+        return cls(intr.width, intr.height, intr.fx, intr.fy, intr.ppx, intr.ppy, list(intr.coeffs))
+
+    @property
+    def camera_matrix(self) -> np.ndarray:
+        return np.array([[self.fx, 0.0, self.ppx], [0.0, self.fy, self.ppy], [0.0, 0.0, 1.0]])
+
+    @property
+    def has_distortion(self) -> bool:
+        return bool(np.any(self.coeffs != 0))
+
+    def deproject(self, pixels: np.ndarray, z: np.ndarray) -> np.ndarray:
+        """像素 (N,2) + 深度 (N,)（米） -> 相机坐标系3D点 (N,3)"""
+        pixels = np.asarray(pixels, dtype=np.float64).reshape(-1, 2)
+        if self.has_distortion and len(pixels):
+            normalized = cv2.undistortPoints(pixels.reshape(-1, 1, 2), self.camera_matrix,
+                                             self.coeffs).reshape(-1, 2)
+        else:
+            normalized = np.column_stack([(pixels[:, 0] - self.ppx) / self.fx,
+                                          (pixels[:, 1] - self.ppy) / self.fy])
+        z = np.asarray(z, dtype=np.float64).reshape(-1)
+        return np.column_stack([normalized * z[:, None], z])
+
+    def project(self, points: np.ndarray) -> np.ndarray:
+        """相机坐标系3D点 (N,3) -> 像素 (N,2)"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 3)
+        if self.has_distortion and len(points):
+            pixels, _ = cv2.projectPoints(points, np.zeros(3), np.zeros(3), self.camera_matrix, self.coeffs)
+            return pixels.reshape(-1, 2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x = points[:, 0] / points[:, 2]
+            y = points[:, 1] / points[:, 2]
+        return np.column_stack([x * self.fx + self.ppx, y * self.fy + self.ppy])
+
+
+class DepthColorProjector:
+    """
+    在未对齐的深度图上查询彩色像素的深度
+
+    算法与 librealsense 的 rs2_project_color_pixel_to_depth_pixel 相同：
+    彩色像素在 [min_depth, max_depth] 范围内对应深度图上的一条极线，
+    沿极线逐像素取深度值、反投影回彩色图，选取与查询像素最接近的那个点。
+    """
+
+    def __init__(self, depth_intrinsics: StreamIntrinsics, color_intrinsics: StreamIntrinsics,
+                 depth_to_color: Tuple[np.ndarray, np.ndarray], depth_scale: float = 0.001,
+                 depth_range: Tuple[float, float] = (0.1, 10.0), max_pixel_error: float = 2.0):
+        """
+        Args:
+            depth_intrinsics: 深度流内参
+            color_intrinsics: 彩色流内参
+            depth_to_color: 深度坐标系到彩色坐标系的外参 (R 3x3, t 3)，单位米
+            depth_scale: 深度原始值到米的比例
+            depth_range: 极线搜索的深度范围（米）
+            max_pixel_error: 反投影误差超过该值（像素）时认为无有效深度
+        """
+        self.depth_intrinsics = depth_intrinsics
+        self.color_intrinsics = color_intrinsics
+        self.R_dc = np.asarray(depth_to_color[0], dtype=np.float64).reshape(3, 3)
+        self.t_dc = np.asarray(depth_to_color[1], dtype=np.float64).reshape(3)
+        # 逆变换：彩色坐标系 -> 深度坐标系
+        self.R_cd = self.R_dc.T
+        self.t_cd = -self.R_cd @ self.t_dc
+        self.depth_scale = float(depth_scale)
+        self.depth_range = depth_range
+        self.max_pixel_error = max_pixel_error
+
+    @classmethod
+    def from_profile(cls, profile, **kwargs) -> 'DepthColorProjector':
+        """
+        从已启动管道的 rs.pipeline_profile 读取设备内的内参/外参
+
+        Args:
+            profile: pipeline.start() 的返回值
+        """
+        import pyrealsense2 as rs
+
+        depth_profile = profile.get_stream(rs.stream.depth).as_video_stream_profile()
+        color_profile = profile.get_stream(rs.stream.color).as_video_stream_profile()
+        extrinsics = depth_profile.get_extrinsics_to(color_profile)
+        # rs.extrinsics.rotation 为列主序
+        rotation = np.asarray(extrinsics.rotation, dtype=np.float64).reshape(3, 3).T
+        depth_scale = profile.get_device().first_depth_sensor().get_depth_scale()
+
+        return cls(StreamIntrinsics.from_rs(depth_profile.get_intrinsics()),
+                   StreamIntrinsics.from_rs(color_profile.get_intrinsics()),
+                   (rotation, extrinsics.translation), depth_scale, **kwargs)
+
+    def color_to_depth_pixels(self, depth_image: np.ndarray, color_pixels) -> np.ndarray:
+        """
+        彩色像素 (N,2) -> 深度图像素 (N,2)，找不到有效深度的点为 NaN
+        """
+        color_pixels = np.asarray(color_pixels, dtype=np.float64).reshape(-1, 2)
+        n = len(color_pixels)
+        result = np.full((n, 2), np.nan)
+        if n == 0:
+            return result
+
+        depth_intr = self.depth_intrinsics
+        h, w = depth_image.shape[:2]
+
+        # 极线端点：彩色像素分别取最小/最大深度，变换到深度坐标系后投影
+        near = self.color_intrinsics.deproject(color_pixels, np.full(n, self.depth_range[0]))
+        far = self.color_intrinsics.deproject(color_pixels, np.full(n, self.depth_range[1]))
+        start = depth_intr.project(near @ self.R_cd.T + self.t_cd)
+        end = depth_intr.project(far @ self.R_cd.T + self.t_cd)
+
+        # 所有查询点统一步数，逐像素采样极线 (N, S)
+        length = np.linalg.norm(end - start, axis=1)
+        steps = int(np.clip(np.ceil(np.nanmax(length)) + 1, 2, max(w, h)))
+        t = np.linspace(0.0, 1.0, steps)
+        u = np.rint(start[:, 0:1] + (end[:, 0:1] - start[:, 0:1]) * t).astype(np.int64)
+        v = np.rint(start[:, 1:2] + (end[:, 1:2] - start[:, 1:2]) * t).astype(np.int64)
+
+        inside = (u >= 0) & (u < w) & (v >= 0) & (v < h)
+        raw = np.zeros(u.shape, dtype=np.float64)
+        raw[inside] = depth_image[v[inside], u[inside]]
+        valid = inside & (raw > 0)
+        if not np.any(valid):
+            return result
+
+        # 有效采样点按实测深度反投影，再变换回彩色坐标系投影
+        depth_points = depth_intr.deproject(np.column_stack([u[valid], v[valid]]),
+                                            raw[valid] * self.depth_scale)
+        reprojected = self.color_intrinsics.project(depth_points @ self.R_dc.T + self.t_dc)
+
+        error = np.full(u.shape, np.inf)
+        query = np.broadcast_to(color_pixels[:, None, :], u.shape + (2,))[valid]
+        error[valid] = np.linalg.norm(reprojected - query, axis=1)
+
+        best = np.argmin(error, axis=1)
+        rows = np.arange(n)
+        found = error[rows, best] <= self.max_pixel_error
+        result[found, 0] = u[rows, best][found]
+        result[found, 1] = v[rows, best][found]
+        return result
+
+    def depth_at_color_pixels(self, depth_image: np.ndarray, color_pixels) -> np.ndarray:
+        """
+        查询彩色像素处的深度（米，彩色坐标系 Z），找不到有效深度的点为 NaN
+        """
+        depth_pixels = self.color_to_depth_pixels(depth_image, color_pixels)
+        depths = np.full(len(depth_pixels), np.nan)
+        found = ~np.isnan(depth_pixels[:, 0])
+        if np.any(found):
+            uv = depth_pixels[found].astype(np.int64)
+            z = depth_image[uv[:, 1], uv[:, 0]] * self.depth_scale
+            points = self.depth_intrinsics.deproject(uv, z) @ self.R_dc.T + self.t_dc
+            depths[found] = points[:, 2]
+        return depths
@@ -0,0 +1,250 @@
+"""
+标定运行时模块 - 加载完整相机模型并预计算去畸变映射表
+Calibration Runtime - Full camera model with precomputed undistortion maps
+
+标定结果 (mtx, dist) 只在启动时加载一次；cv2.initUndistortRectifyMap 生成的
+定点映射表 (CV_16SC2 + CV_16UC1) 缓存在 .npz 旁边，之后每帧只需一次 cv2.remap。
+只需要几何结果时，用 undistort_points() 仅对稀疏的直线端点去畸变即可。
+"""
+
+import os
+import hashlib
+import logging
+from typing import Optional, Tuple, List
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class CameraModel:
+    """针孔相机模型 + 畸变系数"""
+
+    def __init__(self, camera_matrix: np.ndarray, dist_coeffs: Optional[np.ndarray] = None,
+                 image_size: Optional[Tuple[int, int]] = None, source_path: Optional[str] = None):
+        """
+        Args:
+            camera_matrix: 3x3 相机内参矩阵
+            dist_coeffs: 畸变系数 (k1, k2, p1, p2[, k3...])，None 表示无畸变
+            image_size: 内参对应的图像尺寸 (w, h)，未知时为 None
+            source_path: 标定文件路径，映射表缓存保存在它旁边
+        """
+        self.camera_matrix = np.asarray(camera_matrix, dtype=np.float64).reshape(3, 3)
+        if dist_coeffs is None:
+            dist_coeffs = np.zeros(5)
+        self.dist_coeffs = np.asarray(dist_coeffs, dtype=np.float64).reshape(1, -1)
+        self.image_size = tuple(int(v) for v in image_size) if image_size is not None else None
+        self.source_path = source_path
+
+        self._map1 = None
+        self._map2 = None
+
+    @classmethod
+    def load(cls, calib_path: str, image_size: Optional[Tuple[int, int]] = None) -> Optional['CameraModel']:
+        """
+        从 calibrate_camera 保存的 .npz 加载相机模型
+
+        Args:
+            calib_path: 标定文件路径
+            image_size: 运行时图像尺寸 (w, h)；与标定尺寸不同时按比例缩放内参
+
+        Returns:
+            CameraModel，文件不存在时返回 None
+        """
+        if not os.path.exists(calib_path):
+            return None
+
+        data = np.load(calib_path)
+        calib_size = tuple(data['image_size']) if 'image_size' in data.files else None
+        model = cls(data['mtx'], data['dist'] if 'dist' in data.files else None,
+                    image_size=calib_size, source_path=calib_path)
+
+        if image_size is not None:
+            model = model.scaled_to(image_size)
+        return model
+
+    def scaled_to(self, image_size: Tuple[int, int]) -> 'CameraModel':
+        """
+        返回适配指定分辨率的相机模型
+
+        标定尺寸未知时认为内参就是该分辨率下的；畸变系数与分辨率无关，保持不变。
+        """
+        image_size = (int(image_size[0]), int(image_size[1]))
+        if self.image_size is None or self.image_size == image_size:
+            return CameraModel(self.camera_matrix, self.dist_coeffs, image_size, self.source_path)
+
+        sx = image_size[0] / float(self.image_size[0])
+        sy = image_size[1] / float(self.image_size[1])
+        mtx = self.camera_matrix.copy()
+        mtx[0, 0] *= sx
+        mtx[0, 2] *= sx
+        mtx[1, 1] *= sy
+        mtx[1, 2] *= sy
+        return CameraModel(mtx, self.dist_coeffs, image_size, self.source_path)
+
+    @property
+    def intrinsics(self) -> List[float]:
+        """[fx, fy, cx, cy] 格式的内参（去畸变后的图像同样使用这组内参）"""
+        m = self.camera_matrix
+        return [float(m[0, 0]), float(m[1, 1]), float(m[0, 2]), float(m[1, 2])]
+
+    @property
+    def has_distortion(self) -> bool:
+        return bool(np.any(self.dist_coeffs != 0))
+
+    def _cache_key(self) -> str:
+        """内参、畸变和尺寸共同决定映射表，任一变化都会使缓存失效"""
+        h = hashlib.sha1()
+        h.update(self.camera_matrix.tobytes())
+        h.update(self.dist_coeffs.tobytes())
+        h.update(np.asarray(self.image_size, dtype=np.int64).tobytes())
+        return h.hexdigest()
+
+    def map_cache_path(self) -> Optional[str]:
+        """映射表缓存路径：<标定文件名>_undistort_<w>x<h>.npz"""
+        if not self.source_path or self.image_size is None:
+            return None
+        stem, _ = os.path.splitext(self.source_path)
+        return f"{stem}_undistort_{self.image_size[0]}x{self.image_size[1]}.npz"
+
+    def init_maps(self, use_cache: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        生成（或从磁盘读取）定点去畸变映射表
+
+        Returns:
+            (map1, map2)：CV_16SC2 坐标表和 CV_16UC1 插值表
+        """
+        if self._map1 is not None:
+            return self._map1, self._map2
+        if self.image_size is None:
+            raise ValueError("生成去畸变映射表需要已知图像尺寸")
+
+        cache_path = self.map_cache_path() if use_cache else None
+        key = self._cache_key()
+
+        if cache_path and os.path.exists(cache_path):
+            try:
+                data = np.load(cache_path)
+                if str(data['key']) == key:
+                    self._map1, self._map2 = data['map1'], data['map2']
+                    logger.info(f"已加载去畸变映射表缓存: {cache_path}")
+                    return self._map1, self._map2
+            except (OSError, KeyError, ValueError) as e:
+                logger.warning(f"去畸变映射表缓存读取失败，重新生成: {e}")
+
+        # 新相机矩阵取原内参，去畸变后的像素坐标与原图保持同一尺度
+        self._map1, self._map2 = cv2.initUndistortRectifyMap(
+            self.camera_matrix, self.dist_coeffs, None, self.camera_matrix,
+            self.image_size, cv2.CV_16SC2)
+
+        if cache_path:
+            try:
+                np.savez(cache_path, map1=self._map1, map2=self._map2, key=key)
+                logger.info(f"去畸变映射表已缓存: {cache_path}")
+            except OSError as e:
+                logger.warning(f"去畸变映射表缓存保存失败: {e}")
+
+        return self._map1, self._map2
+
+    def undistort_image(self, image: np.ndarray, interpolation: int = cv2.INTER_LINEAR) -> np.ndarray:
+        """
+        用预计算映射表对整幅图像去畸变
+
+        深度图应使用 cv2.INTER_NEAREST，避免在物体边缘插出不存在的深度值。
+        """
+        if not self.has_distortion:
+            return image
+        h, w = image.shape[:2]
+        if self.image_size != (w, h):
+            raise ValueError(f"图像尺寸 {(w, h)} 与相机模型尺寸 {self.image_size} 不一致")
+        map1, map2 = self.init_maps()
+        return cv2.remap(image, map1, map2, interpolation)
+
+    def undistort_points(self, points) -> np.ndarray:
+        """
+        对稀疏像素点去畸变，返回同一像素坐标系下的 (N, 2) float 数组
+
+        Args:
+            points: 任意可 reshape 为 (N, 2) 的像素坐标
+        """
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 1, 2)
+        if len(pts) == 0 or not self.has_distortion:
+            return pts.reshape(-1, 2)
+        undistorted = cv2.undistortPoints(pts, self.camera_matrix, self.dist_coeffs,
+                                          P=self.camera_matrix)
+        return undistorted.reshape(-1, 2)
+
+    def distort_points(self, points) -> np.ndarray:
+        """
+        undistort_points 的逆变换：把去畸变坐标映射回原始（畸变）图像像素，返回 (N, 2) float 数组
+
+        用于在原始图像上绘制结果，或按原始像素查询深度。
+        """
+        pts = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if len(pts) == 0 or not self.has_distortion:
+            return pts
+        m = self.camera_matrix
+        rays = np.column_stack([(pts[:, 0] - m[0, 2]) / m[0, 0], (pts[:, 1] - m[1, 2]) / m[1, 1],
+                                np.ones(len(pts))])
+        distorted, _ = cv2.projectPoints(rays, np.zeros(3), np.zeros(3), m, self.dist_coeffs)
+        return distorted.reshape(-1, 2)
+
+    @staticmethod
+    def _map_lines(lines: List, mapping) -> List:
+        """
+        对直线列表中全部端点做一次批量坐标变换
+
+        None 与不是恰好4个值的条目（如部分视角的轮廓点集）原样保留，不当作直线变换。
+        """
+        valid = [i for i, line in enumerate(lines)
+                 if line is not None and np.asarray(line).size == 4]
+        if not valid:
+            return list(lines)
+
+        pts = np.array([np.asarray(lines[i], dtype=np.float64).ravel() for i in valid]).reshape(-1, 2)
+        mapped = mapping(pts).reshape(-1, 4)
+
+        result = list(lines)
+        for row, i in zip(mapped, valid):
+            result[i] = [float(v) for v in row]
+        return result
+
+    def undistort_lines(self, lines: List) -> List:
+        """
+        对直线端点列表 [[x1, y1, x2, y2] 或 None, ...] 去畸变，None 原样保留
+
+        所有端点合并为一次 cv2.undistortPoints 调用。
+        """
+        if not self.has_distortion:
+            return list(lines)
+        return self._map_lines(lines, self.undistort_points)
+
+    def distort_lines(self, lines: List) -> List:
+        """undistort_lines 的逆变换：把去畸变的直线端点映射回原始图像像素"""
+        if not self.has_distortion:
+            return list(lines)
+        return self._map_lines(lines, self.distort_points)
+
+
+def load_camera_model(calib_path: str, image_size: Optional[Tuple[int, int]] = None,
+                      precompute_maps: bool = True) -> Optional[CameraModel]:
+    """
+    加载相机模型，并在启动阶段预先生成去畸变映射表
+
+    Returns:
+        CameraModel，标定文件不存在或读取失败时返回 None
+    """
+    try:
+        model = CameraModel.load(calib_path, image_size)
+    except Exception as e:
+        logger.error(f"加载相机标定文件失败: {e}")
+        return None
+
+    if model is None:
+        logger.warning(f"未找到相机标定文件: {calib_path}")
+        return None
+
+    if precompute_maps and model.has_distortion and model.image_size is not None:
+        model.init_maps()
+    return model
@@ -0,0 +1,184 @@
+"""
+相机看门狗 - 连续取帧失败时退避、安全停车并在后台重建相机
+Camera watchdog with backoff and hot reconnect
+
+主循环每帧调用 frame_ok() / frame_failed()：偶发失败按指数退避等待后重试，
+连续失败达到 SafetyConfig.MAX_CAMERA_FAILURE_COUNT 次即认为相机丢失，
+调用 on_lost（下发停车命令），后台线程停止旧相机并按退避间隔反复重建，
+主循环在 wait_for_camera() 中阻塞等待，重建成功后在主循环线程中回调 on_restored(camera)。
+"""
+
+import threading
+import time
+import logging
+from typing import Callable, Optional
+
+try:
+    from config import SafetyConfig
+except ImportError:
+    class SafetyConfig:
+        MAX_CAMERA_FAILURE_COUNT = 5
+        CAMERA_RETRY_BACKOFF = (0.01, 0.5)
+        CAMERA_RECONNECT_BACKOFF = (0.5, 10.0)
+
+
+class CameraWatchdog:
+    """跟踪连续取帧失败次数，超过上限后在后台线程中重建相机"""
+
+    def __init__(self, camera, camera_factory: Callable[[], object],
+                 on_lost: Optional[Callable[[], None]] = None,
+                 on_restored: Optional[Callable[[object], None]] = None,
+                 max_failures: Optional[int] = None, retry_backoff=None, reconnect_backoff=None):
+        """
+        Args:
+            camera: 当前相机
+            camera_factory: 创建并打开新相机的函数，失败时抛出异常
+            on_lost: 判定相机丢失时的回调（在调用 frame_failed 的线程中执行），用于安全停车
+            on_restored: 新相机就绪时的回调 on_restored(camera)（在调用 wait_for_camera 的线程中执行）
+            max_failures: 判定相机丢失的连续失败次数
+            retry_backoff: 单帧失败重试的 (初始, 最大) 等待时间（秒），每次失败翻倍
+            reconnect_backoff: 重建相机失败后的 (初始, 最大) 重试间隔（秒），每次失败翻倍
+        """
+        self.camera = camera
+        self.camera_factory = camera_factory
+        self.on_lost = on_lost
+        self.on_restored = on_restored
+        self.max_failures = max_failures if max_failures is not None else SafetyConfig.MAX_CAMERA_FAILURE_COUNT
+        self.retry_backoff = tuple(retry_backoff or SafetyConfig.CAMERA_RETRY_BACKOFF)
+        self.reconnect_backoff = tuple(reconnect_backoff or SafetyConfig.CAMERA_RECONNECT_BACKOFF)
+        self.logger = logging.getLogger(__name__)
+
+        self.consecutive_failures = 0
+        self._reconnecting = False
+        self._lock = threading.Lock()
+        self._restored = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self._pending_camera = None
+        self._lost_time = None
+
+        # 统计
+        self.stats = {
+            'frame_failures': 0,
+            'camera_lost': 0,
+            'reconnect_attempts': 0,
+            'reconnects': 0,
+            'last_error': None,
+            'last_outage_s': None,
+        }
+
+    def is_reconnecting(self) -> bool:
+        """相机是否已判定丢失、正在后台重建"""
+        return self._reconnecting
+
+    def frame_ok(self):
+        """取帧成功，清零连续失败计数"""
+        self.consecutive_failures = 0
+
+    def frame_failed(self, error: Optional[str] = None) -> float:
+        """
+        记录一次取帧失败
+
+        Returns:
+            调用方重试前应等待的时间（秒）；已判定丢失时为 0，调用方应改用 wait_for_camera()
+        """
+        self.consecutive_failures += 1
+        self.stats['frame_failures'] += 1
+        if error:
+            self.stats['last_error'] = error
+        if self._reconnecting:
+            return 0.0
+        if self.consecutive_failures >= self.max_failures:
+            self._start_reconnect()
+            return 0.0
+        initial, maximum = self.retry_backoff
+        return min(maximum, initial * (2 ** (self.consecutive_failures - 1)))
+
+    def _start_reconnect(self):
+        """判定相机丢失：回调安全停车，启动后台重建线程"""
+        self._reconnecting = True
+        self._lost_time = time.time()
+        self.stats['camera_lost'] += 1
+        self.logger.error(f"相机连续 {self.consecutive_failures} 次取帧失败，停车并尝试重连")
+        if self.on_lost is not None:
+            try:
+                self.on_lost()
+            except Exception as e:
+                self.logger.error(f"相机丢失回调异常: {e}")
+
+        self._restored.clear()
+        self._thread = threading.Thread(target=self._reconnect_loop, args=(self.camera,),
+                                        name="CameraReconnect", daemon=True)
+        self._thread.start()
+
+    def _reconnect_loop(self, old_camera):
+        """停止旧相机（释放设备），按退避间隔反复创建新相机直到成功或停止"""
+        try:
+            old_camera.stop()
+        except Exception as e:
+            self.logger.warning(f"停止旧相机失败: {e}")
+
+        interval, maximum = self.reconnect_backoff
+        while not self._stop_event.is_set():
+            self.stats['reconnect_attempts'] += 1
+            try:
+                camera = self.camera_factory()
+            except Exception as e:
+                self.stats['last_error'] = str(e)
+                self.logger.warning(f"相机重连失败，{interval:.1f}s 后重试: {e}")
+                self._stop_event.wait(interval)
+                interval = min(maximum, interval * 2)
+                continue
+
+            with self._lock:
+                self._pending_camera = camera
+            self._restored.set()
+            return
+
+    def wait_for_camera(self, timeout: float) -> bool:
+        """
+        等待后台重建完成（阻塞，不占CPU）
+
+        Returns:
+            新相机已接管时为 True，超时为 False
+        """
+        if not self._restored.wait(timeout):
+            return False
+        with self._lock:
+            camera, self._pending_camera = self._pending_camera, None
+            self._restored.clear()
+        if camera is None:
+            return False
+
+        self.camera = camera
+        self.consecutive_failures = 0
+        self._reconnecting = False
+        self.stats['reconnects'] += 1
+        self.stats['last_outage_s'] = time.time() - self._lost_time
+        self.logger.info(f"相机已重连，中断 {self.stats['last_outage_s']:.1f}s")
+        if self.on_restored is not None:
+            self.on_restored(camera)
+        return True
+
+    def get_status(self) -> dict:
+        """看门狗状态与统计"""
+        return {
+            'state': 'reconnecting' if self._reconnecting else ('degraded' if self.consecutive_failures else 'ok'),
+            'consecutive_failures': self.consecutive_failures,
+            'max_failures': self.max_failures,
+            **self.stats,
+        }
+
+    def stop(self):
+        """停止后台重建；已建好但未接管的相机一并关闭"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+        with self._lock:
+            camera, self._pending_camera = self._pending_camera, None
+        if camera is not None:
+            try:
+                camera.stop()
+            except Exception as e:
+                self.logger.warning(f"关闭未接管的相机失败: {e}")
@@ -4,7 +4,8 @@ Tiaozhanbei2.0 项目全局配置文件
 """
 
 import os
-import numpy as np
+import math
+from functools import lru_cache
 
 # ========================= 项目基础配置 =========================
 PROJECT_NAME = "Tiaozhanbei2.0"
@@ -22,6 +23,8 @@ class CameraConfig:
     # 相机配置 - RealSense D455深度相机已安装并测试正常
     CAMERA_TYPE = "realsense"  # 使用RealSense深度相机
     USB_CAMERA_INDEX = 0  # USB摄像头索引 (备用)
+    USB_FOURCC = "MJPG"  # USB像素格式协商（MJPG带宽占用小，可获得更高帧率），None 表示驱动默认
+    USB_THREADED_GRAB = True  # 后台取帧线程只保留最新帧，避免读到缓冲区中的旧帧
     
     # 图像分辨率
     COLOR_WIDTH = 640   # 降低分辨率以提高Jetson性能
@@ -31,21 +34,55 @@ class CameraConfig:
     
     # 帧率
     FPS = 30
+    DEPTH_FPS = 30  # 深度流帧率，高频避障可设为60/90（D455 深度 640x480 支持90fps）
     
     # 标定相关
     CALIBRATION_DATA_DIR = os.path.join(DATA_DIR, "calib")
     CALIBRATION_CONFIG_PATH = os.path.join(CALIBRATION_DATA_DIR, "config", "d455_intrinsics.npz")
+    UNDISTORT_ENABLED = True  # 追踪器对直线端点去畸变（映射表缓存在标定文件旁）
+    
+    # 按设备序列号缓存上次成功启动的流配置，冷启动时直接使用
+    STREAM_PROFILE_CACHE_PATH = os.path.join(CALIBRATION_DATA_DIR, "config", "realsense_profiles.json")
     
     # 棋盘格标定参数
     CHESSBOARD_SIZE = (11, 8)  # 内部角点数量 (列, 行)
     SQUARE_SIZE_METERS = 0.02  # 方格实际边长 (米)
     MIN_CALIBRATION_IMAGES = 5  # 最少需要的有效标定图片数
     
+    # 图像流："color" 彩色+深度（需对齐）；"infrared" 左红外Y8+深度，红外与深度同视角，
+    # 省去对齐与灰度转换，暗环境下也可用（追踪只用灰度边缘）
+    REALSENSE_STREAM = "color"
+    IR_EMITTER_ENABLED = True  # 红外模式下打开结构光投射器（深度更好，红外图带散斑）
+    
     # 深度相关
     DEPTH_SCALE = 0.001  # RealSense深度比例 (mm to m)
+    ALIGN_DEPTH_TO_COLOR = False  # 每帧主机端对齐；关闭时用设备内参/外参只投影被查询的像素
     MIN_DEPTH = 0.1  # 最小深度 (米)
     MAX_DEPTH = 10.0  # 最大深度 (米)
     
+    # 深度后处理滤波链（librealsense，按顺序执行，启动时构建一次）
+    DEPTH_FILTERS_ENABLED = True
+    DEPTH_FILTERS = [
+        ("decimation", {"filter_magnitude": 2}),  # 2x降采样，下游深度处理量减为1/4
+        ("threshold", {"min_distance": MIN_DEPTH, "max_distance": MAX_DEPTH}),
+        ("depth_to_disparity", {}),  # 空间/时间滤波在视差域效果更好
+        ("spatial", {"filter_magnitude": 2, "filter_smooth_alpha": 0.5, "filter_smooth_delta": 20}),
+        # ("temporal", {"filter_smooth_alpha": 0.4, "filter_smooth_delta": 20}),  # 会引入拖影，运动中慎用
+        ("disparity_to_depth", {}),
+        ("hole_filling", {"holes_fill": 1}),
+    ]
+    
+    # 多相机：每台相机在独立进程中运行追踪与避障，结果经共享内存融合
+    MULTI_CAMERA_ENABLED = False
+    MULTI_CAMERAS = [
+        # serial 为 None 时按序列号排序依次分配已连接设备；
+        # role 为相机朝向，只有 "forward" 相机参与管道追踪与前进避障门控
+        {"name": "front", "serial": None, "role": "forward"},
+        {"name": "rear", "serial": None, "role": "rear"},
+    ]
+    PRIMARY_CAMERA = "front"  # 管道追踪优先使用的相机
+    MULTI_CAMERA_MAX_RESULT_AGE = 0.3  # 结果曝光时刻超过该时间（秒）未更新即视为过期，不参与融合
+
     # 点云相关
     POINT_CLOUD_DIR = os.path.join(DATA_DIR, "point_clouds")
     VOXEL_SIZE = 0.01  # 点云下采样体素大小 (米)
@@ -110,22 +147,46 @@ class PerceptionConfig:
     OBSTACLE_WARNING_DISTANCE = 1.5  # 警告距离 (米)
     OBSTACLE_CENTER_REGION_WIDTH = 0.3  # 中央区域比例（0-1）用于前方障碍物检测
     
+    # 高频避障回路（纯深度，按深度帧率运行，抢占运动命令）
+    OBSTACLE_FAST_LOOP_ENABLED = True
+    OBSTACLE_PREEMPT_LEVELS = ("critical", "warning")  # 触发抢占的威胁等级
+    OBSTACLE_PREEMPT_HOLD_TIME = 0.3  # 威胁消失后继续抢占的时间 (秒)
+    OBSTACLE_COMMAND_INTERVAL = 0.2  # 持续威胁时重发避障命令的最小间隔 (秒)
+    OBSTACLE_MAX_RESULT_AGE_FRAMES = 2.0  # 高频回路结果比当前帧早超过该数量的深度帧间隔即视为过期，主循环自行检测
+
+    # 独立感知进程：追踪与避障在子进程运行，帧/结果经共享内存传递，主进程只做I/O与控制
+    PROCESS_WORKER_ENABLED = False
+    PROCESS_WORKER_TIMEOUT = 0.5  # 等待感知结果的超时 (秒)
+    
     # 管道追踪
     PIPE_DEPTH_THRESHOLD = 1.5  # 管道深度阈值 (米)
     PIPE_MIN_LENGTH = 50  # 最小管道长度 (像素)
     PIPE_MAX_GAP = 10  # 管道线段最大间隙 (像素)
+    PIPE_MIN_DEPTH = 0.1  # 管道深度带下限 (米)，上限为 PIPE_DEPTH_THRESHOLD
+    PIPE_DEPTH_GATE_ENABLED = True  # 只保留深度带内的边缘，背景杂物不参与霍夫投票（仅深度与图像对齐时生效）
+    PIPE_DEPTH_GATE_DILATE = 15  # 深度门限掩码膨胀半径 (像素)，容忍边缘处深度缺失
+    PIPE_DEPTH_GATE_MIN_COVERAGE = 0.02  # 掩码覆盖率低于该比例时认为深度不可用，不做门限
+    PIPE_DEPTH_EDGES_ENABLED = False  # 叠加深度 Sobel 得到的深度不连续边缘（深度已对齐到彩色时开启）
+    PIPE_DEPTH_EDGE_THRESHOLD = 50  # 深度不连续阈值 (毫米/像素)
     
     # 边缘检测
-    CANNY_LOW_THRESHOLD = 50
+    CANNY_LOW_THRESHOLD = 50   # 关闭自适应时使用的固定阈值
     CANNY_HIGH_THRESHOLD = 150
+    CANNY_AUTO = True  # 按灰度中值自适应：[(1-σ)·median, (1+σ)·median]
+    CANNY_SIGMA = 0.33
+    CANNY_MIN_LOW_THRESHOLD = 20  # 暗场/低对比度下的阈值下限，避免噪声边缘
     GAUSSIAN_BLUR_KERNEL = (5, 5)
     
     # 霍夫变换
     HOUGH_RHO = 1  # 距离分辨率
-    HOUGH_THETA = np.pi / 180  # 角度分辨率
-    HOUGH_THRESHOLD = 50  # 累加器阈值
+    HOUGH_THETA = math.pi / 180  # 角度分辨率
+    HOUGH_THRESHOLD = 50  # 累加器阈值（自适应时为初始值）
     HOUGH_MIN_LINE_LENGTH = 30  # 最小线段长度
-    HOUGH_MAX_LINE_GAP = 5  # 最大线段间隙
+    HOUGH_MAX_LINE_GAP = 20  # 最大线段间隙
+    HOUGH_AUTO_TUNE = True  # 按每象限候选线段数反馈调节累加器阈值
+    HOUGH_TARGET_SEGMENTS = 10  # 每象限目标候选线段数
+    HOUGH_THRESHOLD_RANGE = (15, 200)  # 累加器阈值调节范围
+    HOUGH_TUNE_GAIN = 0.25  # 调节增益：阈值按 (线段数/目标)^gain 缩放（目标的1/2~2倍内不调节）
     
     # RANSAC 圆柱拟合
     RANSAC_SIGMA = 0.01  # RANSAC阈值
@@ -179,6 +240,13 @@ class ControlConfig:
     DIRECTION_SMOOTHING = 3          # 方向平滑帧数
     MANUAL_COMMAND_TIMEOUT = 2.0     # 手动命令超时时间 (秒)
     
+    # 转向状态机 (迟滞 + 最小驻留时间，防止方向抖动)
+    TURN_ENTER_ANGLE = 15.0          # 进入转向状态的轴线偏角 (度)
+    TURN_EXIT_ANGLE = 8.0            # 退出转向状态的轴线偏角 (度)，需小于进入阈值
+    TURN_MIN_DWELL_TIME = 0.5        # 状态最小驻留时间 (秒)
+    TURN_LOST_HOLD_FRAMES = 5        # 丢失管道后保持当前状态的帧数
+    DECISION_LOG_SIZE = 1000         # 决策日志保留条数
+    
     # 运动控制参数
     MOVE_SPEED = 0.5        # 移动速度
     TURN_SPEED = 0.5        # 转向速度
@@ -215,6 +283,10 @@ class RunModeConfig:
     DISPLAY_ENABLED = True       # 是否显示图像
     SAVE_RESULTS = True          # 是否保存结果
     VERBOSE_OUTPUT = True        # 是否详细输出
+    
+    # 无头模式：感知路径只输出数值结果，不生成任何可视化
+    HEADLESS = False
+    VISUALIZATION_RATE_HZ = 5.0  # 可视化（显示/保存供Web读取）的刷新频率
 
 # ========================= 日志配置 =========================
 class LogConfig:
@@ -232,6 +304,16 @@ class LogConfig:
     # 日志轮转
     MAX_LOG_SIZE = 10 * 1024 * 1024  # 10MB
     BACKUP_COUNT = 5
+    
+    # 异步写出：热路径只入队，控制台/文件写出在后台线程完成
+    LOG_ASYNC = True
+    LOG_QUEUE_SIZE = 10000  # 队列满时丢弃新日志，不阻塞追踪回路
+    
+    # 按调用位置限频：每处日志每个窗口内最多输出 BURST 条，其余计数后丢弃
+    LOG_RATE_LIMIT_ENABLED = True
+    LOG_RATE_LIMIT_INTERVAL = 1.0  # 秒
+    LOG_RATE_LIMIT_BURST = 2
+    LOG_RATE_LIMIT_MAX_LEVEL = "WARNING"  # 高于该级别（ERROR/CRITICAL）不限频
 
 # ========================= 输出配置 =========================
 class OutputConfig:
@@ -240,6 +322,7 @@ class OutputConfig:
     IMAGES_DIR = os.path.join(OUTPUT_DIR, "images")
     VIDEOS_DIR = os.path.join(OUTPUT_DIR, "videos")
     MODELS_DIR = os.path.join(OUTPUT_DIR, "models")
+    LOGS_DIR = os.path.join(OUTPUT_DIR, "logs")
     
     # 文件格式
     IMAGE_FORMAT = "jpg"
@@ -257,11 +340,36 @@ class PerformanceConfig:
     
     # 内存管理
     MAX_MEMORY_USAGE = 0.8  # 最大内存使用率
-    GARBAGE_COLLECTION_THRESHOLD = 100  # 垃圾回收阈值
+    GARBAGE_COLLECTION_THRESHOLD = (10000, 20, 20)  # gc.set_threshold 分代阈值，追踪循环开始时应用（Jetson 上取 JetsonConfig.GC_THRESHOLD）
+    
+    # 垃圾回收策略：初始化后冻结长期对象，在帧间空闲时间主动回收，统计每次回收停顿（见 utils/gc_policy.py）
+    GC_POLICY_ENABLED = True
+    GC_FREEZE_AFTER_INIT = True  # 初始化完成后 gc.freeze()，相机/模型等长期对象不再参与扫描
+    GC_SLACK_FRACTION = 0.5  # 某代计数达到其阈值的该比例后，帧间空闲时间足够时主动回收该代
+    
+    # 帧调度：每帧截止时间 = 曝光时刻 + SCHEDULER_DEADLINE_FRAMES 个帧间隔 (1/CameraConfig.FPS)，
+    # 按各阶段预测耗时判断是否会超时，依次跳过可视化、禁止部分视角退回、复用上一帧轴线（见 utils/scheduler.py）
+    FRAME_SCHEDULER_ENABLED = True
+    SCHEDULER_DEADLINE_FRAMES = 2.0
+    SCHEDULER_COST_MARGIN = 1.2  # 预测耗时的安全系数
+    SCHEDULER_MAX_AXIS_REUSE = 2  # 最多连续复用上一帧轴线的帧数，超过后无论多晚都重新追踪
+    
+    # 内存遥测：RSS 与增长告警，可选 tracemalloc 每帧分配量与增长热点（见 utils/memory.py）
+    MEMORY_TELEMETRY_ENABLED = False
+    MEMORY_CHECK_INTERVAL = 60.0  # 周期检查间隔 (秒)
+    MEMORY_WARMUP = 30.0  # 启动后多久确定 RSS 基线 (秒)
+    MEMORY_GROWTH_WARN_MB = 200  # RSS 相对基线每增长该值告警一次 (MB)
+    MEMORY_TRACEMALLOC = False  # 开启 tracemalloc（有额外开销，排查泄漏时使用）
+    MEMORY_TOP_N = 10  # 每次检查报告的增长最多的分配位置数
     
     # 处理优化
     USE_GPU = False  # 是否使用GPU加速
     BATCH_SIZE = 1   # 批处理大小
+    
+    # 现场剖析（--profile N 或 Web 界面触发，结果写入 LogConfig.LOG_DIR）
+    PROFILE_MODE = "sample"  # "sample" 低开销采样；"cprofile" 另叠加 cProfile 精确统计
+    PROFILE_SAMPLE_INTERVAL = 0.005  # 采样间隔 (秒)
+    PROFILE_SIGNAL_FRAMES = 300  # 收到 SIGUSR1（Web 触发）时剖析的帧数
 
 # ========================= 安全配置 =========================
 class SafetyConfig:
@@ -270,7 +378,9 @@ class SafetyConfig:
     MAX_OPERATION_TIME = 3600  # 最大运行时间 (秒)
     
     # 硬件保护
-    MAX_CAMERA_FAILURE_COUNT = 5    # 最大相机失败次数
+    MAX_CAMERA_FAILURE_COUNT = 5    # 连续取帧失败达到该次数即判定相机丢失，停车并后台重连
+    CAMERA_RETRY_BACKOFF = (0.01, 0.5)  # 单帧失败重试等待 (初始, 最大) 秒，逐次翻倍
+    CAMERA_RECONNECT_BACKOFF = (0.5, 10.0)  # 重建相机失败后的重试间隔 (初始, 最大) 秒
     MAX_ROBOT_TIMEOUT_COUNT = 3     # 最大机器人超时次数
     
     # 数据验证
@@ -282,8 +392,9 @@ class SafetyConfig:
 class PlatformConfig:
     # 平台类型检测
     @staticmethod
+    @lru_cache(maxsize=None)
     def detect_platform():
-        """自动检测运行平台"""
+        """自动检测运行平台（结果缓存，进程内只探测一次）"""
         import platform
         import os
         
@@ -356,7 +467,7 @@ class JetsonConfig:
     # 内存优化
     MAX_BUFFER_SIZE = 5  # 减少内存缓冲区
     ENABLE_MEMORY_POOL = True
-    GC_THRESHOLD = 10  # 垃圾回收阈值
+    GC_THRESHOLD = (5000, 20, 20)  # 垃圾回收分代阈值（CPU 较慢，第0代阈值减半使每次回收停顿更短）
     
     # 温度监控
     THERMAL_ZONE_PATHS = [
@@ -365,6 +476,22 @@ class JetsonConfig:
     ]
     MAX_TEMPERATURE_CELSIUS = 85  # 最大工作温度
     TEMPERATURE_CHECK_INTERVAL = 30  # 温度检查间隔(秒)
+    
+    # 质量调节器：温度或帧处理耗时升高时逐级降低处理质量，持续有余量时逐级恢复（见 utils/quality.py）
+    QUALITY_GOVERNOR_ENABLED = True
+    THERMAL_THROTTLE_MARGIN = 10  # 温度达到 MAX_TEMPERATURE_CELSIUS - 该值即降级 (°C)
+    THERMAL_RECOVER_HYSTERESIS = 5  # 温度低于降级温度该值以上才允许恢复 (°C)
+    QUALITY_LATENCY_HEADROOM = 0.6  # 平滑后的帧处理耗时低于帧间隔 (1/CameraConfig.FPS) 的该比例才允许恢复
+    QUALITY_STEP_INTERVAL = 2.0  # 两次调整之间的最短间隔 (秒)
+    QUALITY_RECOVER_HOLD = 10.0  # 持续有余量该时长后才升一级 (秒)
+    # 质量档位（从高到低）：pyramid_level 为四象限检测前的降采样层数，
+    # visualization_scale 为可视化刷新频率倍率（0 表示停止可视化）
+    QUALITY_LEVELS = [
+        {"name": "full", "pyramid_level": 0, "visualization_scale": 1.0},
+        {"name": "reduced_display", "pyramid_level": 0, "visualization_scale": 0.4},
+        {"name": "half_resolution", "pyramid_level": 1, "visualization_scale": 0.4},
+        {"name": "minimal", "pyramid_level": 1, "visualization_scale": 0.0},
+    ]
 
 # ========================= 配置验证函数 =========================
 def validate_config():
@@ -432,6 +559,8 @@ def initialize_platform_config():
         CameraConfig.COLOR_HEIGHT = 720  
         CameraConfig.FPS = 30
         
+        PerformanceConfig.GARBAGE_COLLECTION_THRESHOLD = JetsonConfig.GC_THRESHOLD
+        
     elif platform in ['jetson_nano', 'jetson_tx2']:
         # 其他Jetson平台配置
         RobotConfig.SERIAL_PORT = "/dev/ttyTHS1"
@@ -453,9 +582,18 @@ def initialize_platform_config():
         RobotConfig.BUFFER_SIZE = 1024
         RobotConfig.READ_TIMEOUT = 0.5
 
+@lru_cache(maxsize=None)
+def _probe_opencv_cuda() -> bool:
+    """检查OpenCV CUDA支持（需要导入cv2，按需调用并缓存结果）"""
+    try:
+        import cv2
+        return cv2.cuda.getCudaEnabledDeviceCount() > 0
+    except:
+        return False
+
 def get_platform_info():
     """获取平台信息"""
-    platform = PlatformConfig.CURRENT_PLATFORM
+    platform = CURRENT_PLATFORM
     info = {
         'platform': platform,
         'is_jetson': platform.startswith('jetson'),
@@ -465,11 +603,7 @@ def get_platform_info():
     }
     
     # 检查CUDA支持
-    try:
-        import cv2
-        info['opencv_cuda'] = cv2.cuda.getCudaEnabledDeviceCount() > 0
-    except:
-        pass
+    info['opencv_cuda'] = _probe_opencv_cuda()
     
     # 检查Jetson专用功能
     if info['is_jetson']:
@@ -500,7 +634,7 @@ def print_platform_config():
         print(f"NVPmodel可用: {platform_info.get('nvpmodel_available', False)}")
         print(f"Jetson Clocks可用: {platform_info.get('jetson_clocks_available', False)}")
         
-        if PlatformConfig.CURRENT_PLATFORM == 'jetson_agx_xavier':
+        if CURRENT_PLATFORM == 'jetson_agx_xavier':
             print(f"性能模式: {JetsonConfig.DEFAULT_PERFORMANCE_MODE}")
             print(f"UART设备: {JetsonConfig.UART_DEVICE}")
             print(f"CUDA设备ID: {JetsonConfig.CUDA_DEVICE_ID}")
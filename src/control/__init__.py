@@ -4,6 +4,6 @@
 Control module initialization
 """
 
-from .turn_control import TurnControlManager, TurnDirection, ControlMode
+from .turn_control import TurnControlManager, TurnDirection, ControlMode, TurnStateMachine
 
-__all__ = ['TurnControlManager', 'TurnDirection', 'ControlMode']
+__all__ = ['TurnControlManager', 'TurnDirection', 'ControlMode', 'TurnStateMachine']
@@ -4,12 +4,20 @@
 Turn Control Manager - Handles auto/manual modes and left/right turn control
 """
 
+import json
 import time
 import logging
+import bisect
 import numpy as np
+from collections import deque
 from typing import Dict, Optional, Tuple, Any
 from enum import Enum
 
+try:
+    from utils.results import TurnDecision
+except ImportError:
+    from ..utils.results import TurnDecision
+
 try:
     from config import ControlConfig, PredictionConfig
 except ImportError:
@@ -18,6 +26,12 @@ except ImportError:
         AUTO_MODE = "auto"
         MANUAL_MODE = "manual"
         DEFAULT_MODE = "auto"
+        DIRECTION_SMOOTHING = 3
+        TURN_ENTER_ANGLE = 15.0
+        TURN_EXIT_ANGLE = 8.0
+        TURN_MIN_DWELL_TIME = 0.5
+        TURN_LOST_HOLD_FRAMES = 5
+        DECISION_LOG_SIZE = 1000
         TURN_SPEED = 0.5
         TURN_ANGLE_STEP = 15
         MANUAL_COMMANDS = {
@@ -39,11 +53,174 @@ class ControlMode(Enum):
     AUTO = "auto"
     MANUAL = "manual"
 
+# 手动命令别名 -> 标准手动命令（与 ControlConfig.MANUAL_COMMANDS 的键一致）
+MANUAL_COMMAND_ALIASES = {
+    'forward': 'forward', 'straight': 'forward', 'f': 'forward', 'w': 'forward',
+    'backward': 'backward', 'back': 'backward', 'b': 'backward',
+    'left': 'left', 'turn_left': 'left', 'l': 'left', 'a': 'left',
+    'right': 'right', 'turn_right': 'right', 'r': 'right', 'd': 'right',
+    'stop': 'stop', 'halt': 'stop', 's': 'stop',
+}
+
+class TurnStateMachine:
+    """
+    带迟滞和最小驻留时间的转向状态机
+    
+    输入为管道轴线偏角（度，负值偏左、正值偏右），阈值在初始化时预先
+    划分为角度区间，每帧只需一次二分查找和一次查表即可得到目标状态。
+    每次决策的输入与输出都写入定长决策日志，可通过 replay() 离线复现。
+    """
+    
+    # 角度区间
+    ZONE_LEFT_ENTER = 0    # angle < -enter
+    ZONE_LEFT_HOLD = 1     # -enter <= angle < -exit
+    ZONE_DEADBAND = 2      # -exit <= angle < exit
+    ZONE_RIGHT_HOLD = 3    # exit <= angle < enter
+    ZONE_RIGHT_ENTER = 4   # angle >= enter
+    ZONE_LOST = 5          # 无有效轴线
+    
+    # 决策表: 当前状态 -> 各角度区间对应的目标状态
+    TRANSITIONS = {
+        TurnDirection.STRAIGHT: (TurnDirection.LEFT, TurnDirection.STRAIGHT, TurnDirection.STRAIGHT,
+                                 TurnDirection.STRAIGHT, TurnDirection.RIGHT),
+        TurnDirection.LEFT: (TurnDirection.LEFT, TurnDirection.LEFT, TurnDirection.STRAIGHT,
+                             TurnDirection.STRAIGHT, TurnDirection.RIGHT),
+        TurnDirection.RIGHT: (TurnDirection.LEFT, TurnDirection.STRAIGHT, TurnDirection.STRAIGHT,
+                              TurnDirection.RIGHT, TurnDirection.RIGHT),
+        TurnDirection.UNKNOWN: (TurnDirection.LEFT, TurnDirection.STRAIGHT, TurnDirection.STRAIGHT,
+                                TurnDirection.STRAIGHT, TurnDirection.RIGHT),
+    }
+    
+    def __init__(self, enter_angle: float = 15.0, exit_angle: float = 8.0,
+                 min_dwell_time: float = 0.5, lost_hold_frames: int = 5,
+                 log_size: int = 1000):
+        """
+        Args:
+            enter_angle: 进入转向状态的偏角阈值 (度)
+            exit_angle: 退出转向状态的偏角阈值 (度)，必须不大于 enter_angle
+            min_dwell_time: 状态切换前的最小驻留时间 (秒)
+            lost_hold_frames: 连续丢失多少帧后才进入 UNKNOWN
+            log_size: 决策日志保留条数
+        """
+        if not 0 <= exit_angle <= enter_angle:
+            raise ValueError(f"迟滞阈值无效: exit={exit_angle}, enter={enter_angle}")
+        
+        self.enter_angle = float(enter_angle)
+        self.exit_angle = float(exit_angle)
+        self.min_dwell_time = float(min_dwell_time)
+        self.lost_hold_frames = int(lost_hold_frames)
+        self._zone_bounds = (-self.enter_angle, -self.exit_angle, self.exit_angle, self.enter_angle)
+        
+        # 决策日志: (timestamp, angle, zone, state, changed)
+        self.decision_log = deque(maxlen=log_size)
+        self.reset()
+    
+    def reset(self):
+        """重置状态（不清空决策日志）"""
+        self.state = TurnDirection.STRAIGHT
+        self.state_since = None
+        self.lost_frames = 0
+        self.transition_count = 0
+    
+    def classify(self, angle: Optional[float]) -> int:
+        """将偏角映射到角度区间"""
+        if angle is None:
+            return self.ZONE_LOST
+        return bisect.bisect_right(self._zone_bounds, angle)
+    
+    def update(self, angle: Optional[float], timestamp: Optional[float] = None) -> TurnDirection:
+        """
+        输入一帧的轴线偏角并返回当前状态
+        
+        Args:
+            angle: 轴线偏角 (度)，None 表示本帧没有有效轴线
+            timestamp: 帧时间戳 (秒)，默认取当前时间
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        if self.state_since is None:
+            self.state_since = timestamp
+        
+        zone = self.classify(angle)
+        if zone == self.ZONE_LOST:
+            # 短暂丢失时保持状态，持续丢失则立即进入 UNKNOWN（不受驻留时间限制）
+            self.lost_frames += 1
+            target = TurnDirection.UNKNOWN if self.lost_frames > self.lost_hold_frames else self.state
+            force = True
+        else:
+            self.lost_frames = 0
+            target = self.TRANSITIONS[self.state][zone]
+            force = self.state == TurnDirection.UNKNOWN
+        
+        changed = False
+        if target != self.state and (force or timestamp - self.state_since >= self.min_dwell_time):
+            self.state = target
+            self.state_since = timestamp
+            self.transition_count += 1
+            changed = True
+        
+        self.decision_log.append((timestamp, angle, zone, self.state.value, changed))
+        return self.state
+    
+    def get_decision_log(self) -> list:
+        """获取决策日志（字典列表）"""
+        return [
+            {'timestamp': t, 'angle': a, 'zone': z, 'state': st, 'changed': c}
+            for t, a, z, st, c in self.decision_log
+        ]
+    
+    def save_decision_log(self, path: str):
+        """以JSON Lines格式保存决策日志，首行为状态机参数"""
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'params': self.get_params()}) + "\n")
+            for record in self.get_decision_log():
+                f.write(json.dumps(record) + "\n")
+    
+    def get_params(self) -> Dict[str, Any]:
+        """获取状态机参数"""
+        return {
+            'enter_angle': self.enter_angle,
+            'exit_angle': self.exit_angle,
+            'min_dwell_time': self.min_dwell_time,
+            'lost_hold_frames': self.lost_hold_frames,
+        }
+    
+    @classmethod
+    def replay(cls, records: list, **params) -> list:
+        """
+        用记录的输入重放决策，返回每帧的状态值列表
+        
+        Args:
+            records: get_decision_log() 或 load_decision_log() 的结果
+            **params: 状态机参数，可用于离线调参
+        """
+        machine = cls(**params)
+        return [machine.update(r['angle'], r['timestamp']).value for r in records]
+    
+    @staticmethod
+    def load_decision_log(path: str) -> Tuple[Dict[str, Any], list]:
+        """读取 save_decision_log() 保存的日志，返回 (params, records)"""
+        params, records = {}, []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                item = json.loads(line)
+                if 'params' in item:
+                    params = item['params']
+                else:
+                    records.append(item)
+        return params, records
+
 class TurnControlManager:
     """转向控制管理器"""
     
-    def __init__(self):
-        """初始化控制管理器"""
+    def __init__(self, history_size: int = 20, smoothing_window: Optional[int] = None):
+        """
+        初始化控制管理器
+        
+        Args:
+            history_size: 转向历史长度
+            smoothing_window: 方向平滑窗口，默认取 ControlConfig.DIRECTION_SMOOTHING
+        """
         self.logger = logging.getLogger(__name__)
         
         # 控制状态
@@ -51,11 +228,31 @@ class TurnControlManager:
         self.current_direction = TurnDirection.STRAIGHT
         self.manual_command = None
         
-        # 转向检测历史
-        self.turn_history = []
-        self.confidence_history = []
+        # 转向检测历史（定长队列，自动淘汰最旧记录）
+        self.history_size = history_size
+        if smoothing_window is None:
+            smoothing_window = getattr(ControlConfig, 'DIRECTION_SMOOTHING', 3)
+        self.smoothing_window = max(1, min(int(smoothing_window), history_size))
+        self.turn_history = deque(maxlen=history_size)
+        self.confidence_history = deque(maxlen=history_size)
         self.last_turn_time = 0
         
+        # 滚动统计：历史置信度累加和 + 平滑窗口内各方向的计数与置信度和
+        self._confidence_sum = 0.0
+        self._window = deque(maxlen=self.smoothing_window)
+        self._window_counts = {direction: 0 for direction in TurnDirection}
+        self._window_confidence = {direction: 0.0 for direction in TurnDirection}
+        
+        # 迟滞状态机
+        self.state_machine = TurnStateMachine(
+            enter_angle=getattr(ControlConfig, 'TURN_ENTER_ANGLE', 15.0),
+            exit_angle=getattr(ControlConfig, 'TURN_EXIT_ANGLE', 8.0),
+            min_dwell_time=getattr(ControlConfig, 'TURN_MIN_DWELL_TIME', 0.5),
+            lost_hold_frames=getattr(ControlConfig, 'TURN_LOST_HOLD_FRAMES', 5),
+            log_size=getattr(ControlConfig, 'DECISION_LOG_SIZE', 1000)
+        )
+        self.last_axis_angle = None
+        
         # 统计信息
         self.stats = {
             'total_detections': 0,
@@ -96,52 +293,84 @@ class TurnControlManager:
         """获取当前控制模式"""
         return self.current_mode.value
     
+    @property
+    def control_mode(self) -> str:
+        """当前控制模式字符串（供主程序和Web界面使用）"""
+        return self.current_mode.value
+    
+    def set_manual_command(self, command: str) -> bool:
+        """设置手动命令（forward/backward/left/right/stop 及其别名）"""
+        manual_cmd = MANUAL_COMMAND_ALIASES.get(command.lower().strip())
+        if manual_cmd is None:
+            self.logger.warning(f"未知的手动命令: {command}")
+            return False
+        self.manual_command = manual_cmd
+        return True
+    
+    def get_manual_command(self) -> Optional[str]:
+        """获取当前手动命令"""
+        return self.manual_command
+    
+    def process_frame(self, vis_image: Optional[np.ndarray], line_params: Optional[list],
+                      global_axis: Optional[np.ndarray], prediction_info: Optional[Dict] = None,
+                      timestamp: Optional[float] = None) -> TurnDecision:
+        """
+        处理一帧追踪结果并给出转向决策
+        
+        Args:
+            vis_image: 可视化图像（未使用，保留以兼容调用方）
+            line_params: 四象限直线 [[x1,y1,x2,y2] 或 None, ...]
+            global_axis: 追踪器拟合的管道轴线点
+            prediction_info: 方向预测信息
+            timestamp: 帧时间戳 (秒)
+            
+        Returns:
+            TurnDecision: direction / confidence / mode / axis_angle / timestamp
+        """
+        if self.current_mode == ControlMode.MANUAL:
+            return TurnDecision(self.current_direction.value, 1.0, 'manual', self.last_axis_angle, timestamp)
+        
+        direction, confidence = self.detect_turn_direction(
+            line_params, prediction_info, global_axis=global_axis, timestamp=timestamp)
+        self.current_direction = direction
+        return TurnDecision(direction.value, confidence, 'auto', self.last_axis_angle, timestamp)
+    
     def detect_turn_direction(self, line_params: Optional[list], 
-                            prediction_info: Optional[Dict]) -> Tuple[TurnDirection, float]:
+                            prediction_info: Optional[Dict],
+                            global_axis: Optional[np.ndarray] = None,
+                            timestamp: Optional[float] = None) -> Tuple[TurnDirection, float]:
         """
         检测转向方向 - 专注于左右转向
         
+        优先使用追踪器输出的轴线偏角，其次使用各象限直线的平均偏角（同为管道相对
+        前进方向的偏角，可共用一组迟滞阈值），结果经过迟滞状态机后再输出，避免在阈值附近来回抖动。
+        
         Args:
-            line_params: 管道线参数
-            prediction_info: 预测信息
+            line_params: 管道线参数 [[x1,y1,x2,y2] 或 None, ...]
+            prediction_info: 预测信息（保留以兼容旧接口，决策只依赖数值角度）
+            global_axis: 追踪器拟合的管道轴线点
+            timestamp: 帧时间戳 (秒)
             
         Returns:
             (direction, confidence): 转向方向和置信度
         """
-        if not line_params or not any(p is not None for p in line_params):
-            return TurnDirection.UNKNOWN, 0.0
-        
         try:
-            direction = TurnDirection.STRAIGHT
-            confidence = 0.0
+            angle = self._axis_heading(global_axis)
+            if angle is None:
+                angle = self._line_heading(line_params)
+            self.last_axis_angle = angle
             
-            # 方法1: 使用预测信息
-            if prediction_info and prediction_info.get('direction'):
-                pred_direction = prediction_info['direction']
-                pred_confidence = prediction_info.get('confidence', 0.0)
-                
-                if pred_direction == 'left':
-                    direction = TurnDirection.LEFT
-                    confidence = pred_confidence
-                elif pred_direction == 'right':
-                    direction = TurnDirection.RIGHT
-                    confidence = pred_confidence
-                else:
-                    direction = TurnDirection.STRAIGHT
-                    confidence = pred_confidence * 0.8  # 直行置信度稍低
+            direction = self.state_machine.update(angle, timestamp)
             
-            # 方法2: 基于线参数分析转向
+            if direction == TurnDirection.UNKNOWN:
+                return direction, 0.0
+            if angle is None:
+                # 短暂丢失期间保持状态，置信度不足以驱动新的运动命令
+                confidence = 0.0
+            elif direction == TurnDirection.STRAIGHT:
+                confidence = 0.7
             else:
-                turn_angle = self._analyze_line_curvature(line_params)
-                if abs(turn_angle) > PredictionConfig.TURN_SENSITIVITY:
-                    if turn_angle > 0:
-                        direction = TurnDirection.RIGHT
-                    else:
-                        direction = TurnDirection.LEFT
-                    confidence = min(abs(turn_angle) / 45.0, 1.0)  # 归一化到0-1
-                else:
-                    direction = TurnDirection.STRAIGHT
-                    confidence = 0.7
+                confidence = min(abs(angle) / 45.0, 1.0)  # 归一化到0-1
             
             # 更新历史记录
             self._update_turn_history(direction, confidence)
@@ -155,53 +384,74 @@ class TurnControlManager:
             self.logger.error(f"转向检测失败: {e}")
             return TurnDirection.UNKNOWN, 0.0
     
-    def _analyze_line_curvature(self, line_params: list) -> float:
-        """分析线条曲率以确定转向角度"""
+    @staticmethod
+    def _segment_heading(dx: float, dy: float) -> Optional[float]:
+        """
+        计算线段相对图像竖直方向（前进方向）的偏角
+        
+        统一取指向图像上方的方向，负值偏左，正值偏右，范围 [-90, 90]。
+        """
+        if dx == 0 and dy == 0:
+            return None
+        if dy > 0 or (dy == 0 and dx < 0):
+            dx, dy = -dx, -dy
+        return float(np.degrees(np.arctan2(dx, -dy)))
+    
+    def _axis_heading(self, global_axis: Optional[np.ndarray]) -> Optional[float]:
+        """从追踪器的轴线点计算轴线偏角"""
+        if global_axis is None or len(global_axis) < 2:
+            return None
+        dx = float(global_axis[-1][0] - global_axis[0][0])
+        dy = float(global_axis[-1][1] - global_axis[0][1])
+        return self._segment_heading(dx, dy)
+    
+    def _line_heading(self, line_params: Optional[list]) -> Optional[float]:
+        """
+        无轴线时从四象限直线估计管道偏角
+        
+        line_params 为四象限直线 [Q1右上, Q2左上, Q3左下, Q4右下]，每项为
+        [x1,y1,x2,y2] 或 None。管壁直线与管道轴线平行，各直线偏角的平均值与
+        _axis_heading 是同一物理量，可直接套用同一组转向阈值；不是4个值的条目跳过。
+        """
+        if not line_params:
+            return None
         try:
-            if len(line_params) < 4 or not all(p is not None for p in line_params[:4]):
-                return 0.0
-            
-            # 假设line_params包含两条线的参数 [rho1, theta1, rho2, theta2]
-            theta1, theta2 = line_params[1], line_params[3]
-            
-            if theta1 is None or theta2 is None:
-                return 0.0
-            
-            # 计算两条线之间的角度差
-            angle_diff = np.degrees(theta2 - theta1)
-            
-            # 归一化角度到 [-180, 180]
-            while angle_diff > 180:
-                angle_diff -= 360
-            while angle_diff < -180:
-                angle_diff += 360
-            
-            return angle_diff
+            headings = []
+            for line in line_params[:4]:
+                if line is None:
+                    continue
+                coords = np.asarray(line, dtype=float).ravel()
+                if coords.size != 4:
+                    continue
+                heading = self._segment_heading(coords[2] - coords[0], coords[3] - coords[1])
+                if heading is not None:
+                    headings.append(heading)
+            return sum(headings) / len(headings) if headings else None
             
         except Exception as e:
-            self.logger.error(f"曲率分析失败: {e}")
-            return 0.0
+            self.logger.error(f"直线偏角分析失败: {e}")
+            return None
     
     def _update_turn_history(self, direction: TurnDirection, confidence: float):
-        """更新转向历史"""
-        current_time = time.time()
-        
-        # 添加到历史记录
-        self.turn_history.append({
-            'direction': direction,
-            'confidence': confidence,
-            'timestamp': current_time
-        })
-        
-        # 保持历史记录长度
-        max_history = 20
-        if len(self.turn_history) > max_history:
-            self.turn_history = self.turn_history[-max_history:]
+        """更新转向历史（O(1)：定长队列 + 累加和增量更新）"""
+        confidence = float(confidence)
+        self.last_turn_time = time.time()
         
-        # 更新置信度历史
+        # 历史已满时先扣除即将被淘汰的置信度
+        if len(self.confidence_history) == self.history_size:
+            self._confidence_sum -= self.confidence_history[0]
+        self.turn_history.append(direction)
         self.confidence_history.append(confidence)
-        if len(self.confidence_history) > max_history:
-            self.confidence_history = self.confidence_history[-max_history:]
+        self._confidence_sum += confidence
+        
+        # 平滑窗口：扣除被淘汰的记录，再计入新记录
+        if len(self._window) == self.smoothing_window:
+            old_direction, old_confidence = self._window[0]
+            self._window_counts[old_direction] -= 1
+            self._window_confidence[old_direction] -= old_confidence
+        self._window.append((direction, confidence))
+        self._window_counts[direction] += 1
+        self._window_confidence[direction] += confidence
     
     def _update_statistics(self, direction: TurnDirection, confidence: float):
         """更新统计信息"""
@@ -216,43 +466,50 @@ class TurnControlManager:
         
         # 更新平均置信度
         if self.confidence_history:
-            self.stats['average_confidence'] = np.mean(self.confidence_history)
+            self.stats['average_confidence'] = self._confidence_sum / len(self.confidence_history)
     
-    def get_smoothed_direction(self, window_size: int = 5) -> Tuple[TurnDirection, float]:
-        """获取平滑后的转向方向"""
+    def get_smoothed_direction(self, window_size: Optional[int] = None) -> Tuple[TurnDirection, float]:
+        """
+        获取平滑后的转向方向
+        
+        Args:
+            window_size: 平滑窗口，默认使用 ControlConfig.DIRECTION_SMOOTHING；
+                         与配置窗口一致时直接读取滚动计数，否则回退为逐项统计
+        """
+        if window_size is None:
+            window_size = self.smoothing_window
+        
         if len(self.turn_history) < window_size:
             if self.turn_history:
-                return self.turn_history[-1]['direction'], self.turn_history[-1]['confidence']
+                return self.turn_history[-1], self.confidence_history[-1]
             return TurnDirection.UNKNOWN, 0.0
         
         try:
-            # 取最近的几个检测结果
-            recent_turns = self.turn_history[-window_size:]
-            
-            # 统计各个方向的出现次数和置信度
-            direction_votes = {}
-            for turn in recent_turns:
-                direction = turn['direction']
-                confidence = turn['confidence']
-                
-                if direction not in direction_votes:
-                    direction_votes[direction] = {'count': 0, 'total_confidence': 0.0}
-                
-                direction_votes[direction]['count'] += 1
-                direction_votes[direction]['total_confidence'] += confidence
+            if window_size == self.smoothing_window:
+                counts = self._window_counts
+                confidence_sums = self._window_confidence
+            else:
+                counts = {direction: 0 for direction in TurnDirection}
+                confidence_sums = {direction: 0.0 for direction in TurnDirection}
+                start = len(self.turn_history) - window_size
+                for i in range(start, len(self.turn_history)):
+                    counts[self.turn_history[i]] += 1
+                    confidence_sums[self.turn_history[i]] += self.confidence_history[i]
             
-            # 找到最多票数的方向
+            # 票数与置信度综合评分：得分即该方向在窗口内的置信度总和
             best_direction = TurnDirection.UNKNOWN
             best_score = 0
             best_confidence = 0.0
             
-            for direction, votes in direction_votes.items():
-                # 综合考虑票数和置信度
-                score = votes['count'] * votes['total_confidence'] / votes['count']
+            for direction in TurnDirection:
+                count = counts[direction]
+                if count == 0:
+                    continue
+                score = confidence_sums[direction]
                 if score > best_score:
                     best_score = score
                     best_direction = direction
-                    best_confidence = votes['total_confidence'] / votes['count']
+                    best_confidence = score / count
             
             return best_direction, best_confidence
             
@@ -336,6 +593,8 @@ class TurnControlManager:
         stats['current_mode'] = self.current_mode.value
         stats['current_direction'] = self.current_direction.value
         stats['history_length'] = len(self.turn_history)
+        stats['state_transitions'] = self.state_machine.transition_count
+        stats['axis_angle'] = self.last_axis_angle
         
         # 计算转向比例
         total_turns = stats['left_turns'] + stats['right_turns'] + stats['straight_segments']
@@ -362,4 +621,11 @@ class TurnControlManager:
         }
         self.turn_history.clear()
         self.confidence_history.clear()
+        self._confidence_sum = 0.0
+        self._window.clear()
+        for direction in TurnDirection:
+            self._window_counts[direction] = 0
+            self._window_confidence[direction] = 0.0
+        self.state_machine.reset()
+        self.state_machine.decision_log.clear()
         self.logger.info("统计信息已重置")
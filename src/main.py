@@ -22,6 +22,8 @@ import signal
 import traceback
 from typing import Optional, Dict, Any
 
+_STARTUP_TIME = time.perf_counter()
+
 # 添加src目录到Python路径
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
@@ -29,20 +31,14 @@ sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 from config import (
     CameraConfig, RobotConfig, PerceptionConfig, 
     RunModeConfig, LogConfig, SafetyConfig, OutputConfig,
-    ControlConfig, PredictionConfig,
+    ControlConfig, PredictionConfig, PerformanceConfig, JetsonConfig,
     validate_config, print_config_summary
 )
+from utils.logger import setup_logger, set_log_level, get_log_stats
 
-# 导入各个模块
-from camera.capture import RealSenseCapture, USBCapture, PointCloudGenerator, check_realsense_connection
-from camera.calibration import calibrate_camera
-from robot.communication import RoboMasterCSerial
-from perception.obstacle_detection import ObstacleDetector
-from perception.pipe_tracking import PipeTracker
-from control.turn_control import TurnControlManager
-from utils.logger import setup_logger
-from utils.display import DisplayManager
-from utils.keyboard_control import KeyboardController
+# 相机(pyrealsense2/open3d)、OpenCV、串口和感知模块较重，
+# 在所选模式真正需要时才在对应方法内导入，保证 calib / config-check 快速启动。
+# 可用 `python -X importtime -m src.main --config-check` 查看导入耗时。
 
 class Tiaozhanbei2System:
     """挑战杯2.0 系统主类"""
@@ -53,17 +49,48 @@ class Tiaozhanbei2System:
         self.running = False
         self.emergency_stop = False
         
-        # 显示管理器
-        self.display = DisplayManager()
+        # 显示管理器（首次使用时创建，避免无显示模式导入OpenCV）
+        self._display = None
+        self.last_visualization_time = 0.0
         
         # 硬件组件
         self.camera = None
         self.robot = None
         self.depth_estimator = None
         self.point_cloud_generator = None
+        self.camera_model = None  # 标定相机模型（含去畸变映射表），只加载一次
+        self.multi_camera = None  # 多相机模式：每台相机一个工作进程
+        self.camera_watchdog = None  # 单相机取帧失败退避与后台重连
         
         # 算法组件
         self.obstacle_detector = None
+        self.obstacle_monitor = None  # 高频纯深度避障回路（与追踪解耦）
+        self.perception_worker = None  # 独立感知进程（首帧确定帧尺寸后启动）
+        
+        # 延迟统计：传感器曝光 -> 串口写出
+        from utils.latency import LatencyTracker
+        self.latency_tracker = LatencyTracker()
+        self.current_frame_info = None
+        
+        # 帧窗口剖析：命令行 --profile N 或 SIGUSR1（Web 触发）请求，在追踪循环中启动
+        self.profiler = None
+        self._profile_request = None  # (帧数, 模式, 完成后是否退出)
+        self._profile_exit_after = False
+        
+        # 内存遥测：RSS 增长告警与分配热点（PerformanceConfig.MEMORY_TELEMETRY_ENABLED）
+        self.memory_telemetry = None
+        
+        # 质量调节器：按温度与帧处理耗时调整检测分辨率与可视化频率（JetsonConfig.QUALITY_GOVERNOR_ENABLED）
+        self.quality_governor = None
+        self.visualization_scale = 1.0
+        
+        # 垃圾回收策略：冻结长期对象、调整分代阈值，在帧间空闲时间主动回收（PerformanceConfig.GC_POLICY_ENABLED）
+        self.gc_policy = None
+        
+        # 帧调度：按曝光时刻推出的截止时间降级处理（PerformanceConfig.FRAME_SCHEDULER_ENABLED）
+        self.frame_scheduler = None
+        self.frame_plan = None
+        self._last_tracking = None  # 上一帧成功追踪的 (直线参数, 轴线)，预计超时时复用
         self.pipe_tracker = None
         self.turn_controller = None
         
@@ -88,6 +115,16 @@ class Tiaozhanbei2System:
         # 注册信号处理器
         signal.signal(signal.SIGINT, self._signal_handler)
         signal.signal(signal.SIGTERM, self._signal_handler)
+        if hasattr(signal, "SIGUSR1"):
+            signal.signal(signal.SIGUSR1, self._profile_signal_handler)
+        
+    @property
+    def display(self):
+        """显示管理器"""
+        if self._display is None:
+            from utils.display import DisplayManager
+            self._display = DisplayManager()
+        return self._display
         
     def _signal_handler(self, signum, frame):
         """信号处理器 - 优雅退出"""
@@ -95,34 +132,150 @@ class Tiaozhanbei2System:
         self.emergency_stop = True
         self.running = False
         
+    def _profile_signal_handler(self, signum, frame):
+        """SIGUSR1：对运行中的追踪循环剖析 PROFILE_SIGNAL_FRAMES 帧"""
+        self.request_profile(PerformanceConfig.PROFILE_SIGNAL_FRAMES)
+        
+    def request_profile(self, frames: int, mode: Optional[str] = None, exit_after: bool = False):
+        """
+        请求剖析接下来的 frames 帧（在追踪循环的下一帧开始）
+        
+        Args:
+            frames: 剖析帧数
+            mode: "sample" / "cprofile"，None 使用 PerformanceConfig.PROFILE_MODE
+            exit_after: 剖析完成后是否结束追踪（命令行 --profile）
+        """
+        if self.profiler is None:
+            self._profile_request = (frames, mode or PerformanceConfig.PROFILE_MODE, exit_after)
+        
+    def _profile_step(self):
+        """每帧处理完成后调用：推进进行中的剖析，或启动待处理的剖析请求"""
+        if self.profiler is not None:
+            if self.profiler.frame_done():
+                files = self.profiler.output_files
+                self.logger.info(f"剖析完成 ({self.profiler.frames_done}帧): {', '.join(files.values())}")
+                self.profiler = None
+                if self._profile_exit_after:
+                    self.running = False
+            return
+        if self._profile_request is None:
+            return
+        frames, mode, self._profile_exit_after = self._profile_request
+        self._profile_request = None
+        from utils.profiler import FrameProfiler
+        self.profiler = FrameProfiler(frames, LogConfig.LOG_DIR, mode=mode,
+                                      interval=PerformanceConfig.PROFILE_SAMPLE_INTERVAL)
+        self.profiler.start()
+        self.logger.info(f"开始剖析 {frames} 帧 ({mode})")
+        
+    def _start_memory_telemetry(self):
+        """按配置启动内存遥测（追踪循环开始前调用）"""
+        if not PerformanceConfig.MEMORY_TELEMETRY_ENABLED or self.memory_telemetry is not None:
+            return
+        from utils.memory import MemoryTelemetry
+        self.memory_telemetry = MemoryTelemetry(
+            interval=PerformanceConfig.MEMORY_CHECK_INTERVAL,
+            warmup=PerformanceConfig.MEMORY_WARMUP,
+            growth_warn_mb=PerformanceConfig.MEMORY_GROWTH_WARN_MB,
+            trace=PerformanceConfig.MEMORY_TRACEMALLOC,
+            top_n=PerformanceConfig.MEMORY_TOP_N
+        )
+        self.memory_telemetry.start()
+        
+    def _start_quality_governor(self):
+        """按配置启动质量调节器（单相机追踪循环开始前调用）"""
+        if not JetsonConfig.QUALITY_GOVERNOR_ENABLED or self.quality_governor is not None:
+            return
+        from utils.quality import QualityGovernor
+        self.quality_governor = QualityGovernor(on_change=self._apply_quality)
+        self._apply_quality(self.quality_governor.settings)
+        
+    def _apply_quality(self, settings: dict):
+        """应用质量档位：四象限检测金字塔层数与可视化刷新频率倍率"""
+        if self.pipe_tracker is not None:
+            self.pipe_tracker.pyramid_level = settings['pyramid_level']
+        self.visualization_scale = settings['visualization_scale']
+        
+    def _start_gc_policy(self):
+        """初始化全部完成、进入追踪循环前应用垃圾回收策略"""
+        if not PerformanceConfig.GC_POLICY_ENABLED or self.gc_policy is not None:
+            return
+        from utils.gc_policy import GCPolicy
+        self.gc_policy = GCPolicy()
+        self.gc_policy.apply()
+        
+    def _start_frame_scheduler(self):
+        """按配置启动帧调度器（单相机追踪循环开始前调用）"""
+        if not PerformanceConfig.FRAME_SCHEDULER_ENABLED or self.frame_scheduler is not None:
+            return
+        from utils.scheduler import FrameScheduler
+        self.frame_scheduler = FrameScheduler()
+        
+    def _track_scheduled(self, color_frame, depth_frame):
+        """
+        按本帧调度计划追踪：预计超时时复用上一帧轴线或禁止部分视角退回
+        
+        Returns:
+            line_params, global_axis, prediction_info
+        """
+        plan = self.frame_plan
+        if plan is not None and not plan.track:
+            line_params, global_axis = self._last_tracking
+            return line_params, global_axis, None
+        
+        track_start = time.perf_counter()
+        line_params, global_axis, _, prediction_info = self.pipe_tracker.track(
+            color_frame, depth_frame, visualize=False,
+            allow_partial=plan is None or plan.partial_fallback)
+        if self.frame_scheduler is not None:
+            tracker = self.pipe_tracker
+            stage = "track_fallback" if tracker.last_partial_attempted else "track"
+            self.frame_scheduler.record(stage, time.perf_counter() - track_start)
+            if tracker.last_partial_skipped:
+                self.frame_scheduler.degraded("skip_partial")
+        self._last_tracking = (line_params, global_axis) if global_axis is not None else None
+        return line_params, global_axis, prediction_info
+        
     def initialize_hardware(self) -> bool:
         """初始化硬件组件"""
         self.logger.info("初始化硬件组件...")
+        from camera.capture import PointCloudGenerator
         
         # 1. 检查相机连接
         try:
-            if CameraConfig.CAMERA_TYPE == "usb":
-                # 使用USB摄像头
-                import cv2
-                test_cap = cv2.VideoCapture(CameraConfig.USB_CAMERA_INDEX)
-                if test_cap.isOpened():
-                    test_cap.release()
-                    # 这里需要创建USB摄像头类，暂时使用RealSense类作为占位符
-                    self.camera = RealSenseCapture()  # TODO: 替换为USB摄像头类
-                    self.system_status["camera_connected"] = True
-                    self.logger.info("USB摄像头连接成功")
-                else:
-                    self.logger.error("USB摄像头连接失败")
+            if CameraConfig.MULTI_CAMERA_ENABLED:
+                # 多相机：相机由各自的工作进程打开，主进程只做融合与控制
+                from perception.worker import MultiCameraManager
+                camera_specs = self._build_multi_camera_specs()
+                if not camera_specs:
+                    self.logger.error("未找到可用的RealSense相机")
                     return False
+                self.multi_camera = MultiCameraManager(
+                    camera_specs,
+                    primary=CameraConfig.PRIMARY_CAMERA,
+                    detector_kwargs=self._obstacle_detector_kwargs(),
+                    tracker_kwargs={
+                        "depth_threshold": PerceptionConfig.PIPE_DEPTH_THRESHOLD,
+                        "camera_intrinsics": self._load_camera_intrinsics(),
+                    }
+                )
+                self.system_status["camera_connected"] = True
+                self.logger.info(f"多相机模式: {', '.join(spec['name'] for spec in camera_specs)}")
             else:
-                # 使用RealSense摄像头
-                if check_realsense_connection():
-                    self.camera = RealSenseCapture()
-                    self.system_status["camera_connected"] = True
-                    self.logger.info("RealSense相机连接成功")
-                else:
-                    self.logger.error("RealSense相机连接失败")
+                try:
+                    self.camera = self._open_camera()
+                except RuntimeError as e:
+                    self.logger.error(f"相机连接失败: {e}")
                     return False
+                self.system_status["camera_connected"] = True
+                
+                # 相机看门狗：连续取帧失败时停车，后台重建相机后继续追踪
+                from camera.watchdog import CameraWatchdog
+                self.camera_watchdog = CameraWatchdog(
+                    self.camera, self._open_camera,
+                    on_lost=self._on_camera_lost,
+                    on_restored=self._on_camera_restored
+                )
         except Exception as e:
             self.logger.error(f"相机初始化失败: {e}")
             return False
@@ -130,6 +283,7 @@ class Tiaozhanbei2System:
         # 2. 初始化机器人通信（如果启用）
         if RobotConfig.ROBOT_ENABLED:
             try:
+                from robot.communication import RoboMasterCSerial
                 self.robot = RoboMasterCSerial(
                     port=RobotConfig.SERIAL_PORT,
                     baudrate=RobotConfig.BAUD_RATE,
@@ -146,7 +300,7 @@ class Tiaozhanbei2System:
             
         # 3. 初始化点云生成器
         try:
-            self.point_cloud_generator = PointCloudGenerator()
+            self.point_cloud_generator = PointCloudGenerator(camera_model=self._load_camera_model())
             self.logger.info("点云生成器初始化成功")
         except Exception as e:
             self.logger.warning(f"点云生成器初始化失败: {e}")
@@ -159,18 +313,31 @@ class Tiaozhanbei2System:
         self.logger.info("初始化算法组件...")
         
         try:
+            from perception.pipe_tracking import PipeTracker
+            from control.turn_control import TurnControlManager
+            from utils.keyboard_control import KeyboardController
+            
             # 障碍物检测器
-            self.obstacle_detector = ObstacleDetector(
-                depth_threshold=PerceptionConfig.OBSTACLE_DEPTH_THRESHOLD * 1000,  # 转换为mm
-                center_region_width=PerceptionConfig.OBSTACLE_CENTER_REGION_WIDTH,
-                critical_distance=PerceptionConfig.OBSTACLE_CRITICAL_DISTANCE * 1000,  # 转换为mm
-                warning_distance=PerceptionConfig.OBSTACLE_WARNING_DISTANCE * 1000  # 转换为mm
-            )
+            self.obstacle_detector = self._create_obstacle_detector()
+            
+            # 高频避障回路：相机后台线程按深度帧率推送深度，独立检测器避免与主循环共享状态
+            if PerceptionConfig.OBSTACLE_FAST_LOOP_ENABLED and hasattr(self.camera, 'add_depth_listener'):
+                from perception.obstacle_monitor import ObstacleMonitor
+                self.obstacle_monitor = ObstacleMonitor(
+                    self._create_obstacle_detector(),
+                    on_threat=self._on_obstacle_threat
+                )
+                self.camera.add_depth_listener(self.obstacle_monitor.submit)
             
             # 管道追踪器
             self.pipe_tracker = PipeTracker(
                 depth_threshold=PerceptionConfig.PIPE_DEPTH_THRESHOLD,
-                camera_intrinsics=self._load_camera_intrinsics()
+                camera_intrinsics=self._load_camera_intrinsics(),
+                visualize=False,  # 可视化由 _publish_visualization 按需降频生成
+                camera_model=self._load_camera_model() if self._undistort_enabled() else None,
+                depth_sampler=getattr(self.camera, 'sample_depth', None),  # 只查询轴线点深度
+                depth_scale=getattr(self.camera, 'depth_scale', 0.001),  # 深度门限按相机深度单位换算
+                depth_aligned=getattr(self.camera, 'align_depth', False)  # 深度门限只用于对齐深度
             )
             
             # 转向控制管理器
@@ -192,33 +359,195 @@ class Tiaozhanbei2System:
             self.logger.error(f"算法组件初始化失败: {e}")
             return False
             
+    def _open_camera(self):
+        """按配置打开单台相机（初始化与看门狗重连共用），失败时抛出 RuntimeError"""
+        from camera.capture import RealSenseCapture, USBCapture, discover_realsense_devices
+        
+        if CameraConfig.CAMERA_TYPE == "usb":
+            # 使用USB摄像头（仅彩色，追踪走RGB路径，无深度避障）
+            camera = USBCapture(
+                camera_index=CameraConfig.USB_CAMERA_INDEX,
+                width=CameraConfig.COLOR_WIDTH,
+                height=CameraConfig.COLOR_HEIGHT,
+                fps=CameraConfig.FPS,
+                fourcc=CameraConfig.USB_FOURCC,
+                threaded=CameraConfig.USB_THREADED_GRAB
+            )
+            self.logger.info("USB摄像头连接成功")
+            return camera
+        
+        # 使用RealSense摄像头
+        # 一次枚举设备及其支持的配置，相机据此直接选出可用配置启动
+        devices = discover_realsense_devices()
+        if not devices:
+            raise RuntimeError("未检测到RealSense相机")
+        depth_filters = CameraConfig.DEPTH_FILTERS if CameraConfig.DEPTH_FILTERS_ENABLED else None
+        depth_fps = CameraConfig.DEPTH_FPS if PerceptionConfig.OBSTACLE_FAST_LOOP_ENABLED else None
+        camera = RealSenseCapture(align_depth=CameraConfig.ALIGN_DEPTH_TO_COLOR,
+                                  depth_filters=depth_filters,
+                                  depth_fps=depth_fps,
+                                  stream=CameraConfig.REALSENSE_STREAM,
+                                  ir_emitter=CameraConfig.IR_EMITTER_ENABLED,
+                                  device=devices[0],
+                                  profile_cache=CameraConfig.STREAM_PROFILE_CACHE_PATH)
+        self.logger.info("RealSense相机连接成功")
+        return camera
+        
+    def _send_stop(self, reason: str):
+        """感知输入不可信时立即停车"""
+        self.logger.warning(f"停车: {reason}")
+        if self.robot and self.system_status["robot_connected"]:
+            try:
+                self.robot.send(RobotConfig.COMMANDS["STOP"])
+            except Exception as e:
+                self.logger.error(f"发送停车命令失败: {e}")
+                
+    def _on_camera_lost(self):
+        """相机判定丢失：立即停车，等待看门狗重连"""
+        self.system_status["camera_connected"] = False
+        self._send_stop("相机丢失")
+        
+    def _on_camera_restored(self, camera):
+        """看门狗重建相机后，把依赖旧相机的组件切换到新相机"""
+        self.camera = camera
+        self.system_status["camera_connected"] = True
+        if self.pipe_tracker is not None:
+            self.pipe_tracker.depth_sampler = getattr(camera, 'sample_depth', None)
+            self.pipe_tracker.depth_aligned = getattr(camera, 'align_depth', False)
+        if self.obstacle_monitor is not None:
+            camera.add_depth_listener(self.obstacle_monitor.submit)
+            camera.start_grabber()
+        if self.perception_worker is not None:
+            # 感知进程持有旧相机的深度查询函数，下一帧按新相机重新启动
+            self.perception_worker.stop()
+            self.perception_worker = None
+        
+    def _wait_for_reconnect(self) -> bool:
+        """
+        相机重建期间旧相机正在后台停止，不能再取帧：阻塞等待重连
+
+        Returns:
+            本轮是否在等待重连（调用方应跳过取帧）
+        """
+        if self.camera_watchdog is None or not self.camera_watchdog.is_reconnecting():
+            return False
+        self.camera_watchdog.wait_for_camera(timeout=0.5)
+        return True
+        
+    def _handle_camera_failure(self):
+        """取帧失败：未判定丢失时退避等待，已丢失时阻塞等待后台重连（不空转）"""
+        watchdog = self.camera_watchdog
+        if watchdog is None:
+            time.sleep(SafetyConfig.CAMERA_RETRY_BACKOFF[0])
+            return
+        if watchdog.is_reconnecting():
+            watchdog.wait_for_camera(timeout=0.5)
+            return
+        delay = watchdog.frame_failed()
+        if watchdog.consecutive_failures == 1:
+            self.logger.warning("获取图像帧失败")
+        if delay > 0:
+            time.sleep(delay)
+        
+    def _build_multi_camera_specs(self) -> list:
+        """按配置生成各相机的进程描述；未指定序列号的相机按序列号顺序分配已连接设备"""
+        from camera.capture import discover_realsense_devices
+        connected = {device["serial"]: device for device in discover_realsense_devices()}
+        assigned = {cam["serial"] for cam in CameraConfig.MULTI_CAMERAS if cam.get("serial")}
+        unassigned = [serial for serial in connected if serial not in assigned]
+        
+        specs = []
+        for cam in CameraConfig.MULTI_CAMERAS:
+            serial = cam.get("serial") or (unassigned.pop(0) if unassigned else None)
+            if serial is None or serial not in connected:
+                self.logger.warning(f"相机 {cam['name']} 未连接，跳过")
+                continue
+            specs.append({
+                "name": cam["name"],
+                "role": cam.get("role"),
+                "type": "realsense",
+                "serial": serial,
+                "device": connected[serial],
+                "width": CameraConfig.COLOR_WIDTH,
+                "height": CameraConfig.COLOR_HEIGHT,
+                "fps": CameraConfig.FPS,
+                "align_depth": CameraConfig.ALIGN_DEPTH_TO_COLOR,
+                "depth_filters": CameraConfig.DEPTH_FILTERS if CameraConfig.DEPTH_FILTERS_ENABLED else None,
+                "stream": CameraConfig.REALSENSE_STREAM,
+                "ir_emitter": CameraConfig.IR_EMITTER_ENABLED,
+                "profile_cache": CameraConfig.STREAM_PROFILE_CACHE_PATH,
+            })
+        return specs
+        
+    def _undistort_enabled(self) -> bool:
+        """彩色标定模型只适用于彩色流；红外流由设备校正，不再去畸变"""
+        return CameraConfig.UNDISTORT_ENABLED and not getattr(self.camera, 'infrared', False)
+        
+    def _camera_has_depth(self) -> bool:
+        """当前相机是否提供深度（USB相机只有彩色）"""
+        from camera.capture import USBCapture
+        return not isinstance(self.camera, USBCapture)
+        
+    def _obstacle_detector_kwargs(self) -> dict:
+        """障碍物检测器配置参数（多相机模式下传给工作进程）"""
+        return {
+            "depth_threshold": PerceptionConfig.OBSTACLE_DEPTH_THRESHOLD * 1000,  # 转换为mm
+            "center_region_width": PerceptionConfig.OBSTACLE_CENTER_REGION_WIDTH,
+            "critical_distance": PerceptionConfig.OBSTACLE_CRITICAL_DISTANCE * 1000,  # 转换为mm
+            "warning_distance": PerceptionConfig.OBSTACLE_WARNING_DISTANCE * 1000,  # 转换为mm
+            "denoise": not CameraConfig.DEPTH_FILTERS_ENABLED  # 相机端已滤波时跳过形态学去噪
+        }
+        
+    def _create_obstacle_detector(self):
+        """按配置创建障碍物检测器"""
+        from perception.obstacle_detection import ObstacleDetector
+        return ObstacleDetector(**self._obstacle_detector_kwargs())
+        
+    def _on_obstacle_threat(self, analysis):
+        """高频避障回路检测到危险时直接发送避障命令（在监测线程中调用）"""
+        if self.robot and self.system_status["robot_connected"]:
+            self._send_command(RobotConfig.COMMANDS["OBSTACLE_AVOID"],  # 发送05
+                               capture_time=analysis.timestamp, stage="depth_to_uart")
+        self.logger.warning(
+            f"避障抢占: {analysis.threat_level}，距离: {analysis.min_distance:.0f}mm (05)")
+        
+    def _load_camera_model(self):
+        """加载完整相机模型（内参+畸变）并预计算去畸变映射表，结果缓存复用"""
+        if self.camera_model is None:
+            from camera.undistort import load_camera_model
+            image_size = (CameraConfig.COLOR_WIDTH, CameraConfig.COLOR_HEIGHT)
+            if self.camera is not None:
+                image_size = (self.camera.width, self.camera.height)
+            self.camera_model = load_camera_model(CameraConfig.CALIBRATION_CONFIG_PATH, image_size)
+        return self.camera_model
+        
     def _load_camera_intrinsics(self) -> Optional[list]:
         """加载相机内参"""
-        try:
-            import numpy as np
-            if os.path.exists(CameraConfig.CALIBRATION_CONFIG_PATH):
-                data = np.load(CameraConfig.CALIBRATION_CONFIG_PATH)
-                mtx = data['mtx']
-                # 返回 [fx, fy, cx, cy] 格式
-                return [mtx[0,0], mtx[1,1], mtx[0,2], mtx[1,2]]
-            else:
-                self.logger.warning("未找到相机标定文件，使用默认内参")
-                # 默认 RealSense D455 内参估计值
-                return [600.0, 600.0, 640.0, 360.0]
-        except Exception as e:
-            self.logger.error(f"加载相机内参失败: {e}")
-            return None
+        if getattr(self.camera, 'image_intrinsics', None) is not None:
+            # 红外模式：标定文件对应彩色相机，改用设备出厂的红外内参
+            return self.camera.image_intrinsics
+        model = self._load_camera_model()
+        if model is not None:
+            # 返回 [fx, fy, cx, cy] 格式
+            return model.intrinsics
+        self.logger.warning("未找到相机标定文件，使用默认内参")
+        # 默认 RealSense D455 内参估计值
+        return [600.0, 600.0, 640.0, 360.0]
             
     def run_calibration_mode(self) -> bool:
         """运行相机标定模式"""
         self.logger.info("开始相机标定...")
         
         try:
+            from camera.calibration import calibrate_camera
+            
             camera_matrix, distortion_coeffs = calibrate_camera(
                 images_dir=CameraConfig.CALIBRATION_DATA_DIR,
                 chessboard_size=CameraConfig.CHESSBOARD_SIZE,
                 square_size=CameraConfig.SQUARE_SIZE_METERS,
-                save_path=CameraConfig.CALIBRATION_CONFIG_PATH
+                save_path=CameraConfig.CALIBRATION_CONFIG_PATH,
+                show_corners=RunModeConfig.DISPLAY_ENABLED and not RunModeConfig.HEADLESS,
+                workers=PerformanceConfig.MAX_WORKERS
             )
             
             if camera_matrix is not None:
@@ -246,44 +575,101 @@ class Tiaozhanbei2System:
             self.enable_keyboard_control()
             self.logger.info("键盘控制: WASD移动, Q退出, M切换模式")
             
+        if self.multi_camera is not None:
+            return self._run_multi_camera_tracking()
+            
         self.running = True
         frame_count = 0
         start_time = time.time()
         
+        # 避障回路与追踪解耦：深度由后台取帧线程按深度帧率推送
+        if self.obstacle_monitor is not None:
+            self.obstacle_monitor.start()
+            self.camera.start_grabber()
+        self._start_memory_telemetry()
+        self._start_quality_governor()
+        self._start_gc_policy()
+        self._start_frame_scheduler()
+        
         try:
             while self.running and not self.emergency_stop:
+                if self._wait_for_reconnect():
+                    continue
+                    
                 # 获取图像帧
                 color_frame, depth_frame = self.camera.get_frames()
-                if color_frame is None or depth_frame is None:
-                    self.logger.warning("获取图像帧失败")
+                if color_frame is None or (depth_frame is None and self._camera_has_depth()):
+                    self._handle_camera_failure()
                     continue
+                if self.camera_watchdog is not None:
+                    self.camera_watchdog.frame_ok()
+                if self.memory_telemetry is not None:
+                    self.memory_telemetry.frame_start()
                     
-                frame_start_time = time.time()
+                frame_start_time = time.perf_counter()
                 
-                # 障碍物检测
-                obstacle_mask = self.obstacle_detector.detect(depth_frame)
-                obstacle_analysis = self.obstacle_detector.analyze_obstacle_threat(depth_frame, obstacle_mask)
+                # 帧元数据随帧传递：曝光时刻用于端到端延迟统计
+                self.current_frame_info = self.camera.get_frame_info()
+                if self.current_frame_info:
+                    self.latency_tracker.record("capture_to_process", self.current_frame_info['capture_time'], time.time())
+                if self.frame_scheduler is not None:
+                    # 预计超时的帧降级处理，而不是在过时的图像上做完全部工作
+                    self.frame_plan = self.frame_scheduler.plan(
+                        self.current_frame_info['capture_time'] if self.current_frame_info else None,
+                        can_reuse=self._last_tracking is not None)
                 
-                # 管道追踪（包含方向预测）
-                result = self.pipe_tracker.track(color_frame, depth_frame)
-                if isinstance(result, tuple) and len(result) >= 3:
-                    line_params, global_axis, vis_image = result[:3]
-                    prediction_info = result[3] if len(result) > 3 else None
+                # 障碍物检测：优先使用高频回路的结果，比本帧早超过 2 个深度帧间隔的结果不用
+                # （取帧/监测线程停滞或相机重连中），改由本帧自行检测；本帧也没有深度则停车
+                obstacle_mask, obstacle_analysis = None, None
+                if self.obstacle_monitor is not None:
+                    obstacle_mask, obstacle_analysis, _ = self.obstacle_monitor.get_fresh(
+                        self.current_frame_info['capture_time'] if self.current_frame_info else None)
+                    if obstacle_analysis is None and depth_frame is None:
+                        self._send_stop("高频避障结果过期且本帧没有深度")
+                        continue
+                
+                if PerceptionConfig.PROCESS_WORKER_ENABLED:
+                    # 感知在独立进程中完成，这里只取回定长数值结果（不含方向预测信息）
+                    result = self._perceive_in_worker(color_frame, depth_frame)
+                    if result is None:
+                        continue
+                    tracking = result['tracking']
+                    line_params, global_axis, prediction_info = tracking.line_params, tracking.global_axis, None
+                    if obstacle_analysis is None:
+                        obstacle_analysis = result['obstacle_analysis']
                 else:
-                    line_params, global_axis, vis_image, prediction_info = None, None, color_frame, None
+                    if obstacle_analysis is None and depth_frame is not None:
+                        obstacle_mask = self.obstacle_detector.detect(depth_frame)
+                        obstacle_analysis = self.obstacle_detector.analyze_obstacle_threat(depth_frame, obstacle_mask)
+                    
+                    # 管道追踪（包含方向预测），只输出数值结果
+                    line_params, global_axis, prediction_info = self._track_scheduled(color_frame, depth_frame)
                 
                 # 处理结果
                 self._process_tracking_results(
-                    obstacle_mask, line_params, global_axis, vis_image, prediction_info, obstacle_analysis
+                    obstacle_mask, line_params, global_axis, color_frame, prediction_info, obstacle_analysis
                 )
+                reused_axis = self.frame_plan is not None and not self.frame_plan.track
+                if self.frame_plan is not None:
+                    self.frame_scheduler.finish(self.frame_plan)
+                    self.frame_plan = None
                 
                 # 更新统计信息
                 frame_count += 1
                 self.system_status["total_frames"] = frame_count
+                self._profile_step()
+                if self.memory_telemetry is not None:
+                    self.memory_telemetry.frame_end()
                 
                 # 计算FPS
-                frame_time = time.time() - frame_start_time
+                frame_time = time.perf_counter() - frame_start_time
                 self.system_status["processing_fps"] = 1.0 / frame_time if frame_time > 0 else 0
+                if self.quality_governor is not None and not reused_axis:
+                    # 复用轴线的帧没有追踪、耗时极短，计入会让调节器误判有余量而与调度器来回振荡
+                    self.quality_governor.frame_done(frame_time)
+                if self.gc_policy is not None:
+                    # 取下一帧前的空闲时间用于垃圾回收，避免自动回收停顿落在帧处理中途
+                    self.gc_policy.collect_in_slack(1.0 / CameraConfig.FPS - frame_time)
                 
                 # 每100帧输出一次状态
                 if frame_count % 100 == 0:
@@ -291,6 +677,21 @@ class Tiaozhanbei2System:
                     avg_fps = frame_count / elapsed_time
                     print(f"运行: {avg_fps:.1f}fps {frame_count}帧")
                     self.logger.info(f"帧数: {frame_count}, FPS: {avg_fps:.1f}")
+                    frame_stats = self.camera.get_frame_stats()
+                    uart_latency = self.latency_tracker.get_stats().get("capture_to_uart")
+                    latency_text = f", 曝光->串口 P95 {uart_latency['p95_ms']:.1f}ms" if uart_latency else ""
+                    self.logger.info(f"相机丢帧: {frame_stats['dropped']}, 跳过: {frame_stats['skipped']}{latency_text}")
+                    filter_stats = getattr(self.camera, 'get_filter_stats', dict)()
+                    if filter_stats:
+                        timing = ", ".join(f"{name} {stats['avg_ms']:.2f}ms" for name, stats in filter_stats.items())
+                        self.logger.info(f"深度滤波耗时: {timing}")
+                    self._log_memory()
+                    self._log_gc()
+                    if self.frame_scheduler is not None:
+                        sched = self.frame_scheduler.get_stats()
+                        self.logger.info(f"帧调度: 超时 {sched['deadline_misses']}/{sched['frames']}, "
+                                         f"最坏延迟 {sched['worst_latency_ms']:.1f}ms, 复用轴线 {sched['reuse_axis']}, "
+                                         f"跳过部分视角 {sched['skip_partial']}, 跳过可视化 {sched['skip_visualization']}")
                     
                 # 安全检查
                 if not self._safety_check():
@@ -309,103 +710,273 @@ class Tiaozhanbei2System:
         self.logger.info(f"追踪结束，共 {frame_count} 帧")
         return True
         
-    def _process_tracking_results(self, obstacle_mask, line_params, global_axis, vis_image, prediction_info=None, obstacle_analysis=None):
+    def _perceive_in_worker(self, color_frame, depth_frame) -> Optional[dict]:
+        """把帧交给感知进程并取回最新结果；首帧时按帧尺寸启动感知进程"""
+        if self.perception_worker is None:
+            from perception.worker import PerceptionWorker
+            tracker_kwargs = {
+                "depth_threshold": PerceptionConfig.PIPE_DEPTH_THRESHOLD,
+                "camera_intrinsics": self._load_camera_intrinsics(),
+            }
+            if hasattr(self.camera, 'get_depth_sampler'):
+                tracker_kwargs["depth_sampler"] = self.camera.get_depth_sampler()
+                tracker_kwargs["depth_scale"] = self.camera.depth_scale
+                tracker_kwargs["depth_aligned"] = self.camera.align_depth
+            if self._undistort_enabled():
+                tracker_kwargs["camera_model"] = self._load_camera_model()
+            self.perception_worker = PerceptionWorker(
+                color_frame.shape,
+                depth_frame.shape if depth_frame is not None else None,
+                detector_kwargs=self._obstacle_detector_kwargs(),
+                tracker_kwargs=tracker_kwargs
+            )
+            self.perception_worker.start()
+            
+        if not self.perception_worker.is_alive():
+            self.logger.error("感知进程已退出")
+            self._send_stop("感知进程已退出")
+            self.running = False
+            return None
+            
+        self.perception_worker.submit(color_frame, depth_frame, self.current_frame_info)
+        result = self.perception_worker.wait_result(PerceptionConfig.PROCESS_WORKER_TIMEOUT)
+        if result is None:
+            # 感知进程卡住但仍存活：不能让机器人沿上一条运动命令继续前进
+            self._send_stop("等待感知结果超时")
+            return None
+        # 结果可能对应稍早提交的帧，延迟按该帧的曝光时刻统计
+        self.current_frame_info = {'frame_number': result['tracking'].frame_number,
+                                   'capture_time': result['tracking'].capture_time}
+        return result
+        
+    def _run_multi_camera_tracking(self) -> bool:
+        """多相机追踪：各相机进程独立感知，主进程融合最新结果并下发命令"""
+        self.running = True
+        frame_count = 0
+        last_tracking_sequence = None
+        start_time = time.time()
+        self.multi_camera.start()
+        self._start_memory_telemetry()
+        self._start_gc_policy()
+        
+        try:
+            while self.running and not self.emergency_stop:
+                results = self.multi_camera.wait_for_update(timeout=1.0)
+                if results is None:
+                    if not self.multi_camera.any_alive():
+                        self.logger.error("所有相机工作进程已退出")
+                        break
+                    self._send_stop("等待相机结果超时")
+                    continue
+                fused = self.multi_camera.fuse(results)
+                if fused['tracking_source'] is None:
+                    # 前向相机丢失或结果过期：不能用后向相机或过期结果继续前进
+                    reasons = [f"{name} 丢失" for name in fused['lost']] + [f"{name} 过期" for name in fused['stale']]
+                    self._send_stop(f"前向相机无有效结果: {', '.join(reasons) or '无结果'}")
+                    continue
+                sequence = results[fused['tracking_source']]['sequence']
+                if sequence == last_tracking_sequence:
+                    # 只有其他相机更新：前向结果已处理过，不重复下发同一轴线与威胁
+                    continue
+                last_tracking_sequence = sequence
+                if self.memory_telemetry is not None:
+                    self.memory_telemetry.frame_start()
+                    
+                tracking = fused['tracking']
+                self.current_frame_info = {'capture_time': tracking.capture_time,
+                                           'camera': fused['tracking_source']}
+                self.latency_tracker.record("capture_to_process", tracking.capture_time, time.time())
+                
+                # 工作进程只回传数值结果，预测信息与图像不跨进程传输
+                self._process_tracking_results(
+                    None, tracking.line_params, tracking.global_axis, None, None, fused['obstacle_analysis']
+                )
+                
+                frame_count += 1
+                self.system_status["total_frames"] = frame_count
+                self._profile_step()
+                if self.memory_telemetry is not None:
+                    self.memory_telemetry.frame_end()
+                elapsed_time = time.time() - start_time
+                self.system_status["processing_fps"] = frame_count / elapsed_time if elapsed_time > 0 else 0
+                
+                if frame_count % 100 == 0:
+                    status = ", ".join(f"{name} {info['process_ms'] or 0:.1f}ms"
+                                       for name, info in self.multi_camera.get_status().items())
+                    self.logger.info(f"帧数: {frame_count}, 融合FPS: {self.system_status['processing_fps']:.1f}, 感知耗时: {status}")
+                    self._log_memory()
+                    self._log_gc()
+                    
+                if not self._safety_check():
+                    break
+                    
+        except Exception as e:
+            self.logger.error(f"多相机追踪执行失败: {e}")
+            self.logger.error(traceback.format_exc())
+            return False
+            
+        finally:
+            self.running = False
+            self.disable_keyboard_control()
+            
+        self.logger.info(f"多相机追踪结束，共融合 {frame_count} 次结果")
+        return True
+        
+    def _process_tracking_results(self, obstacle_mask, line_params, global_axis, color_frame, prediction_info=None, obstacle_analysis=None):
         """处理追踪结果（集成转向控制）"""
         try:
             # 转向检测和控制决策
+            # 驻留时间与决策日志按帧曝光时刻计，与传感器时间轴一致、可重放
             turn_result = self.turn_controller.process_frame(
-                vis_image, line_params, global_axis
+                None, line_params, global_axis, prediction_info,
+                timestamp=(self.current_frame_info or {}).get('capture_time')
             )
             
             # 更新系统状态
-            self.system_status["turn_direction"] = turn_result["direction"]
-            self.system_status["turn_confidence"] = turn_result["confidence"]
+            self.system_status["turn_direction"] = turn_result.direction
+            self.system_status["turn_confidence"] = turn_result.confidence
             self.system_status["control_mode"] = self.turn_controller.control_mode
             
             # 发送控制命令到机器人
             if self.robot and self.system_status["robot_connected"]:
                 self._send_robot_commands(obstacle_mask, turn_result, obstacle_analysis)
                 
-            # 显示结果
-            if RunModeConfig.DISPLAY_ENABLED and vis_image is not None:
-                # 添加状态信息到图像
-                from utils.display import add_fps_overlay, add_status_overlay
-                
-                # 添加FPS显示
-                display_image = add_fps_overlay(vis_image, self.system_status["processing_fps"])
-                
-                # 添加系统状态
-                status_info = {
-                    "Camera": "OK" if self.system_status["camera_connected"] else "ERROR",
-                    "Robot": "OK" if self.system_status["robot_connected"] else "DISCONNECTED",
-                    "Frames": self.system_status["total_frames"],
-                    "Mode": self.system_status["control_mode"].upper(),
-                    "Turn": f"{turn_result['direction']} ({turn_result['confidence']:.2f})",
-                    "Keyboard": "ON" if self.system_status["keyboard_control_enabled"] else "OFF"
-                }
-                
-                # 添加最后键盘命令
-                if self.system_status["last_keyboard_command"]:
-                    status_info["LastKey"] = self.system_status["last_keyboard_command"]
-                
-                # 添加转向控制统计
-                turn_stats = self.turn_controller.get_statistics()
-                if turn_stats:
-                    status_info.update({
-                        "Left": f"{turn_stats['left_count']}",
-                        "Right": f"{turn_stats['right_count']}",
-                        "Straight": f"{turn_stats['straight_count']}"
-                    })
-                
-                # 添加键盘控制统计
-                if self.keyboard_controller:
-                    kb_stats = self.keyboard_controller.get_statistics()
-                    if kb_stats["total_commands"] > 0:
-                        status_info["KB_Cmds"] = str(kb_stats["total_commands"])
-                
-                display_image = add_status_overlay(display_image, status_info, start_y=60)
-                
-                # 显示图像
-                key = self.display.show_image("Turn Control Tracking", display_image)
-                if key == ord('q'):
-                    self.running = False
-                elif key == ord('m'):
-                    # 切换控制模式
-                    new_mode = "manual" if self.turn_controller.control_mode == "auto" else "auto"
-                    self.turn_controller.set_control_mode(new_mode)
-                    self.logger.info(f"控制模式切换为: {new_mode}")
-                    
-            # 保存结果
-            if RunModeConfig.SAVE_RESULTS:
-                self._save_results(vis_image, obstacle_mask, line_params, turn_result, obstacle_analysis)
+            # 可视化为可选的降频消费者，无头模式下完全跳过
+            if color_frame is not None and self._visualization_due():
+                vis_start = time.perf_counter()
+                self._publish_visualization(
+                    color_frame, obstacle_mask, line_params, global_axis,
+                    prediction_info, turn_result, obstacle_analysis
+                )
+                if self.frame_scheduler is not None:
+                    self.frame_scheduler.record("visualize", time.perf_counter() - vis_start)
                 
         except Exception as e:
             self.logger.error(f"处理追踪结果失败: {e}")
             
+    def _visualization_due(self) -> bool:
+        """判断本帧是否需要生成可视化（有显示或Web消费者，且达到刷新间隔）"""
+        if RunModeConfig.HEADLESS:
+            return False
+        if not (RunModeConfig.DISPLAY_ENABLED or RunModeConfig.SAVE_RESULTS):
+            return False
+        
+        if self.visualization_scale <= 0:
+            return False  # 质量调节器降到最低档时停止可视化
+        
+        now = time.time()
+        rate = RunModeConfig.VISUALIZATION_RATE_HZ * self.visualization_scale
+        interval = 1.0 / rate if rate > 0 else 0.0
+        if now - self.last_visualization_time < interval:
+            return False
+        if self.frame_plan is not None and not self.frame_plan.visualize:
+            # 预计超时：本帧跳过，下一帧仍然到期
+            self.frame_scheduler.degraded("skip_visualization")
+            return False
+        self.last_visualization_time = now
+        return True
+        
+    def _publish_visualization(self, color_frame, obstacle_mask, line_params, global_axis,
+                               prediction_info, turn_result, obstacle_analysis=None):
+        """生成可视化图像并交给显示窗口/结果保存（供Web界面读取）"""
+        vis_image = self.pipe_tracker.render_visualization(
+            color_frame, line_params, global_axis, prediction_info)
+        
+        # 显示结果
+        if RunModeConfig.DISPLAY_ENABLED:
+            # 添加状态信息到图像
+            from utils.display import add_fps_overlay, add_status_overlay
+            
+            # 添加FPS显示
+            display_image = add_fps_overlay(vis_image, self.system_status["processing_fps"])
+            
+            # 添加系统状态
+            status_info = {
+                "Camera": "OK" if self.system_status["camera_connected"] else "ERROR",
+                "Robot": "OK" if self.system_status["robot_connected"] else "DISCONNECTED",
+                "Frames": self.system_status["total_frames"],
+                "Mode": self.system_status["control_mode"].upper(),
+                "Turn": f"{turn_result.direction} ({turn_result.confidence:.2f})",
+                "Keyboard": "ON" if self.system_status["keyboard_control_enabled"] else "OFF"
+            }
+            
+            # 添加最后键盘命令
+            if self.system_status["last_keyboard_command"]:
+                status_info["LastKey"] = self.system_status["last_keyboard_command"]
+            
+            # 添加转向控制统计
+            turn_stats = self.turn_controller.get_statistics()
+            if turn_stats:
+                status_info.update({
+                    "Left": f"{turn_stats['left_turns']}",
+                    "Right": f"{turn_stats['right_turns']}",
+                    "Straight": f"{turn_stats['straight_segments']}"
+                })
+            
+            # 添加键盘控制统计
+            if self.keyboard_controller:
+                kb_stats = self.keyboard_controller.get_statistics()
+                if kb_stats["total_commands"] > 0:
+                    status_info["KB_Cmds"] = str(kb_stats["total_commands"])
+            
+            display_image = add_status_overlay(display_image, status_info, start_y=60)
+            
+            # 显示图像
+            key = self.display.show_image("Turn Control Tracking", display_image)
+            if key == ord('q'):
+                self.running = False
+            elif key == ord('m'):
+                # 切换控制模式
+                new_mode = "manual" if self.turn_controller.control_mode == "auto" else "auto"
+                self.turn_controller.set_control_mode(new_mode)
+                self.logger.info(f"控制模式切换为: {new_mode}")
+                
+        # 保存结果
+        if RunModeConfig.SAVE_RESULTS:
+            self._save_results(vis_image, obstacle_mask, line_params, turn_result, obstacle_analysis)
+            
+    def _send_command(self, command: str, capture_time: Optional[float] = None, stage: str = "capture_to_uart"):
+        """
+        向串口写出命令并记录端到端延迟
+        
+        Args:
+            command: 串口命令
+            capture_time: 触发该命令的帧的曝光时刻，默认取当前处理帧
+            stage: 延迟统计的阶段名
+        """
+        if capture_time is None and self.current_frame_info:
+            capture_time = self.current_frame_info.get('capture_time')
+        self.robot.send(command)
+        self.latency_tracker.record(stage, capture_time, time.time())
+        
     def _send_robot_commands(self, obstacle_mask, turn_result, obstacle_analysis=None):
         """向机器人发送控制命令（基于转向控制和智能避障）"""
         try:
             import numpy as np
             
+            # 高频避障回路处于抢占状态：避障命令已由监测线程发送，不再下发运动命令
+            if self.obstacle_monitor is not None and self.obstacle_monitor.is_preempting():
+                return
+            
             # 智能安全检查：障碍物威胁分析
             if obstacle_analysis:
-                threat_level = obstacle_analysis["threat_level"]
-                min_distance = obstacle_analysis["min_distance"]
+                threat_level = obstacle_analysis.threat_level
+                min_distance = obstacle_analysis.min_distance
                 
                 if threat_level == "critical":
-                    self.robot.send(RobotConfig.COMMANDS["OBSTACLE_AVOID"])  # 发送05
+                    self._send_command(RobotConfig.COMMANDS["OBSTACLE_AVOID"])  # 发送05
                     self.logger.error(f"紧急避障！检测到严重威胁，距离: {min_distance:.0f}mm (05)")
                     return
                 elif threat_level == "warning":
-                    self.robot.send(RobotConfig.COMMANDS["OBSTACLE_AVOID"])  # 发送05
+                    self._send_command(RobotConfig.COMMANDS["OBSTACLE_AVOID"])  # 发送05
                     self.logger.warning(f"警告避障！检测到障碍物威胁，距离: {min_distance:.0f}mm (05)")
                     return
                 elif threat_level == "caution":
                     self.logger.info(f"注意：前方有障碍物，距离: {min_distance:.0f}mm，继续监控")
             
             # 备用安全检查：基于面积的传统检测
-            elif np.sum(obstacle_mask > 0) > PerceptionConfig.OBSTACLE_MIN_AREA:
-                self.robot.send(RobotConfig.COMMANDS["OBSTACLE_AVOID"])  # 发送05
+            elif obstacle_mask is not None and np.sum(obstacle_mask > 0) > self.obstacle_detector.scaled_area(PerceptionConfig.OBSTACLE_MIN_AREA, obstacle_mask):
+                self._send_command(RobotConfig.COMMANDS["OBSTACLE_AVOID"])  # 发送05
                 self.logger.warning("检测到障碍物（传统检测），发送避障命令 (05)")
                 return
                 
@@ -415,41 +986,41 @@ class Tiaozhanbei2System:
                 manual_cmd = self.turn_controller.get_manual_command()
                 if manual_cmd:
                     if manual_cmd == "left":
-                        self.robot.send(RobotConfig.COMMANDS["TURN_LEFT"])  # 发送03
+                        self._send_command(RobotConfig.COMMANDS["TURN_LEFT"])  # 发送03
                         self.logger.info("执行手动左转命令 (03)")
                     elif manual_cmd == "right":
-                        self.robot.send(RobotConfig.COMMANDS["TURN_RIGHT"])  # 发送04
+                        self._send_command(RobotConfig.COMMANDS["TURN_RIGHT"])  # 发送04
                         self.logger.info("执行手动右转命令 (04)")
                     elif manual_cmd == "forward":
-                        self.robot.send(RobotConfig.COMMANDS["MOVE_FORWARD"])  # 发送01
+                        self._send_command(RobotConfig.COMMANDS["MOVE_FORWARD"])  # 发送01
                         self.logger.info("执行手动前进命令 (01)")
                     elif manual_cmd == "backward":
-                        self.robot.send(RobotConfig.COMMANDS["MOVE_BACKWARD"])  # 发送02
+                        self._send_command(RobotConfig.COMMANDS["MOVE_BACKWARD"])  # 发送02
                         self.logger.info("执行手动后退命令 (02)")
                     elif manual_cmd == "stop":
-                        self.robot.send(RobotConfig.COMMANDS["STOP"])
+                        self._send_command(RobotConfig.COMMANDS["STOP"])
                         self.logger.info("执行手动停止命令")
                 else:
                     # 无手动命令时保持当前状态
                     pass
             else:
                 # 自动模式：根据转向检测结果发送命令
-                direction = turn_result["direction"]
-                confidence = turn_result["confidence"]
+                direction = turn_result.direction
+                confidence = turn_result.confidence
                 
                 if confidence > ControlConfig.MIN_CONFIDENCE_THRESHOLD:
                     if direction == "left":
-                        self.robot.send(RobotConfig.COMMANDS["TURN_LEFT"])  # 发送03
+                        self._send_command(RobotConfig.COMMANDS["TURN_LEFT"])  # 发送03
                         self.logger.info(f"自动左转，置信度: {confidence:.2f} (03)")
                     elif direction == "right":
-                        self.robot.send(RobotConfig.COMMANDS["TURN_RIGHT"])  # 发送04
+                        self._send_command(RobotConfig.COMMANDS["TURN_RIGHT"])  # 发送04
                         self.logger.info(f"自动右转，置信度: {confidence:.2f} (04)")
                     else:
-                        self.robot.send(RobotConfig.COMMANDS["MOVE_FORWARD"])  # 发送01
+                        self._send_command(RobotConfig.COMMANDS["MOVE_FORWARD"])  # 发送01
                         self.logger.debug("直线前进 (01)")
                 else:
                     # 置信度不足，保持当前状态或搜索
-                    self.robot.send(RobotConfig.COMMANDS["STOP"])
+                    self._send_command(RobotConfig.COMMANDS["STOP"])
                     self.logger.debug("置信度不足，发送停止命令")
                 
         except Exception as e:
@@ -484,14 +1055,14 @@ class Tiaozhanbei2System:
                 
                 save_data = {
                     "timestamp": timestamp,
-                    "turn_result": turn_result,
-                    "obstacle_analysis": obstacle_analysis,
+                    "turn_result": turn_result.to_dict() if turn_result else None,
+                    "obstacle_analysis": obstacle_analysis.to_dict() if obstacle_analysis else None,
                     "control_mode": self.turn_controller.control_mode,
                     "statistics": self.turn_controller.get_statistics()
                 }
                 
                 with open(json_path, 'w') as f:
-                    json.dump(save_data, f, indent=2, default=str)
+                    json.dump(save_data, f, indent=2)
                     
         except Exception as e:
             self.logger.error(f"保存结果失败: {e}")
@@ -525,6 +1096,31 @@ class Tiaozhanbei2System:
         """获取系统状态（供Web界面调用）"""
         try:
             state = self.system_status.copy()
+            if self.camera is not None and hasattr(self.camera, 'get_filter_stats'):
+                state["depth_filter_timing"] = self.camera.get_filter_stats()
+            if self.obstacle_monitor is not None:
+                state["obstacle_monitor"] = self.obstacle_monitor.get_stats()
+            if self.multi_camera is not None:
+                state["camera_workers"] = self.multi_camera.get_status()
+            if self.camera_watchdog is not None:
+                state["camera_watchdog"] = self.camera_watchdog.get_status()
+            if self.perception_worker is not None:
+                state["perception_worker"] = self.perception_worker.get_stats()
+            if self.camera is not None:
+                state["frame_stats"] = self.camera.get_frame_stats()
+                state["frame_info"] = self.camera.get_frame_info()
+            state["latency"] = self.latency_tracker.get_stats()
+            state["logging"] = get_log_stats()
+            if self.memory_telemetry is not None:
+                state["memory"] = self.memory_telemetry.get_stats()
+            if self.quality_governor is not None:
+                state["quality"] = self.quality_governor.get_status()
+            if self.gc_policy is not None:
+                state["gc"] = self.gc_policy.get_stats()
+            if self.frame_scheduler is not None:
+                state["scheduler"] = self.frame_scheduler.get_stats()
+            if self.pipe_tracker is not None:
+                state["edge_params"] = self.pipe_tracker.get_edge_params()
             if self.turn_controller:
                 state.update({
                     "turn_statistics": self.turn_controller.get_statistics(),
@@ -639,27 +1235,28 @@ class Tiaozhanbei2System:
             
             while time.time() < demo_end_time and self.running:
                 frame_start_time = time.time()
+                if self._wait_for_reconnect():
+                    continue
                 
                 color_frame, depth_frame = self.camera.get_frames()
-                if color_frame is not None and depth_frame is not None:
-                    # 简单处理
-                    obstacle_mask = self.obstacle_detector.detect(depth_frame)
-                    result = self.pipe_tracker.track(color_frame, depth_frame)
-                    
-                    # 安全解包结果
-                    if isinstance(result, tuple) and len(result) >= 3:
-                        line_params, _, vis_image = result[:3]
-                    else:
-                        line_params, vis_image = None, color_frame
+                if color_frame is not None:
+                    # 简单处理（USB相机无深度时只做RGB追踪）
+                    if depth_frame is not None:
+                        obstacle_mask = self.obstacle_detector.detect(depth_frame)
+                    line_params, global_axis, _, prediction_info = self.pipe_tracker.track(
+                        color_frame, depth_frame, visualize=False)
                     
                     # 计算FPS
                     frame_count += 1
                     elapsed_time = time.time() - demo_start_time
                     current_fps = frame_count / elapsed_time if elapsed_time > 0 else 0.0
                     
-                    if vis_image is not None and RunModeConfig.DISPLAY_ENABLED:
+                    if RunModeConfig.DISPLAY_ENABLED and self._visualization_due():
                         from utils.display import add_fps_overlay, add_status_overlay
                         
+                        vis_image = self.pipe_tracker.render_visualization(
+                            color_frame, line_params, global_axis, prediction_info)
+                        
                         # 添加FPS显示到演示图像
                         display_image = add_fps_overlay(vis_image, current_fps)
                         
@@ -675,6 +1272,8 @@ class Tiaozhanbei2System:
                         key = self.display.show_image("Demo Mode", display_image)
                         if key == ord('q'):
                             break
+                else:
+                    self._handle_camera_failure()
                             
             self.running = False
             self.logger.info("演示模式完成")
@@ -684,13 +1283,37 @@ class Tiaozhanbei2System:
             self.logger.error(f"演示模式执行失败: {e}")
             return False
             
+    def _log_memory(self):
+        """周期状态日志中附带内存占用"""
+        if self.memory_telemetry is None:
+            return
+        memory = self.memory_telemetry.get_stats()
+        if memory['rss_mb'] is None:
+            return
+        alloc = f", 每帧分配 {memory['frame_alloc_kb_avg']:.0f}KB" if 'frame_alloc_kb_avg' in memory else ""
+        self.logger.info(f"内存: RSS {memory['rss_mb']:.0f}MB, 增长告警 {memory['growth_warnings']}次{alloc}")
+        
+    def _log_gc(self):
+        """周期状态日志中附带垃圾回收停顿"""
+        if self.gc_policy is None:
+            return
+        gc_stats = self.gc_policy.get_stats()
+        max_auto = gc_stats['max_automatic_pause_ms']
+        max_text = f"(最长 {max_auto:.1f}ms)" if max_auto is not None else ""
+        self.logger.info(f"垃圾回收: 空闲时回收 {gc_stats['slack_collections']}次, "
+                         f"自动回收 {gc_stats['automatic_collections']}次{max_text}, 推迟 {gc_stats['deferred']}次")
+        
     def print_system_status(self):
         """打印系统状态"""
         cam = '✓' if self.system_status['camera_connected'] else '✗'
         robot = '✓' if self.system_status['robot_connected'] else '✗'
         fps = self.system_status['processing_fps']
         frames = self.system_status['total_frames']
-        print(f"状态: 相机{cam} 机器人{robot} FPS{fps:.1f} 帧{frames}")
+        memory = ""
+        if self.memory_telemetry is not None:
+            rss_mb = self.memory_telemetry.get_stats()['rss_mb']
+            memory = f" 内存{rss_mb:.0f}MB" if rss_mb is not None else ""
+        print(f"状态: 相机{cam} 机器人{robot} FPS{fps:.1f} 帧{frames}{memory}")
         
     def cleanup(self):
         """清理资源"""
@@ -700,14 +1323,48 @@ class Tiaozhanbei2System:
             # 禁用键盘控制
             self.disable_keyboard_control()
             
+            if self.obstacle_monitor:
+                self.obstacle_monitor.stop()
+                
+            if self.memory_telemetry:
+                self.memory_telemetry.stop()
+                
+            if self.gc_policy:
+                self.gc_policy.stop()
+                
+            if self.profiler:
+                # 未跑满帧数就退出时也写出已采集的部分
+                files = self.profiler.stop()
+                self.logger.info(f"剖析提前结束 ({self.profiler.frames_done}帧): {', '.join(files.values())}")
+                
+            if self.perception_worker:
+                self.perception_worker.stop()
+                
+            if self.camera_watchdog:
+                self.camera_watchdog.stop()
+                
             if self.camera:
                 self.camera.stop()
                 
+            if self.multi_camera:
+                self.multi_camera.stop()
+                
             if self.robot:
                 self.robot.close()
                 
+            # 保存转向决策日志，便于离线重放
+            if self.turn_controller and self.turn_controller.state_machine.decision_log:
+                from datetime import datetime
+                log_path = os.path.join(
+                    LogConfig.LOG_DIR,
+                    f"turn_decisions_{datetime.now().strftime('%Y%m%d_%H%M%S')}.jsonl"
+                )
+                self.turn_controller.state_machine.save_decision_log(log_path)
+                self.logger.info(f"转向决策日志已保存: {log_path}")
+                
             # 关闭显示窗口
-            self.display.close_window()
+            if self._display is not None:
+                self._display.close_window()
             
             self.logger.info("资源清理完成")
             
@@ -730,7 +1387,9 @@ def create_argument_parser():
   python main.py --mode demo
   python main.py --mode calib
   python main.py --mode track --display
+  python main.py --mode track --headless
   python main.py --mode test --verbose
+  python main.py --mode track --headless --profile 300
         """
     )
     
@@ -760,6 +1419,34 @@ def create_argument_parser():
         help="详细输出"
     )
     
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="无头模式：不显示、不保存可视化图像，感知只输出数值结果"
+    )
+    
+    parser.add_argument(
+        "--vis-rate",
+        type=float,
+        default=RunModeConfig.VISUALIZATION_RATE_HZ,
+        help=f"可视化刷新频率 Hz (默认: {RunModeConfig.VISUALIZATION_RATE_HZ})"
+    )
+    
+    parser.add_argument(
+        "--profile",
+        type=int,
+        metavar="N",
+        default=0,
+        help="追踪模式下剖析 N 帧后退出，折叠栈与函数耗时表写入 output/logs"
+    )
+    
+    parser.add_argument(
+        "--profile-mode",
+        choices=["sample", "cprofile"],
+        default=PerformanceConfig.PROFILE_MODE,
+        help=f"剖析方式 (默认: {PerformanceConfig.PROFILE_MODE})：sample 低开销采样，cprofile 另叠加 cProfile"
+    )
+    
     parser.add_argument(
         "--config-check", "-c",
         action="store_true",
@@ -782,6 +1469,12 @@ def main():
     if args.verbose:
         LogConfig.LOG_LEVEL = "DEBUG"
         RunModeConfig.VERBOSE_OUTPUT = True
+    if args.headless:
+        RunModeConfig.HEADLESS = True
+        RunModeConfig.DISPLAY_ENABLED = False
+        RunModeConfig.SAVE_RESULTS = False
+    RunModeConfig.VISUALIZATION_RATE_HZ = args.vis_rate
+    set_log_level(LogConfig.LOG_LEVEL)
     
     # 验证配置
     print("验证系统配置...")
@@ -796,6 +1489,7 @@ def main():
         
     if args.config_check:
         print_config_summary()
+        print(f"启动耗时: {time.perf_counter() - _STARTUP_TIME:.3f}s")
         return 0
     
     # 创建系统实例
@@ -805,25 +1499,27 @@ def main():
         system = Tiaozhanbei2System()
         system.start_time = time.time()
         
-        # 初始化硬件
-        if not system.initialize_hardware():
-            print("❌ 硬件初始化失败")
-            return 1
-            
-        # 初始化算法
-        if not system.initialize_algorithms():
-            print("❌ 算法初始化失败")
-            return 1
-            
-        print("✅ 系统初始化完成")
+        # 标定模式只处理离线图片，不需要相机和感知模块
+        if args.mode != RunModeConfig.CALIBRATION_MODE:
+            # 初始化硬件
+            if not system.initialize_hardware():
+                print("❌ 硬件初始化失败")
+                return 1
+                
+            # 初始化算法
+            if not system.initialize_algorithms():
+                print("❌ 算法初始化失败")
+                return 1
+                
+        print(f"✅ 系统初始化完成 ({time.perf_counter() - _STARTUP_TIME:.2f}s)")
         
         # 根据模式运行
         success = False
-        if args.mode == RunModeConfig.DEMO_MODE:
-            success = system.run_demo_mode()
-        elif args.mode == RunModeConfig.CALIBRATION_MODE:
+        if args.mode == RunModeConfig.CALIBRATION_MODE:
             success = system.run_calibration_mode()
         elif args.mode == RunModeConfig.TRACKING_MODE:
+            if args.profile > 0:
+                system.request_profile(args.profile, args.profile_mode, exit_after=True)
             success = system.run_tracking_mode()
         elif args.mode == RunModeConfig.TEST_MODE:
             # 运行所有模式的简化版本
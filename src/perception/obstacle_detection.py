@@ -1,8 +1,17 @@
 import numpy as np
 import cv2
 
+try:
+    from utils.results import ObstacleAnalysis
+except ImportError:
+    from ..utils.results import ObstacleAnalysis
+
 class ObstacleDetector:
-    def __init__(self, depth_threshold=1000, center_region_width=0.3, critical_distance=500, warning_distance=1500):
+    # 像素面积阈值对应的参考分辨率，深度图被降采样时阈值按比例缩放
+    REFERENCE_PIXELS = 640 * 480
+    
+    def __init__(self, depth_threshold=1000, center_region_width=0.3, critical_distance=500, warning_distance=1500,
+                 denoise=True):
         """
         障碍物检测器
         
@@ -11,11 +20,13 @@ class ObstacleDetector:
             center_region_width: 中央检测区域宽度比例（0-1）
             critical_distance: 紧急停车距离（单位mm）
             warning_distance: 警告距离（单位mm）
+            denoise: 是否对掩码做形态学去噪；相机端已做空间/补洞滤波时可关闭
         """
         self.depth_threshold = depth_threshold
         self.center_region_width = center_region_width
         self.critical_distance = critical_distance
         self.warning_distance = warning_distance
+        self.denoise = denoise
         
         # 滤波器内核
         self.morphology_kernel = np.ones((5, 5), np.uint8)
@@ -39,12 +50,17 @@ class ObstacleDetector:
         mask = mask.astype(np.uint8) * 255
         
         # 形态学操作去噪
-        mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self.morphology_kernel)
-        mask = cv2.erode(mask, self.erosion_kernel, iterations=1)
-        mask = cv2.dilate(mask, self.morphology_kernel, iterations=1)
+        if self.denoise:
+            mask = cv2.morphologyEx(mask, cv2.MORPH_CLOSE, self.morphology_kernel)
+            mask = cv2.erode(mask, self.erosion_kernel, iterations=1)
+            mask = cv2.dilate(mask, self.morphology_kernel, iterations=1)
         
         return mask
     
+    def scaled_area(self, min_area, mask):
+        """把按参考分辨率定义的像素面积阈值换算到当前掩码分辨率"""
+        return min_area * mask.size / float(self.REFERENCE_PIXELS)
+    
     def analyze_obstacle_threat(self, depth_img, mask=None):
         """
         分析障碍物威胁等级
@@ -54,7 +70,7 @@ class ObstacleDetector:
             mask: 障碍物掩码（可选）
             
         Returns:
-            dict: 威胁分析结果
+            ObstacleAnalysis: 威胁分析结果
         """
         if mask is None:
             mask = self.detect(depth_img)
@@ -67,15 +83,15 @@ class ObstacleDetector:
         center_mask = mask[:, center_start:center_end]
         
         # 计算障碍物统计信息
-        total_obstacle_pixels = np.sum(mask > 0)
-        center_obstacle_pixels = np.sum(center_mask > 0)
+        total_obstacle_pixels = int(np.count_nonzero(mask))
+        center_obstacle_pixels = int(np.count_nonzero(center_mask))
         
         # 查找最近的障碍物距离
         min_distance = float('inf')
         if total_obstacle_pixels > 0:
             obstacle_coords = np.where(mask > 0)
             obstacle_depths = depth_img[obstacle_coords]
-            min_distance = np.min(obstacle_depths[obstacle_depths > 0])
+            min_distance = float(np.min(obstacle_depths[obstacle_depths > 0]))
         
         # 确定威胁等级
         threat_level = "none"
@@ -83,17 +99,17 @@ class ObstacleDetector:
             threat_level = "critical"
         elif min_distance < self.warning_distance:
             threat_level = "warning"
-        elif center_obstacle_pixels > 50:
+        elif center_obstacle_pixels > self.scaled_area(50, mask):
             threat_level = "caution"
             
-        return {
-            "threat_level": threat_level,
-            "min_distance": min_distance,
-            "total_obstacle_pixels": total_obstacle_pixels,
-            "center_obstacle_pixels": center_obstacle_pixels,
-            "obstacle_density": total_obstacle_pixels / (height * width),
-            "center_obstacle_density": center_obstacle_pixels / (center_mask.shape[0] * center_mask.shape[1])
-        }
+        return ObstacleAnalysis(
+            threat_level=threat_level,
+            min_distance=min_distance,
+            total_obstacle_pixels=total_obstacle_pixels,
+            center_obstacle_pixels=center_obstacle_pixels,
+            obstacle_density=total_obstacle_pixels / (height * width),
+            center_obstacle_density=center_obstacle_pixels / (center_mask.shape[0] * center_mask.shape[1])
+        )
     
     def should_avoid(self, depth_img, min_area=100):
         """
@@ -110,8 +126,8 @@ class ObstacleDetector:
         analysis = self.analyze_obstacle_threat(depth_img, mask)
         
         # 基于威胁等级和面积判断
-        return (analysis["threat_level"] in ["critical", "warning"] or 
-                analysis["total_obstacle_pixels"] > min_area)
+        return (analysis.threat_level in ["critical", "warning"] or 
+                analysis.total_obstacle_pixels > min_area)
 
     def draw_obstacles(self, color_img, mask, analysis=None):
         """
@@ -127,13 +143,17 @@ class ObstacleDetector:
         """
         result = color_img.copy()
         
+        # 深度图经过降采样时，掩码放大到彩色图尺寸再叠加
+        if mask.shape[:2] != result.shape[:2]:
+            mask = cv2.resize(mask, (result.shape[1], result.shape[0]), interpolation=cv2.INTER_NEAREST)
+        
         # 根据威胁等级选择颜色
         if analysis:
-            if analysis["threat_level"] == "critical":
+            if analysis.threat_level == "critical":
                 color = [0, 0, 255]  # 红色
-            elif analysis["threat_level"] == "warning":
+            elif analysis.threat_level == "warning":
                 color = [0, 165, 255]  # 橙色
-            elif analysis["threat_level"] == "caution":
+            elif analysis.threat_level == "caution":
                 color = [0, 255, 255]  # 黄色
             else:
                 color = [0, 255, 0]  # 绿色
@@ -151,8 +171,8 @@ class ObstacleDetector:
         
         # 添加威胁信息文本
         if analysis:
-            info_text = f"Threat: {analysis['threat_level'].upper()}"
-            distance_text = f"Min Dist: {analysis['min_distance']:.0f}mm"
+            info_text = f"Threat: {analysis.threat_level.upper()}"
+            distance_text = f"Min Dist: {analysis.min_distance:.0f}mm"
             cv2.putText(result, info_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
             cv2.putText(result, distance_text, (10, 70), cv2.FONT_HERSHEY_SIMPLEX, 1, (255, 255, 255), 2)
         
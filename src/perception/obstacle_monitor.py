@@ -0,0 +1,226 @@
+"""
+高频障碍物监测 - 与管道追踪解耦的纯深度安全回路
+High-rate depth-only obstacle monitor
+
+深度帧按传感器帧率（可达90fps）送入 submit()，独立线程只处理最新一帧，
+检测到危险威胁时立即回调（发送避障命令），主循环据 is_preempting() 抑制运动命令。
+主循环通过 get_fresh() 取结果：比当前帧早超过 max_age 的结果（取帧或监测线程停滞、相机重连中）不再使用。
+"""
+
+import threading
+import time
+import logging
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+try:
+    from config import CameraConfig, PerceptionConfig
+except ImportError:
+    class CameraConfig:
+        DEPTH_FPS = 30
+
+    class PerceptionConfig:
+        OBSTACLE_PREEMPT_LEVELS = ("critical", "warning")
+        OBSTACLE_PREEMPT_HOLD_TIME = 0.3
+        OBSTACLE_COMMAND_INTERVAL = 0.2
+        OBSTACLE_MAX_RESULT_AGE_FRAMES = 2.0
+
+
+class ObstacleMonitor:
+    """在独立线程中以深度帧率运行障碍物检测，并抢占运动命令"""
+
+    def __init__(self, detector, on_threat: Optional[Callable[[object], None]] = None,
+                 preempt_levels=None, hold_time: Optional[float] = None,
+                 command_interval: Optional[float] = None, max_age: Optional[float] = None):
+        """
+        Args:
+            detector: ObstacleDetector 实例（监测线程独占，不与主循环共享）
+            on_threat: 进入/保持抢占威胁时的回调 on_threat(analysis)，按 command_interval 限频
+            preempt_levels: 触发抢占的威胁等级
+            hold_time: 最后一次危险检测后保持抢占的时间（秒），避免威胁在阈值附近抖动
+            command_interval: 持续危险时重复回调的最小间隔（秒）
+            max_age: get_fresh() 接受的最大结果年龄（秒），
+                     默认 OBSTACLE_MAX_RESULT_AGE_FRAMES 个深度帧间隔
+        """
+        self.detector = detector
+        self.on_threat = on_threat
+        self.preempt_levels = tuple(preempt_levels if preempt_levels is not None
+                                    else PerceptionConfig.OBSTACLE_PREEMPT_LEVELS)
+        self.hold_time = hold_time if hold_time is not None else PerceptionConfig.OBSTACLE_PREEMPT_HOLD_TIME
+        self.command_interval = (command_interval if command_interval is not None
+                                 else PerceptionConfig.OBSTACLE_COMMAND_INTERVAL)
+        self.max_age = (max_age if max_age is not None
+                        else PerceptionConfig.OBSTACLE_MAX_RESULT_AGE_FRAMES / CameraConfig.DEPTH_FPS)
+        self.logger = logging.getLogger(__name__)
+
+        # 最新深度帧槽位（只保留一帧，处理不过来时丢弃旧帧）
+        self._condition = threading.Condition()
+        self._pending = None
+        self._thread = None
+        self._running = False
+
+        # 最新结果
+        self._result_lock = threading.Lock()
+        self._latest_mask = None
+        self._latest_analysis = None
+        self._latest_timestamp = None
+        self._last_threat_time = None
+        self._last_callback_time = None
+
+        # 统计
+        self.stats = {
+            'frames_submitted': 0,
+            'frames_processed': 0,
+            'frames_dropped': 0,
+            'preempt_events': 0,
+            'stale_results': 0,  # get_fresh() 因结果过期而拒绝的次数
+            'last_process_ms': 0.0,
+            'last_latency_ms': 0.0,
+        }
+        self._rate_window_start = None
+        self._rate_window_frames = 0
+        self.processing_rate = 0.0
+
+    def start(self):
+        """启动监测线程"""
+        if self._running:
+            return
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="ObstacleMonitor", daemon=True)
+        self._thread.start()
+        self.logger.info("高频障碍物监测已启动")
+
+    def stop(self):
+        """停止监测线程"""
+        self._running = False
+        with self._condition:
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    def submit(self, depth_image: np.ndarray, timestamp: Optional[float] = None):
+        """提交一帧深度（非阻塞，可直接作为相机深度监听器）"""
+        with self._condition:
+            if self._pending is not None:
+                self.stats['frames_dropped'] += 1
+            self._pending = (depth_image, timestamp if timestamp is not None else time.time())
+            self.stats['frames_submitted'] += 1
+            self._condition.notify()
+
+    def _run(self):
+        while self._running:
+            with self._condition:
+                while self._pending is None and self._running:
+                    self._condition.wait(0.5)
+                if not self._running:
+                    break
+                depth_image, timestamp = self._pending
+                self._pending = None
+            try:
+                self.process(depth_image, timestamp)
+            except Exception as e:
+                self.logger.error(f"障碍物监测处理失败: {e}")
+
+    def process(self, depth_image: np.ndarray, timestamp: Optional[float] = None):
+        """
+        同步处理一帧深度：检测、更新最新结果，必要时触发抢占回调
+
+        Returns:
+            威胁分析结果
+        """
+        start = time.time()
+        if timestamp is None:
+            timestamp = start
+
+        mask = self.detector.detect(depth_image)
+        analysis = self.detector.analyze_obstacle_threat(depth_image, mask)
+        analysis.timestamp = timestamp  # 深度帧曝光时刻，供端到端延迟统计
+        now = time.time()
+
+        preempt = analysis.threat_level in self.preempt_levels
+        fire = False
+        with self._result_lock:
+            self._latest_mask = mask
+            self._latest_analysis = analysis
+            self._latest_timestamp = timestamp
+            if preempt:
+                if self._last_threat_time is None or now - self._last_threat_time > self.hold_time:
+                    self.stats['preempt_events'] += 1
+                self._last_threat_time = now
+                if self._last_callback_time is None or now - self._last_callback_time >= self.command_interval:
+                    self._last_callback_time = now
+                    fire = True
+            else:
+                # 威胁解除后下一次危险立即回调
+                if self._last_threat_time is not None and now - self._last_threat_time > self.hold_time:
+                    self._last_callback_time = None
+
+        self.stats['frames_processed'] += 1
+        self.stats['last_process_ms'] = (now - start) * 1000.0
+        self.stats['last_latency_ms'] = (now - timestamp) * 1000.0
+        self._update_rate(now)
+
+        if fire and self.on_threat is not None:
+            try:
+                self.on_threat(analysis)
+            except Exception as e:
+                self.logger.error(f"障碍物抢占回调失败: {e}")
+
+        return analysis
+
+    def _update_rate(self, now: float):
+        """按约1秒窗口统计处理帧率"""
+        if self._rate_window_start is None:
+            self._rate_window_start = now
+        self._rate_window_frames += 1
+        elapsed = now - self._rate_window_start
+        if elapsed >= 1.0:
+            self.processing_rate = self._rate_window_frames / elapsed
+            self._rate_window_start = now
+            self._rate_window_frames = 0
+
+    def is_preempting(self, now: Optional[float] = None) -> bool:
+        """当前是否处于障碍物抢占状态（主循环据此跳过运动命令）"""
+        with self._result_lock:
+            if self._last_threat_time is None:
+                return False
+            if now is None:
+                now = time.time()
+            return now - self._last_threat_time <= self.hold_time
+
+    def get_latest(self) -> Tuple[Optional[np.ndarray], Optional[object], Optional[float]]:
+        """最新一次检测结果 (mask, analysis, timestamp)"""
+        with self._result_lock:
+            return self._latest_mask, self._latest_analysis, self._latest_timestamp
+
+    def get_fresh(self, reference_time: Optional[float] = None) -> Tuple[Optional[np.ndarray], Optional[object], Optional[float]]:
+        """
+        不早于参考时刻 max_age 的最新结果
+        
+        Args:
+            reference_time: 参考时刻（通常为当前处理帧的曝光时刻，与深度时间戳同一时钟），默认当前时间
+            
+        Returns:
+            (mask, analysis, age)；没有结果或结果过期时 mask/analysis 为 None，调用方应自行检测或停车
+        """
+        if reference_time is None:
+            reference_time = time.time()
+        mask, analysis, timestamp = self.get_latest()
+        age = reference_time - timestamp if timestamp is not None else None
+        if age is None or age > self.max_age:
+            self.stats['stale_results'] += 1
+            return None, None, age
+        return mask, analysis, age
+
+    def get_stats(self) -> dict:
+        """监测统计：提交/处理/丢弃帧数、抢占次数、处理帧率与耗时、最新结果年龄"""
+        stats = dict(self.stats)
+        stats['processing_rate'] = self.processing_rate
+        stats['preempting'] = self.is_preempting()
+        with self._result_lock:
+            timestamp = self._latest_timestamp
+        stats['result_age_ms'] = (time.time() - timestamp) * 1000.0 if timestamp is not None else None
+        stats['max_age_ms'] = self.max_age * 1000.0
+        return stats
@@ -6,11 +6,101 @@ import time
 
 # 添加配置导入
 try:
-    from config import RunModeConfig
+    from config import RunModeConfig, PerceptionConfig
 except ImportError:
     # 如果导入失败，创建一个默认配置
     class RunModeConfig:
         VERBOSE_OUTPUT = False
+    
+    class PerceptionConfig:
+        CANNY_LOW_THRESHOLD = 50
+        CANNY_HIGH_THRESHOLD = 150
+        CANNY_AUTO = True
+        CANNY_SIGMA = 0.33
+        CANNY_MIN_LOW_THRESHOLD = 20
+        HOUGH_RHO = 1
+        HOUGH_THETA = np.pi / 180
+        HOUGH_THRESHOLD = 50
+        HOUGH_MIN_LINE_LENGTH = 30
+        HOUGH_MAX_LINE_GAP = 20
+        HOUGH_AUTO_TUNE = True
+        HOUGH_TARGET_SEGMENTS = 10
+        HOUGH_THRESHOLD_RANGE = (15, 200)
+        HOUGH_TUNE_GAIN = 0.25
+        PIPE_MIN_DEPTH = 0.1
+        PIPE_DEPTH_GATE_ENABLED = True
+        PIPE_DEPTH_GATE_DILATE = 15
+        PIPE_DEPTH_GATE_MIN_COVERAGE = 0.02
+        PIPE_DEPTH_EDGES_ENABLED = False
+        PIPE_DEPTH_EDGE_THRESHOLD = 50
+
+def to_gray(image: np.ndarray) -> np.ndarray:
+    """BGR 图像转灰度；已是单通道（如 RealSense 红外 Y8）时直接返回，不做转换"""
+    if image.ndim == 2:
+        return image
+    return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+def canny_thresholds(gray: np.ndarray) -> Tuple[int, int]:
+    """
+    Canny 双阈值：开启自适应时取灰度中值的 [(1-σ), (1+σ)] 倍，否则使用配置的固定阈值
+    
+    低阈值不低于 CANNY_MIN_LOW_THRESHOLD，高阈值不低于低阈值的2倍，
+    避免暗场或低对比度画面中噪声被当作边缘。
+    """
+    if not PerceptionConfig.CANNY_AUTO:
+        return PerceptionConfig.CANNY_LOW_THRESHOLD, PerceptionConfig.CANNY_HIGH_THRESHOLD
+    median = float(np.median(gray))
+    sigma = PerceptionConfig.CANNY_SIGMA
+    low = max(PerceptionConfig.CANNY_MIN_LOW_THRESHOLD, int((1.0 - sigma) * median))
+    high = min(255, max(2 * low, int((1.0 + sigma) * median)))
+    return low, high
+
+class HoughThresholdController:
+    """
+    霍夫累加器阈值反馈控制器
+    
+    每个象限独立维护阈值：候选线段多于目标时提高阈值，少于目标时降低阈值，
+    使每帧需要处理的线段数保持在目标附近，不随光照和背景杂乱程度大起大落。
+    """
+    
+    def __init__(self, num_regions: int = 4, initial: Optional[int] = None, target: Optional[int] = None,
+                 threshold_range: Optional[Tuple[int, int]] = None, gain: Optional[float] = None,
+                 enabled: Optional[bool] = None):
+        self.target = target if target is not None else PerceptionConfig.HOUGH_TARGET_SEGMENTS
+        self.threshold_range = tuple(threshold_range if threshold_range is not None
+                                     else PerceptionConfig.HOUGH_THRESHOLD_RANGE)
+        self.gain = gain if gain is not None else PerceptionConfig.HOUGH_TUNE_GAIN
+        self.enabled = enabled if enabled is not None else PerceptionConfig.HOUGH_AUTO_TUNE
+        initial = initial if initial is not None else PerceptionConfig.HOUGH_THRESHOLD
+        self.thresholds = [int(initial)] * num_regions
+        self.last_counts = [0] * num_regions
+    
+    def threshold(self, region: int) -> int:
+        return self.thresholds[region]
+    
+    def update(self, region: int, segment_count: int) -> int:
+        """根据本帧候选线段数更新该区域的阈值，返回新阈值"""
+        self.last_counts[region] = segment_count
+        if not self.enabled:
+            return self.thresholds[region]
+        
+        # 线段数对阈值非常敏感，在 [目标/2, 目标*2] 内不调节，避免来回振荡
+        if self.target / 2.0 <= segment_count <= self.target * 2.0:
+            return self.thresholds[region]
+        
+        # 0 条线段按 0.5 条计，避免比值为0；单帧调整幅度限制在 [0.85, 1.15] 倍
+        ratio = max(segment_count, 0.5) / float(self.target)
+        scale = min(max(ratio ** self.gain, 0.85), 1.15)
+        current = self.thresholds[region]
+        new_threshold = int(round(current * scale))
+        if new_threshold == current:
+            new_threshold += 1 if scale > 1.0 else -1  # 阈值较小时保证至少移动1
+        low, high = self.threshold_range
+        self.thresholds[region] = min(max(new_threshold, low), high)
+        return self.thresholds[region]
+    
+    def get_state(self) -> Dict[str, list]:
+        return {'thresholds': list(self.thresholds), 'segment_counts': list(self.last_counts)}
 
 # 内置方向预测和部分追踪功能
 
@@ -70,8 +160,8 @@ class PartialPipeTracker:
     def track_partial_pipe(self, color_image, depth_image=None):
         """追踪部分可见管道"""
         # 简化的部分追踪实现
-        gray = cv2.cvtColor(color_image, cv2.COLOR_BGR2GRAY)
-        edges = cv2.Canny(gray, 50, 150)
+        gray = to_gray(color_image)
+        edges = cv2.Canny(gray, *canny_thresholds(gray))
         
         # 查找轮廓
         contours, _ = cv2.findContours(edges, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
@@ -107,9 +197,36 @@ class PartialPipeTracker:
 class PipeTracker:
     """管道追踪器 - 增强版本支持方向预测"""
     
-    def __init__(self, depth_threshold: float = 2.0, camera_intrinsics: Optional[List[float]] = None):
+    # 四象限可视化颜色 (Q1右上, Q2左上, Q3左下, Q4右下)
+    QUADRANT_COLORS = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)]
+    
+    def __init__(self, depth_threshold: float = 2.0, camera_intrinsics: Optional[List[float]] = None,
+                 visualize: bool = True, camera_model=None, depth_sampler=None, depth_scale: float = 0.001,
+                 depth_aligned: bool = False):
+        """
+        Args:
+            depth_threshold: 管道深度阈值（米），深度门限只保留比它近的边缘
+            camera_intrinsics: 相机内参 [fx, fy, cx, cy]
+            visualize: track() 是否默认生成可视化图像；无头模式下设为 False，
+                       感知路径只输出数值结果，可视化由 render_visualization() 按需生成
+            camera_model: 标定得到的 CameraModel；提供时只对检测结果（直线端点与轴线点）去畸变，
+                          不对整幅图像做 remap；检测在原始像素上进行，track() 输出去畸变坐标
+            depth_sampler: 深度查询函数 (depth_frame, pixels(N,2)) -> 深度(米, NaN无效)，
+                           提供时为轴线点填入Z值；配合未对齐深度只投影这些像素
+            depth_scale: 深度图原始值到米的比例
+            depth_aligned: 深度图与输入图像是否同视角（主机端对齐到彩色，或红外流）；
+                           只有同视角时才按像素缩放深度做边缘门限与深度不连续边缘，
+                           未对齐的原始深度与彩色视场不同，逐像素对应会错位
+        """
         self.depth_threshold = depth_threshold
+        self.depth_scale = depth_scale
+        self.camera_model = camera_model
+        if camera_intrinsics is None and camera_model is not None:
+            camera_intrinsics = camera_model.intrinsics
         self.camera_intrinsics = camera_intrinsics
+        self.visualize = visualize
+        self.depth_sampler = depth_sampler
+        self.depth_aligned = depth_aligned
         self.logger = logging.getLogger(__name__)
         
         # 添加方向预测器
@@ -123,6 +240,20 @@ class PipeTracker:
         self.quadrant_failure_count = 0
         self.max_failures_before_switch = 3
         
+        # 最近一次检测的方法及部分视角结果（供可视化使用）
+        self.last_detection_method = None  # quadrant, partial, None
+        self.last_partial_result = None
+        self.last_partial_attempted = False  # 本帧是否运行了部分视角检测（耗时明显更长）
+        self.last_partial_skipped = False  # 本帧需要部分视角检测但被调用方禁止（帧调度降级）
+        
+        # 自适应边缘/直线检测参数
+        self.hough_controller = HoughThresholdController()
+        self.last_canny_thresholds = (PerceptionConfig.CANNY_LOW_THRESHOLD, PerceptionConfig.CANNY_HIGH_THRESHOLD)
+        self.last_depth_gate_coverage = None  # 最近一帧深度门限掩码覆盖率，None 表示未做门限
+        self.pyramid_level = 0  # 四象限检测前的降采样层数（每层 pyrDown 宽高减半），由质量调节器调整
+        gate_size = 2 * PerceptionConfig.PIPE_DEPTH_GATE_DILATE + 1
+        self._gate_kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (gate_size, gate_size))
+        
         # 预测统计
         self.prediction_stats = {
             'total_predictions': 0,
@@ -131,278 +262,187 @@ class PipeTracker:
             'prediction_accuracy': 0.0
         }
         
-    def track(self, color_frame: np.ndarray, depth_frame: np.ndarray) -> Tuple[Optional[List], Optional[np.ndarray], Optional[np.ndarray], Optional[dict]]:
+    def track(self, color_frame: np.ndarray, depth_frame: Optional[np.ndarray] = None,
+              visualize: Optional[bool] = None, allow_partial: bool = True) -> Tuple[Optional[List], Optional[np.ndarray], Optional[np.ndarray], Optional[dict]]:
         """
         追踪管道 - 自适应四象限分析 + 部分视角处理 + 方向预测
         
         Args:
-            color_frame: 彩色图像
-            depth_frame: 深度图像
+            color_frame: BGR 彩色图像，或单通道灰度图（RealSense 红外模式，与深度同视角）
+            depth_frame: 深度图像；None 时走纯RGB路径（USB相机），轴线点不带深度
+            visualize: 是否生成可视化图像，默认使用构造参数
+            allow_partial: 四象限检测失败时是否允许退回部分视角检测；
+                           帧调度预计超时时传 False，本帧直接返回检测失败
             
         Returns:
             line_params_list: 四个象限的直线参数列表 [[x1,y1,x2,y2], ...] 或 None
             global_axis: 拟合的全局管道轴线3D点
-            vis_image: 可视化图像
+            vis_image: 可视化图像（无头模式下为 None）
             prediction_info: 方向预测信息
         """
+        if visualize is None:
+            visualize = self.visualize
+        
         try:
-            # 创建可视化图像的副本
-            vis_image = color_frame.copy()
-            h, w = color_frame.shape[:2]
-            
-            # 1. 首先尝试四象限检测
-            if self.tracking_mode in ["auto", "full_quadrant"]:
-                line_params_list, global_axis, quadrant_success = self._try_quadrant_detection(
-                    color_frame, depth_frame, vis_image)
-                
-                if quadrant_success:
-                    # 四象限检测成功
-                    self.quadrant_failure_count = 0
-                    detected_count = len([p for p in line_params_list if p is not None])
-                    
-                    self.logger.debug(f"四象限检测成功，检测到{detected_count}个象限")
-                    
-                    # 执行方向预测
-                    prediction_info = self._perform_direction_prediction(
-                        global_axis, vis_image)
-                    
-                    return line_params_list, global_axis, vis_image, prediction_info
-                else:
-                    # 四象限检测失败
-                    self.quadrant_failure_count += 1
-                    self.logger.warning(f"四象限检测失败，失败次数: {self.quadrant_failure_count}")
-            
-            # 2. 如果四象限检测失败或模式设置为部分视角，尝试部分视角检测
-            if (self.tracking_mode in ["auto", "partial_view"] and 
-                (self.quadrant_failure_count >= self.max_failures_before_switch or 
-                 self.tracking_mode == "partial_view")):
-                
-                self.logger.info("切换到部分视角检测模式")
+            line_params_list, global_axis, prediction_info = self._detect(color_frame, depth_frame, allow_partial)
+        except Exception as e:
+            self.logger.error(f"管道追踪失败: {e}")
+            self.last_detection_method = None
+            line_params_list, global_axis, prediction_info = None, None, None
+        
+        vis_image = None
+        if visualize:
+            vis_image = self.render_visualization(color_frame, line_params_list, global_axis, prediction_info)
+        
+        return line_params_list, global_axis, vis_image, prediction_info
+    
+    def _detect(self, color_frame: np.ndarray, depth_frame: Optional[np.ndarray],
+                allow_partial: bool = True) -> Tuple[Optional[List], Optional[np.ndarray], Optional[dict]]:
+        """纯数值检测路径，不做任何绘制"""
+        self.last_detection_method = None
+        self.last_partial_result = None
+        self.last_partial_attempted = False
+        self.last_partial_skipped = False
+        
+        # 1. 首先尝试四象限检测
+        if self.tracking_mode in ["auto", "full_quadrant"]:
+            line_params_list, global_axis, quadrant_success = self._try_quadrant_detection(
+                color_frame, depth_frame)
+            
+            if quadrant_success:
+                # 四象限检测成功
+                self.quadrant_failure_count = 0
+                self.last_detection_method = "quadrant"
+                # 深度按原始像素查询（深度查询函数与投影器都以原始彩色像素为输入），之后再去畸变
+                global_axis = self._attach_axis_depth(global_axis, depth_frame)
+                line_params_list, global_axis = self._to_control_frame(line_params_list, global_axis)
                 
-                partial_result = self.partial_tracker.track_partial_pipe(color_frame, depth_frame)
+                # 执行方向预测
+                prediction_info = self._perform_direction_prediction(global_axis)
                 
-                if partial_result['success']:
-                    # 部分视角检测成功
-                    self.logger.info(f"部分视角检测成功，方法: {partial_result['tracking_method']}")
-                    
-                    # 转换为标准格式
-                    line_params_list = self._convert_partial_to_standard_format(partial_result)
-                    global_axis = self._estimate_axis_from_partial(partial_result)
-                    
-                    # 可视化部分视角结果
-                    vis_image = self.partial_tracker.visualize_result(vis_image, partial_result)
-                    
-                    # 执行方向预测
-                    prediction_info = self._perform_direction_prediction_from_partial(
-                        partial_result, vis_image)
-                    
-                    # 重置失败计数
-                    if self.tracking_mode == "auto":
-                        self.quadrant_failure_count = max(0, self.quadrant_failure_count - 1)
-                    
-                    return line_params_list, global_axis, vis_image, prediction_info
-            
-            # 3. 所有检测方法都失败
-            self.logger.warning("所有管道检测方法都失败")
-            
-            # 在图像上显示失败信息
-            cv2.putText(vis_image, "No pipe detected - trying multiple methods", 
-                       (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
-            cv2.putText(vis_image, f"Quadrant failures: {self.quadrant_failure_count}", 
-                       (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-            cv2.putText(vis_image, f"Current mode: {self.tracking_mode}", 
-                       (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
-            
-            return None, None, vis_image, None
+                return line_params_list, global_axis, prediction_info
+            else:
+                # 四象限检测失败
+                self.quadrant_failure_count += 1
+                self.logger.warning(f"四象限检测失败，失败次数: {self.quadrant_failure_count}")
+        
+        # 2. 如果四象限检测失败或模式设置为部分视角，尝试部分视角检测
+        if (self.tracking_mode in ["auto", "partial_view"] and 
+            (self.quadrant_failure_count >= self.max_failures_before_switch or 
+             self.tracking_mode == "partial_view")):
             
-        except Exception as e:
-            self.logger.error(f"管道追踪失败: {e}")
-            return None, None, color_frame.copy(), None
+            if not allow_partial:
+                self.last_partial_skipped = True
+                return None, None, None
             
-            # 3. 将图像分成四个象限
-            mid_x, mid_y = w // 2, h // 2
-            quadrants = [
-                ("Q1", edges[0:mid_y, mid_x:w]),        # 右上
-                ("Q2", edges[0:mid_y, 0:mid_x]),        # 左上  
-                ("Q3", edges[mid_y:h, 0:mid_x]),        # 左下
-                ("Q4", edges[mid_y:h, mid_x:w])         # 右下
-            ]
+            self.logger.info("切换到部分视角检测模式")
+            self.last_partial_attempted = True
             
-            # 4. 在每个象限中检测直线
-            line_params_list = []
-            quadrant_colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)]  # 不同颜色
+            partial_result = self.partial_tracker.track_partial_pipe(color_frame, depth_frame)
             
-            for i, (q_name, quad_edges) in enumerate(quadrants):
-                # 在象限中检测直线
-                lines = cv2.HoughLinesP(
-                    quad_edges,
-                    rho=1,
-                    theta=np.pi/180,
-                    threshold=50,  # 降低阈值，因为象限图像更小
-                    minLineLength=30,
-                    maxLineGap=20
-                )
+            if partial_result['success']:
+                # 部分视角检测成功
+                self.logger.info(f"部分视角检测成功，方法: {partial_result['tracking_method']}")
+                self.last_detection_method = "partial"
+                self.last_partial_result = partial_result
                 
-                best_line = None
-                max_length = 0
+                # 转换为标准格式
+                line_params_list, global_axis = self._to_control_frame(
+                    self._convert_partial_to_standard_format(partial_result),
+                    self._attach_axis_depth(self._estimate_axis_from_partial(partial_result), depth_frame))
                 
-                if lines is not None and len(lines) > 0:
-                    # 找到最长的直线
-                    for line in lines:
-                        x1, y1, x2, y2 = line[0]
-                        length = np.sqrt((x2-x1)**2 + (y2-y1)**2)
-                        if length > max_length:
-                            max_length = length
-                            best_line = line[0]
-                    
-                    if best_line is not None:
-                        # 将象限坐标转换回全图坐标
-                        x1, y1, x2, y2 = best_line
-                        if i == 0:  # Q1 (右上)
-                            x1, x2 = x1 + mid_x, x2 + mid_x
-                        elif i == 1:  # Q2 (左上)
-                            pass  # 坐标不变
-                        elif i == 2:  # Q3 (左下)
-                            y1, y2 = y1 + mid_y, y2 + mid_y
-                        elif i == 3:  # Q4 (右下)
-                            x1, x2 = x1 + mid_x, x2 + mid_x
-                            y1, y2 = y1 + mid_y, y2 + mid_y
-                        
-                        line_params_list.append([x1, y1, x2, y2])
-                        
-                        # 在可视化图像上绘制象限直线
-                        color = quadrant_colors[i]
-                        cv2.line(vis_image, (x1, y1), (x2, y2), color, 2)
-                        cv2.circle(vis_image, (x1, y1), 3, color, -1)
-                        cv2.circle(vis_image, (x2, y2), 3, color, -1)
-                        
-                        # 添加象限标签
-                        label_x = mid_x + (10 if i in [0, 3] else -50)
-                        label_y = (10 if i in [0, 1] else h - 10)
-                        cv2.putText(vis_image, f"{q_name}:L={max_length:.0f}", 
-                                   (label_x, label_y), cv2.FONT_HERSHEY_SIMPLEX, 0.4, color, 1)
-                        
-                        self.logger.debug(f"{q_name} 检测到直线: ({x1},{y1})-({x2},{y2}), 长度: {max_length:.1f}")
-                else:
-                    line_params_list.append(None)
-                    self.logger.debug(f"{q_name} 未检测到直线")
-            
-            # 5. 绘制象限分割线
-            cv2.line(vis_image, (mid_x, 0), (mid_x, h), (255, 255, 255), 1)  # 垂直线
-            cv2.line(vis_image, (0, mid_y), (w, mid_y), (255, 255, 255), 1)  # 水平线
-            
-            # 6. 计算管道中心轴线
-            valid_lines = [line for line in line_params_list if line is not None]
-            global_axis = None
-            
-            if len(valid_lines) >= 2:  # 至少需要2个象限有检测结果
-                try:
-                    # 计算所有有效直线的中点
-                    center_points = []
-                    for line in valid_lines:
-                        x1, y1, x2, y2 = line
-                        center_x = (x1 + x2) / 2
-                        center_y = (y1 + y2) / 2
-                        center_points.append([center_x, center_y])
+                # 执行方向预测
+                prediction_info = self._perform_direction_prediction_from_partial(partial_result)
+                
+                # 重置失败计数
+                if self.tracking_mode == "auto":
+                    self.quadrant_failure_count = max(0, self.quadrant_failure_count - 1)
+                
+                return line_params_list, global_axis, prediction_info
+        
+        # 3. 所有检测方法都失败
+        self.logger.warning("所有管道检测方法都失败")
+        return None, None, None
+    
+    def render_visualization(self, color_frame: np.ndarray, line_params_list: Optional[List],
+                             global_axis: Optional[np.ndarray], prediction_info: Optional[dict]) -> np.ndarray:
+        """
+        根据 track() 的数值结果生成可视化图像
+        
+        与检测路径完全分离，可由显示/Web等消费者按较低频率调用。
+        track() 输出的是去畸变坐标，绘制前映射回原始图像像素。
+        
+        Returns:
+            绘制了检测结果的图像副本
+        """
+        if color_frame.ndim == 2:
+            vis_image = cv2.cvtColor(color_frame, cv2.COLOR_GRAY2BGR)  # 红外灰度图上彩色绘制
+        else:
+            vis_image = color_frame.copy()
+        h, w = vis_image.shape[:2]
+        
+        try:
+            line_params_list, global_axis = self._to_image_frame(line_params_list, global_axis)
+            if self.last_detection_method == "quadrant":
+                mid_x, mid_y = w // 2, h // 2
+                
+                # 四象限直线
+                for i, line in enumerate(line_params_list or []):
+                    if line is None:
+                        continue
+                    x1, y1, x2, y2 = (int(v) for v in line)
+                    color = self.QUADRANT_COLORS[i % 4]
+                    cv2.line(vis_image, (x1, y1), (x2, y2), color, 2)
+                    cv2.circle(vis_image, (x1, y1), 3, color, -1)
+                    cv2.circle(vis_image, (x2, y2), 3, color, -1)
+                
+                # 象限分割线
+                cv2.line(vis_image, (mid_x, 0), (mid_x, h), (255, 255, 255), 1)
+                cv2.line(vis_image, (0, mid_y), (w, mid_y), (255, 255, 255), 1)
+                
+                # 拟合轴线
+                if global_axis is not None and len(global_axis) > 1:
+                    pts = np.asarray(global_axis)[:, :2].astype(np.int32).reshape(-1, 1, 2)
+                    cv2.polylines(vis_image, [pts], False, (0, 255, 255), 2)
+                
+                detected_count = len([p for p in line_params_list if p is not None])
+                cv2.putText(vis_image, f"Quadrants: {detected_count}/4", 
+                           (10, h-20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
+                
+                if prediction_info and global_axis is not None and len(global_axis) > 0:
+                    center_point = np.mean(global_axis, axis=0)[:2]
+                    vis_image = self._add_prediction_visualization(vis_image, prediction_info, center_point)
                     
-                    center_points = np.array(center_points)
+            elif self.last_detection_method == "partial" and self.last_partial_result:
+                vis_image = self.partial_tracker.visualize_result(vis_image, self.last_partial_result)
+                center_point = self.last_partial_result.get('estimated_center')
+                if prediction_info and center_point is not None:
+                    vis_image = self._add_prediction_visualization(vis_image, prediction_info, center_point)
                     
-                    # 使用最小二乘法拟合中心轴线
-                    if len(center_points) >= 2:
-                        # 拟合直线 y = ax + b
-                        A = np.vstack([center_points[:, 0], np.ones(len(center_points))]).T
-                        a, b = np.linalg.lstsq(A, center_points[:, 1], rcond=None)[0]
-                        
-                        # 生成轴线上的点
-                        x_line = np.linspace(0, w, 100)
-                        y_line = a * x_line + b
-                        
-                        # 过滤在图像范围内的点
-                        valid_mask = (y_line >= 0) & (y_line < h)
-                        x_line = x_line[valid_mask]
-                        y_line = y_line[valid_mask]
-                        
-                        if len(x_line) > 0:
-                            global_axis = np.column_stack([x_line, y_line])
-                            
-                            # 绘制拟合的中心轴线
-                            for i in range(len(x_line)-1):
-                                pt1 = (int(x_line[i]), int(y_line[i]))
-                                pt2 = (int(x_line[i+1]), int(y_line[i+1]))
-                                cv2.line(vis_image, pt1, pt2, (0, 255, 255), 2)  # 黄色轴线
-                            
-                            # 绘制中心点
-                            for point in center_points:
-                                cv2.circle(vis_image, (int(point[0]), int(point[1])), 4, (255, 0, 255), -1)
-                            
-                            cv2.putText(vis_image, f"Pipe Axis: {len(valid_lines)} quadrants", 
-                                       (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 255), 2)
-                            
-                            self.logger.debug(f"成功拟合管道轴线，使用{len(valid_lines)}个象限的数据")
-                        
-                except Exception as e:
-                    self.logger.warning(f"轴线拟合失败: {e}")
-            
-            # 7. 显示检测状态
-            detected_count = len(valid_lines)
-            status_text = f"Quadrants: {detected_count}/4"
-            status_color = (0, 255, 0) if detected_count >= 2 else (0, 0, 255)
-            cv2.putText(vis_image, status_text, (10, h-20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, status_color, 2)
-            
-            if detected_count == 0:
-                cv2.putText(vis_image, "No pipe detected in any quadrant", 
-                           (10, 50), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
-            
-            # 8. 可选：显示边缘检测结果
+            else:
+                # 在图像上显示失败信息
+                cv2.putText(vis_image, "No pipe detected - trying multiple methods", 
+                           (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
+                cv2.putText(vis_image, f"Quadrant failures: {self.quadrant_failure_count}", 
+                           (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
+                cv2.putText(vis_image, f"Current mode: {self.tracking_mode}", 
+                           (10, 90), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+            
+            # 可选：叠加边缘检测结果
             try:
                 verbose_mode = RunModeConfig.VERBOSE_OUTPUT
             except (AttributeError, NameError):
                 verbose_mode = False
                 
             if verbose_mode:
-                # 将边缘检测结果叠加到可视化图像上
-                edges_colored = cv2.cvtColor(edges, cv2.COLOR_GRAY2BGR)
+                gray = to_gray(color_frame)
+                edges_colored = cv2.cvtColor(cv2.Canny(gray, *self.last_canny_thresholds), cv2.COLOR_GRAY2BGR)
                 vis_image = cv2.addWeighted(vis_image, 0.7, edges_colored, 0.3, 0)
-            
-            # 9. 方向预测处理
-            prediction_info = None
-            if detected_count >= 2 and global_axis is not None and len(global_axis) > 0:
-                try:
-                    # 计算管道中心点（轴线的中心）
-                    center_point = np.mean(global_axis, axis=0)[:2]  # 取x,y坐标
-                    
-                    # 计算管道角度（基于轴线的主方向）
-                    if len(global_axis) >= 2:
-                        axis_vector = global_axis[-1][:2] - global_axis[0][:2]
-                        angle = np.degrees(np.arctan2(axis_vector[1], axis_vector[0]))
-                    else:
-                        angle = 0.0
-                    
-                    # 更新方向预测器
-                    self.direction_predictor.add_frame_data(
-                        center_point=tuple(center_point),
-                        direction_vector=[angle, 0],  # 转换为方向向量
-                        timestamp=time.time()
-                    )
-                    
-                    # 获取方向预测
-                    prediction = self.direction_predictor.predict_direction()
-                    prediction_info = prediction
-                    
-                    # 更新统计信息
-                    self._update_prediction_stats(prediction)
-                    
-                    # 在可视化图像上添加预测信息
-                    vis_image = self._add_prediction_visualization(vis_image, prediction, center_point)
-                    
-                except Exception as e:
-                    self.logger.warning(f"方向预测处理失败: {e}")
-            
-            return line_params_list, global_axis, vis_image, prediction_info
-            
+                
         except Exception as e:
-            self.logger.error(f"管道追踪失败: {e}")
-            return None, None, color_frame.copy(), None
+            self.logger.warning(f"追踪可视化失败: {e}")
+        
+        return vis_image
     
     def _update_prediction_stats(self, prediction: dict):
         """更新预测统计信息"""
@@ -485,21 +525,98 @@ class PipeTracker:
         """获取预测统计信息"""
         return self.prediction_stats.copy()
     
-    def _try_quadrant_detection(self, color_frame: np.ndarray, depth_frame: np.ndarray, 
-                               vis_image: np.ndarray) -> Tuple[Optional[List], Optional[np.ndarray], bool]:
+    def get_edge_params(self) -> dict:
+        """当前 Canny 阈值与各象限霍夫阈值/候选线段数"""
+        state = self.hough_controller.get_state()
+        return {
+            'canny_thresholds': list(self.last_canny_thresholds),
+            'hough_thresholds': state['thresholds'],
+            'hough_segment_counts': state['segment_counts'],
+            'depth_gate_coverage': self.last_depth_gate_coverage,
+            'pyramid_level': self.pyramid_level,
+        }
+    
+    def _depth_gate_mask(self, depth_frame: np.ndarray, size: Tuple[int, int]) -> Optional[np.ndarray]:
+        """
+        管道深度带 [PIPE_MIN_DEPTH, depth_threshold] 的掩码，缩放到彩色图尺寸
+        
+        掩码在深度图分辨率上计算并膨胀后再放大（降采样深度只处理1/4像素），
+        要求深度与图像同视角（depth_aligned），分辨率不同只是降采样所致。
+        覆盖率过低（深度缺失、管道超出量程）时返回 None，退回不做门限。
+        """
+        raw_min = PerceptionConfig.PIPE_MIN_DEPTH / self.depth_scale
+        raw_max = self.depth_threshold / self.depth_scale
+        mask = ((depth_frame >= raw_min) & (depth_frame <= raw_max)).astype(np.uint8) * 255
+        
+        coverage = cv2.countNonZero(mask) / float(mask.size)
+        self.last_depth_gate_coverage = coverage
+        if coverage < PerceptionConfig.PIPE_DEPTH_GATE_MIN_COVERAGE:
+            return None
+        
+        # 膨胀半径按彩色图像素定义，换算到深度图分辨率
+        scale = depth_frame.shape[1] / float(size[0])
+        kernel = self._gate_kernel
+        if scale != 1.0:
+            k = max(1, int(round(PerceptionConfig.PIPE_DEPTH_GATE_DILATE * scale))) * 2 + 1
+            kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (k, k))
+        mask = cv2.dilate(mask, kernel)
+        if mask.shape[:2] != (size[1], size[0]):
+            mask = cv2.resize(mask, size, interpolation=cv2.INTER_NEAREST)
+        return mask
+    
+    def _depth_discontinuity_edges(self, depth_frame: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+        """深度 Sobel 梯度超过阈值处的边缘（管道轮廓与背景的深度跳变），无效深度邻域不计"""
+        depth = depth_frame.astype(np.float32)
+        gx = cv2.Sobel(depth, cv2.CV_32F, 1, 0, ksize=3)
+        gy = cv2.Sobel(depth, cv2.CV_32F, 0, 1, ksize=3)
+        # 3x3 Sobel 响应约为相邻像素差的8倍，换算为 原始单位/像素 后与毫米阈值比较
+        threshold = PerceptionConfig.PIPE_DEPTH_EDGE_THRESHOLD * 0.001 / self.depth_scale * 8.0
+        edges = (gx * gx + gy * gy > threshold * threshold)
+        valid = cv2.erode((depth_frame > 0).astype(np.uint8), np.ones((3, 3), np.uint8)) > 0
+        edges = (edges & valid).astype(np.uint8) * 255
+        if edges.shape[:2] != (size[1], size[0]):
+            edges = cv2.resize(edges, size, interpolation=cv2.INTER_NEAREST)
+        return edges
+    
+    def _edge_map(self, gray: np.ndarray, depth_frame: Optional[np.ndarray]) -> np.ndarray:
+        """
+        霍夫变换的输入边缘图：彩色 Canny 边缘（可叠加深度不连续边缘），再按管道深度带门限
+        
+        深度只在与图像同视角（depth_aligned）时参与，未对齐时只用彩色边缘。
+        """
+        self.last_canny_thresholds = canny_thresholds(gray)
+        edges = cv2.Canny(gray, *self.last_canny_thresholds, apertureSize=3)
+        self.last_depth_gate_coverage = None
+        if depth_frame is None or not self.depth_aligned:
+            return edges
+        
+        size = (gray.shape[1], gray.shape[0])
+        if PerceptionConfig.PIPE_DEPTH_EDGES_ENABLED:
+            edges = cv2.bitwise_or(edges, self._depth_discontinuity_edges(depth_frame, size))
+        if PerceptionConfig.PIPE_DEPTH_GATE_ENABLED:
+            gate = self._depth_gate_mask(depth_frame, size)
+            if gate is not None:
+                edges = cv2.bitwise_and(edges, gate)
+        return edges
+    
+    def _try_quadrant_detection(self, color_frame: np.ndarray, 
+                               depth_frame: Optional[np.ndarray]) -> Tuple[Optional[List], Optional[np.ndarray], bool]:
         """
-        尝试四象限检测方法
+        尝试四象限检测方法（纯数值，不绘制）
         
         Returns:
             line_params_list, global_axis, success
         """
         try:
-            # 1. 图像预处理
-            gray = cv2.cvtColor(color_frame, cv2.COLOR_BGR2GRAY)
-            h, w = color_frame.shape[:2]
+            # 1. 图像预处理（按金字塔层数降采样，直线端点最后换算回原图坐标）
+            gray = to_gray(color_frame)
+            for _ in range(self.pyramid_level):
+                gray = cv2.pyrDown(gray)
+            factor = 1 << self.pyramid_level
+            h, w = gray.shape[:2]
             
-            # 2. 边缘检测
-            edges = cv2.Canny(gray, 50, 150, apertureSize=3)
+            # 2. 边缘检测（阈值随画面亮度自适应，有深度时只保留管道深度带内的边缘）
+            edges = self._edge_map(gray, depth_frame)
             
             # 3. 四象限分析（原有代码逻辑）
             mid_x, mid_y = w // 2, h // 2
@@ -512,32 +629,29 @@ class PipeTracker:
             
             line_params_list = []
             valid_lines = []
-            quadrant_colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)]
             
+            min_line_length = PerceptionConfig.HOUGH_MIN_LINE_LENGTH / factor
             for i, (q_name, quad_edges) in enumerate(quadrants):
-                # 在象限中检测直线
+                # 在象限中检测直线，累加器阈值由反馈控制器按候选线段数调节
                 lines = cv2.HoughLinesP(
                     quad_edges,
-                    rho=1,
-                    theta=np.pi/180,
-                    threshold=50,
-                    minLineLength=30,
-                    maxLineGap=20
+                    rho=PerceptionConfig.HOUGH_RHO,
+                    theta=PerceptionConfig.HOUGH_THETA,
+                    threshold=self.hough_controller.threshold(i),
+                    minLineLength=min_line_length,
+                    maxLineGap=PerceptionConfig.HOUGH_MAX_LINE_GAP / factor
                 )
+                self.hough_controller.update(i, 0 if lines is None else len(lines))
                 
                 if lines is not None and len(lines) > 0:
-                    # 找到最长的直线
-                    best_line = None
-                    max_length = 0
-                    
-                    for line in lines:
-                        x1, y1, x2, y2 = line[0]
-                        length = np.sqrt((x2-x1)**2 + (y2-y1)**2)
-                        if length > max_length:
-                            max_length = length
-                            best_line = line[0]
+                    # 找到最长的直线（向量化，线段多时也不在Python里逐条循环）
+                    segments = lines[:, 0, :]
+                    lengths = np.hypot(segments[:, 2] - segments[:, 0], segments[:, 3] - segments[:, 1])
+                    best = int(np.argmax(lengths))
+                    max_length = lengths[best]
+                    best_line = segments[best]
                     
-                    if best_line is not None and max_length > 30:
+                    if max_length > min_line_length:
                         # 转换坐标到全图
                         x1, y1, x2, y2 = best_line
                         if i == 0:  # Q1 右上
@@ -550,14 +664,11 @@ class PipeTracker:
                             x1, x2 = x1 + mid_x, x2 + mid_x
                             y1, y2 = y1 + mid_y, y2 + mid_y
                         
-                        line_params_list.append([x1, y1, x2, y2])
-                        valid_lines.append([x1, y1, x2, y2])
-                        
-                        # 可视化
-                        color = quadrant_colors[i]
-                        cv2.line(vis_image, (x1, y1), (x2, y2), color, 2)
-                        cv2.circle(vis_image, (x1, y1), 3, color, -1)
-                        cv2.circle(vis_image, (x2, y2), 3, color, -1)
+                        line = [x1 * factor, y1 * factor, x2 * factor, y2 * factor]
+                        line_params_list.append(line)
+                        valid_lines.append(line)
+                    else:
+                        line_params_list.append(None)
                 else:
                     line_params_list.append(None)
             
@@ -567,21 +678,8 @@ class PipeTracker:
             if detected_count >= 2:
                 # 尝试拟合轴线
                 global_axis = self._fit_global_axis(valid_lines)
-                
-                # 在可视化图像上绘制轴线
-                if global_axis is not None and len(global_axis) > 1:
-                    for i in range(len(global_axis)-1):
-                        pt1 = (int(global_axis[i][0]), int(global_axis[i][1]))
-                        pt2 = (int(global_axis[i+1][0]), int(global_axis[i+1][1]))
-                        cv2.line(vis_image, pt1, pt2, (0, 255, 255), 2)
-                
-                cv2.putText(vis_image, f"Quadrants: {detected_count}/4", 
-                           (10, h-20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 255, 0), 2)
-                
                 return line_params_list, global_axis, True
             else:
-                cv2.putText(vis_image, "Insufficient quadrant detection", 
-                           (10, h-20), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
                 return line_params_list, None, False
                 
         except Exception as e:
@@ -628,6 +726,43 @@ class PipeTracker:
             
         return None
     
+    def _to_control_frame(self, line_params_list: Optional[List],
+                          global_axis: Optional[np.ndarray]) -> Tuple[Optional[List], Optional[np.ndarray]]:
+        """原始像素 -> 去畸变坐标（四象限与部分视角结果都经此输出，控制端只见到同一坐标系）"""
+        if self.camera_model is None or not self.camera_model.has_distortion:
+            return line_params_list, global_axis
+        if line_params_list:
+            line_params_list = self.camera_model.undistort_lines(line_params_list)
+        if global_axis is not None and len(global_axis) > 0:
+            global_axis = np.array(global_axis, dtype=np.float64)
+            global_axis[:, :2] = self.camera_model.undistort_points(global_axis[:, :2])
+        return line_params_list, global_axis
+    
+    def _to_image_frame(self, line_params_list: Optional[List],
+                        global_axis: Optional[np.ndarray]) -> Tuple[Optional[List], Optional[np.ndarray]]:
+        """去畸变坐标 -> 原始像素（在原始图像上绘制）"""
+        if self.camera_model is None or not self.camera_model.has_distortion:
+            return line_params_list, global_axis
+        if line_params_list:
+            line_params_list = self.camera_model.distort_lines(line_params_list)
+        if global_axis is not None and len(global_axis) > 0:
+            global_axis = np.array(global_axis, dtype=np.float64)
+            global_axis[:, :2] = self.camera_model.distort_points(global_axis[:, :2])
+        return line_params_list, global_axis
+    
+    def _attach_axis_depth(self, global_axis: Optional[np.ndarray],
+                           depth_frame: Optional[np.ndarray]) -> Optional[np.ndarray]:
+        """只在轴线点处查询深度并填入Z列（米），无有效深度处保持0；轴线须为原始（未去畸变）像素"""
+        if self.depth_sampler is None or global_axis is None or depth_frame is None:
+            return global_axis
+        try:
+            depths = self.depth_sampler(depth_frame, global_axis[:, :2])
+            global_axis = global_axis.astype(np.float64)
+            global_axis[:, 2] = np.nan_to_num(depths, nan=0.0)
+        except Exception as e:
+            self.logger.warning(f"轴线深度查询失败: {e}")
+        return global_axis
+    
     def _convert_partial_to_standard_format(self, partial_result: Dict) -> List:
         """将部分视角结果转换为标准格式"""
         line_params_list = [None, None, None, None]  # 四个象限
@@ -662,8 +797,7 @@ class PipeTracker:
             self.logger.warning(f"轴线估算失败: {e}")
             return None
     
-    def _perform_direction_prediction(self, global_axis: Optional[np.ndarray], 
-                                    vis_image: np.ndarray) -> Optional[dict]:
+    def _perform_direction_prediction(self, global_axis: Optional[np.ndarray]) -> Optional[dict]:
         """执行方向预测（四象限模式）"""
         prediction_info = None
         
@@ -693,16 +827,12 @@ class PipeTracker:
                 # 更新统计信息
                 self._update_prediction_stats(prediction)
                 
-                # 在可视化图像上添加预测信息
-                vis_image = self._add_prediction_visualization(vis_image, prediction, center_point)
-                
         except Exception as e:
             self.logger.warning(f"方向预测处理失败: {e}")
             
         return prediction_info
     
-    def _perform_direction_prediction_from_partial(self, partial_result: Dict, 
-                                                 vis_image: np.ndarray) -> Optional[dict]:
+    def _perform_direction_prediction_from_partial(self, partial_result: Dict) -> Optional[dict]:
         """执行方向预测（部分视角模式）"""
         prediction_info = None
         
@@ -725,10 +855,6 @@ class PipeTracker:
                 # 更新统计信息
                 self._update_prediction_stats(prediction)
                 
-                # 添加预测可视化（如果部分追踪器没有添加的话）
-                if 'prediction' not in str(type(vis_image)):
-                    vis_image = self._add_prediction_visualization(vis_image, prediction, center_point)
-                
         except Exception as e:
             self.logger.warning(f"部分视角方向预测失败: {e}")
             
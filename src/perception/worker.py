@@ -0,0 +1,745 @@
+"""
+感知工作进程 - 感知在独立进程中运行，帧与结果经共享内存传递
+Perception worker processes with shared-memory frames and results
+
+每个工作进程独占一台相机及其 PipeTracker / ObstacleDetector，
+把紧凑的定长结果记录写入共享内存；主进程只读结果并做融合与控制，
+增加相机时负载分摊到多个核上，而不是在一个进程里摊薄帧率。
+
+单相机时可用 PerceptionWorker：相机仍在主进程，帧经共享内存帧缓冲交给感知进程。
+"""
+
+import time
+import logging
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    from utils.results import THREAT_LEVELS, ObstacleAnalysis, TrackingResult, line_coords
+except ImportError:
+    from ..utils.results import THREAT_LEVELS, ObstacleAnalysis, TrackingResult, line_coords
+
+try:
+    from config import CameraConfig
+except ImportError:
+    class CameraConfig:
+        MULTI_CAMERAS = [
+            {"name": "front", "serial": None, "role": "forward"},
+            {"name": "rear", "serial": None, "role": "rear"},
+        ]
+        MULTI_CAMERA_MAX_RESULT_AGE = 0.3
+
+logger = logging.getLogger(__name__)
+
+# 只有该角色的相机参与管道追踪与前进避障门控
+FORWARD_ROLE = "forward"
+
+# 单帧结果记录（定长，约200字节）
+RESULT_DTYPE = np.dtype([
+    ('sequence', np.int64),          # 写入次数，0 表示尚无结果
+    ('frame_number', np.int64),
+    ('capture_time', np.float64),    # 曝光时刻（秒）
+    ('process_ms', np.float32),      # 感知耗时
+    ('lines', np.float32, (4, 4)),   # 四象限直线 [x1, y1, x2, y2]，缺失为 NaN
+    ('axis', np.float32, (2, 3)),    # 轴线首尾点 (x, y, z)，转向控制只用首尾点
+    ('axis_valid', np.bool_),
+    ('has_obstacle_analysis', np.bool_),
+    ('threat_level', np.int8),       # THREAT_LEVELS 序号
+    ('min_distance', np.float32),    # mm，无障碍为 inf
+    ('total_obstacle_pixels', np.int32),
+    ('center_obstacle_pixels', np.int32),
+    ('obstacle_density', np.float32),
+    ('center_obstacle_density', np.float32),
+    ('camera_lost', np.bool_),       # 相机已判定丢失、正在重连，本记录不含感知结果
+])
+
+
+def pack_result(record: np.ndarray, tracking: TrackingResult, obstacle_analysis: Optional[ObstacleAnalysis],
+                process_ms: float):
+    """把追踪与避障结果写入一条 RESULT_DTYPE 记录（不修改 sequence）；不是4个值的直线条目记为缺失"""
+    lines = np.full((4, 4), np.nan, dtype=np.float32)
+    for i, line in enumerate((tracking.line_params or [])[:4]):
+        coords = line_coords(line)
+        if coords is not None:
+            lines[i] = coords
+    record['lines'] = lines
+
+    if tracking.global_axis is not None and len(tracking.global_axis) >= 2:
+        axis = np.asarray(tracking.global_axis, dtype=np.float32)
+        record['axis'] = axis[[0, -1], :3]
+        record['axis_valid'] = True
+    else:
+        record['axis'] = np.nan
+        record['axis_valid'] = False
+
+    if obstacle_analysis is not None:
+        record['has_obstacle_analysis'] = True
+        record['threat_level'] = obstacle_analysis.severity
+        record['min_distance'] = obstacle_analysis.min_distance
+        record['total_obstacle_pixels'] = obstacle_analysis.total_obstacle_pixels
+        record['center_obstacle_pixels'] = obstacle_analysis.center_obstacle_pixels
+        record['obstacle_density'] = obstacle_analysis.obstacle_density
+        record['center_obstacle_density'] = obstacle_analysis.center_obstacle_density
+    else:
+        record['has_obstacle_analysis'] = False
+
+    record['frame_number'] = tracking.frame_number
+    record['capture_time'] = tracking.capture_time if tracking.capture_time is not None else time.time()
+    record['process_ms'] = process_ms
+    record['camera_lost'] = False
+
+
+def unpack_result(record: np.ndarray) -> Optional[dict]:
+    """
+    把一条记录还原为结果对象，尚无结果时返回 None
+
+    Returns:
+        {'sequence', 'process_ms', 'camera_lost', 'tracking': TrackingResult,
+         'obstacle_analysis': ObstacleAnalysis 或 None}
+    """
+    if int(record['sequence']) == 0:
+        return None
+
+    line_params = [None if np.isnan(line[0]) else [float(v) for v in line] for line in record['lines']]
+    tracking = TrackingResult(
+        line_params=line_params if any(line is not None for line in line_params) else None,
+        global_axis=np.array(record['axis'], dtype=np.float64) if record['axis_valid'] else None,
+        frame_number=int(record['frame_number']),
+        capture_time=float(record['capture_time'])
+    )
+
+    obstacle_analysis = None
+    if record['has_obstacle_analysis']:
+        obstacle_analysis = ObstacleAnalysis(
+            threat_level=THREAT_LEVELS[int(record['threat_level'])],
+            min_distance=float(record['min_distance']),
+            total_obstacle_pixels=int(record['total_obstacle_pixels']),
+            center_obstacle_pixels=int(record['center_obstacle_pixels']),
+            obstacle_density=float(record['obstacle_density']),
+            center_obstacle_density=float(record['center_obstacle_density'])
+        )
+
+    return {
+        'sequence': int(record['sequence']),
+        'process_ms': float(record['process_ms']),
+        'camera_lost': bool(record['camera_lost']),
+        'tracking': tracking,
+        'obstacle_analysis': obstacle_analysis,
+    }
+
+
+class SharedResultSlot:
+    """共享内存中的单条结果记录，进程间用锁保证读写完整"""
+
+    def __init__(self, shm: shared_memory.SharedMemory, lock, owner: bool):
+        self.shm = shm
+        self.lock = lock
+        self.owner = owner
+        self.record = np.ndarray((), dtype=RESULT_DTYPE, buffer=shm.buf)
+
+    @classmethod
+    def create(cls, ctx=None) -> 'SharedResultSlot':
+        """在主进程中创建结果槽位"""
+        ctx = ctx or mp.get_context()
+        shm = shared_memory.SharedMemory(create=True, size=RESULT_DTYPE.itemsize)
+        slot = cls(shm, ctx.Lock(), owner=True)
+        slot.record['sequence'] = 0
+        return slot
+
+    @classmethod
+    def attach(cls, name: str, lock) -> 'SharedResultSlot':
+        """在工作进程中按名字连接到已有槽位"""
+        return cls(shared_memory.SharedMemory(name=name), lock, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def write(self, tracking: TrackingResult, obstacle_analysis: Optional[ObstacleAnalysis], process_ms: float):
+        """写入一帧结果"""
+        with self.lock:
+            pack_result(self.record, tracking, obstacle_analysis, process_ms)
+            self.record['sequence'] += 1
+
+    def mark_lost(self):
+        """相机丢失：写入不含感知结果的丢失记录，主进程不再融合该相机丢失前的最后结果"""
+        with self.lock:
+            pack_result(self.record, TrackingResult(), None, 0.0)
+            self.record['camera_lost'] = True
+            self.record['sequence'] += 1
+
+    def read(self) -> Optional[dict]:
+        """读取最新结果（拷贝后解包，不长时间持锁）"""
+        with self.lock:
+            snapshot = self.record.copy()
+        return unpack_result(snapshot)
+
+    def close(self):
+        """断开共享内存；创建者同时释放"""
+        self.record = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def _perceive(detector, tracker, color_frame, depth_frame, frame_info: Optional[dict] = None):
+    """单帧感知：避障检测 + 管道追踪，返回 (TrackingResult, ObstacleAnalysis 或 None, 耗时ms)"""
+    start = time.perf_counter()
+    obstacle_analysis = None
+    if depth_frame is not None:
+        mask = detector.detect(depth_frame)
+        obstacle_analysis = detector.analyze_obstacle_threat(depth_frame, mask)
+    line_params, global_axis, _, prediction_info = tracker.track(color_frame, depth_frame, visualize=False)
+    tracking = TrackingResult(line_params, global_axis, prediction_info,
+                              frame_info['frame_number'] if frame_info else -1,
+                              frame_info['capture_time'] if frame_info else None)
+    return tracking, obstacle_analysis, (time.perf_counter() - start) * 1000.0
+
+
+def run_camera_worker(camera_spec: dict, slot_name: str, lock, stop_event,
+                      detector_kwargs: Optional[dict] = None, tracker_kwargs: Optional[dict] = None):
+    """
+    相机工作进程入口：独占一台相机，循环执行避障检测与管道追踪并写入共享内存
+
+    Args:
+        camera_spec: create_camera() 的相机描述
+        slot_name: 结果槽位共享内存名
+        lock: 槽位锁
+        stop_event: 停止事件
+        detector_kwargs: ObstacleDetector 参数
+        tracker_kwargs: PipeTracker 额外参数
+    """
+    try:
+        from camera.capture import create_camera
+        from camera.watchdog import CameraWatchdog
+    except ImportError:
+        from ..camera.capture import create_camera
+        from ..camera.watchdog import CameraWatchdog
+    from .pipe_tracking import PipeTracker
+    from .obstacle_detection import ObstacleDetector
+
+    name = camera_spec.get('name', camera_spec.get('serial', 'camera'))
+    slot = SharedResultSlot.attach(slot_name, lock)
+    watchdog = None
+    try:
+        camera = create_camera(camera_spec)
+        tracker = PipeTracker(visualize=False, depth_sampler=getattr(camera, 'sample_depth', None),
+                              depth_aligned=getattr(camera, 'align_depth', False), **(tracker_kwargs or {}))
+        detector = ObstacleDetector(**(detector_kwargs or {}))
+
+        def on_restored(new_camera):
+            tracker.depth_sampler = getattr(new_camera, 'sample_depth', None)
+            tracker.depth_aligned = getattr(new_camera, 'align_depth', False)
+
+        # 相机断开时在本进程内后台重建，不必由主进程重启工作进程；重建期间槽位为丢失记录
+        watchdog = CameraWatchdog(camera, lambda: create_camera(camera_spec),
+                                  on_lost=slot.mark_lost, on_restored=on_restored)
+
+        while not stop_event.is_set():
+            if watchdog.is_reconnecting():
+                watchdog.wait_for_camera(timeout=0.5)
+                continue
+            camera = watchdog.camera
+            color_frame, depth_frame = camera.get_frames()
+            if color_frame is None:
+                delay = watchdog.frame_failed()
+                if delay > 0:
+                    stop_event.wait(delay)
+                continue
+            watchdog.frame_ok()
+
+            try:
+                slot.write(*_perceive(detector, tracker, color_frame, depth_frame, camera.get_frame_info()))
+            except Exception as e:
+                # 单帧失败不退出进程；槽位保留上一结果，持续失败时由主进程按过期处理
+                logger.warning(f"相机工作进程 {name} 单帧感知失败: {e}")
+    except Exception as e:
+        logger.error(f"相机工作进程 {name} 异常退出: {e}")
+    finally:
+        if watchdog is not None:
+            watchdog.stop()
+            if not watchdog.is_reconnecting():
+                watchdog.camera.stop()
+        slot.close()
+
+
+def camera_role(name: str, primary: Optional[str] = None, roles: Optional[Dict[str, str]] = None) -> str:
+    """相机朝向角色：主相机总是前向，未配置角色的其他相机按非前向处理"""
+    if name == primary:
+        return FORWARD_ROLE
+    return (roles or {}).get(name) or "rear"
+
+
+def fuse_results(results: Dict[str, Optional[dict]], primary: Optional[str] = None,
+                 roles: Optional[Dict[str, str]] = None, max_age: Optional[float] = None,
+                 now: Optional[float] = None) -> dict:
+    """
+    融合多台相机的结果
+
+    - 过期：曝光时刻早于 now - max_age 的结果（工作进程卡死后残留的最后一帧）与相机丢失记录不参与融合
+    - 障碍物：只有前向相机的威胁参与前进门控，取其中最高威胁等级，最近距离取最小值；
+      非前向相机（如后向）的结果单独放在 other_threats 中，不阻止前进
+    - 管道追踪：只用前向相机的轴线，主相机优先；前向相机都没有新鲜结果时为无轴线的空结果，
+      不退回非前向相机的轴线（图像坐标系与运动方向都不同）
+
+    Args:
+        results: 各相机最新结果（read_results() 的返回值）
+        primary: 主相机（前向）名称
+        roles: 相机名 -> 角色（"forward" / "rear" 等），默认 CameraConfig.MULTI_CAMERAS 中的 role
+        max_age: 结果最大年龄（秒），默认 CameraConfig.MULTI_CAMERA_MAX_RESULT_AGE
+        now: 当前时刻（time.time 时钟），测试时可注入
+
+    Returns:
+        {'tracking', 'obstacle_analysis', 'tracking_source', 'threat_source', 'other_threats', 'stale', 'lost'}，
+        无前向结果时 tracking_source 为 None
+    """
+    if roles is None:
+        roles = {cam['name']: cam.get('role') for cam in CameraConfig.MULTI_CAMERAS}
+    max_age = max_age if max_age is not None else CameraConfig.MULTI_CAMERA_MAX_RESULT_AGE
+    now = now if now is not None else time.time()
+
+    available = {}
+    stale = []
+    lost = []
+    for name, result in results.items():
+        if result is None:
+            continue
+        if result['camera_lost']:
+            lost.append(name)
+            continue
+        capture_time = result['tracking'].capture_time
+        if capture_time is None or now - capture_time > max_age:
+            stale.append(name)
+            continue
+        available[name] = result
+    forward = [name for name in available if camera_role(name, primary, roles) == FORWARD_ROLE]
+
+    # 障碍物融合：只有前向相机门控前进
+    obstacle_analysis = None
+    threat_source = None
+    for name in forward:
+        analysis = available[name]['obstacle_analysis']
+        if analysis is None:
+            continue
+        if obstacle_analysis is None:
+            obstacle_analysis = ObstacleAnalysis(analysis.threat_level, analysis.min_distance,
+                                                 analysis.total_obstacle_pixels, analysis.center_obstacle_pixels,
+                                                 analysis.obstacle_density, analysis.center_obstacle_density)
+            threat_source = name
+            continue
+        if analysis.severity > obstacle_analysis.severity:
+            obstacle_analysis.threat_level = analysis.threat_level
+            threat_source = name
+        obstacle_analysis.min_distance = min(obstacle_analysis.min_distance, analysis.min_distance)
+        obstacle_analysis.total_obstacle_pixels += analysis.total_obstacle_pixels
+        obstacle_analysis.center_obstacle_pixels += analysis.center_obstacle_pixels
+        obstacle_analysis.obstacle_density = max(obstacle_analysis.obstacle_density, analysis.obstacle_density)
+        obstacle_analysis.center_obstacle_density = max(obstacle_analysis.center_obstacle_density,
+                                                        analysis.center_obstacle_density)
+    other_threats = {name: result['obstacle_analysis'] for name, result in available.items()
+                     if name not in forward and result['obstacle_analysis'] is not None}
+
+    # 追踪来源：前向相机中主相机优先
+    if primary in forward:
+        forward.remove(primary)
+        forward.insert(0, primary)
+    tracking_source = next((name for name in forward if available[name]['tracking'].has_axis),
+                           forward[0] if forward else None)
+
+    return {
+        'tracking': available[tracking_source]['tracking'] if tracking_source is not None else TrackingResult(),
+        'obstacle_analysis': obstacle_analysis,
+        'tracking_source': tracking_source,
+        'threat_source': threat_source,
+        'other_threats': other_threats,
+        'stale': stale,
+        'lost': lost,
+    }
+
+
+class MultiCameraManager:
+    """按序列号为每台相机启动一个工作进程，并读取/融合它们的结果"""
+
+    def __init__(self, camera_specs: List[dict], primary: Optional[str] = None,
+                 detector_kwargs: Optional[dict] = None, tracker_kwargs: Optional[dict] = None):
+        """
+        Args:
+            camera_specs: 相机描述列表，每项需含唯一的 "name"，可含朝向 "role"（"forward" / "rear"）
+            primary: 主相机（前向）名称，用于管道追踪
+            detector_kwargs: 传给各进程 ObstacleDetector 的参数（需可序列化）
+            tracker_kwargs: 传给各进程 PipeTracker 的额外参数（需可序列化）
+        """
+        self.camera_specs = camera_specs
+        self.primary = primary
+        self.roles = {spec['name']: spec.get('role') for spec in camera_specs}
+        self.detector_kwargs = detector_kwargs
+        self.tracker_kwargs = tracker_kwargs
+        # spawn：子进程不继承父进程已打开的相机/USB句柄
+        self._ctx = mp.get_context('spawn')
+        self._stop_event = None
+        self.slots: Dict[str, SharedResultSlot] = {}
+        self.processes: Dict[str, mp.Process] = {}
+        self._last_sequence: Dict[str, int] = {}
+
+    def start(self):
+        """启动所有相机工作进程"""
+        self._stop_event = self._ctx.Event()
+        for spec in self.camera_specs:
+            name = spec['name']
+            slot = SharedResultSlot.create(self._ctx)
+            process = self._ctx.Process(
+                target=run_camera_worker,
+                args=(spec, slot.name, slot.lock, self._stop_event, self.detector_kwargs, self.tracker_kwargs),
+                name=f"camera-{name}",
+                daemon=True
+            )
+            process.start()
+            self.slots[name] = slot
+            self.processes[name] = process
+            self._last_sequence[name] = 0
+            logger.info(f"相机工作进程已启动: {name} (pid {process.pid})")
+
+    def read_results(self) -> Dict[str, Optional[dict]]:
+        """读取各相机最新结果"""
+        return {name: slot.read() for name, slot in self.slots.items()}
+
+    def wait_for_update(self, timeout: float = 1.0, poll_interval: float = 0.002) -> Optional[Dict[str, Optional[dict]]]:
+        """
+        等待任一相机产生新结果
+
+        Returns:
+            各相机最新结果；超时返回 None
+        """
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            results = self.read_results()
+            updated = False
+            for name, result in results.items():
+                if result is not None and result['sequence'] != self._last_sequence[name]:
+                    self._last_sequence[name] = result['sequence']
+                    updated = True
+            if updated:
+                return results
+            if not self.any_alive():
+                return None
+            time.sleep(poll_interval)
+        return None
+
+    def fuse(self, results: Dict[str, Optional[dict]]) -> dict:
+        """按各相机角色融合结果"""
+        return fuse_results(results, self.primary, self.roles)
+
+    def read_fused(self) -> dict:
+        """读取并融合各相机最新结果"""
+        return self.fuse(self.read_results())
+
+    def any_alive(self) -> bool:
+        return any(process.is_alive() for process in self.processes.values())
+
+    def get_status(self) -> Dict[str, dict]:
+        """各工作进程状态：是否存活、相机是否丢失、结果序号、最近一次感知耗时"""
+        status = {}
+        for name, slot in self.slots.items():
+            result = slot.read()
+            status[name] = {
+                'alive': self.processes[name].is_alive(),
+                'camera_lost': result['camera_lost'] if result else False,
+                'sequence': result['sequence'] if result else 0,
+                'process_ms': result['process_ms'] if result else None,
+            }
+        return status
+
+    def stop(self, timeout: float = 3.0):
+        """停止工作进程并释放共享内存"""
+        if self._stop_event is not None:
+            self._stop_event.set()
+        for name, process in self.processes.items():
+            process.join(timeout)
+            if process.is_alive():
+                logger.warning(f"相机工作进程 {name} 未按时退出，强制终止")
+                process.terminate()
+                process.join(1.0)
+        for slot in self.slots.values():
+            slot.close()
+        self.processes.clear()
+        self.slots.clear()
+
+
+# 帧缓冲头部：帧序号与元数据
+FRAME_HEADER_DTYPE = np.dtype([
+    ('sequence', np.int64),      # 写入次数，0 表示尚无帧
+    ('frame_number', np.int64),
+    ('capture_time', np.float64),
+    ('has_depth', np.bool_),
+])
+
+
+def _aligned(size: int, alignment: int = 64) -> int:
+    return (size + alignment - 1) // alignment * alignment
+
+
+class SharedFrameBuffer:
+    """
+    共享内存中的最新帧（彩色 + 可选深度），只保留一帧
+
+    主进程写入时覆盖上一帧，感知进程按序号判断是否有新帧，处理不过来时自然丢弃旧帧。
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, lock, color_shape, depth_shape, owner: bool):
+        self.shm = shm
+        self.lock = lock
+        self.owner = owner
+        self.color_shape = tuple(color_shape)
+        self.depth_shape = tuple(depth_shape) if depth_shape is not None else None
+
+        color_offset = _aligned(FRAME_HEADER_DTYPE.itemsize)
+        color_size = int(np.prod(self.color_shape))
+        self.header = np.ndarray((), dtype=FRAME_HEADER_DTYPE, buffer=shm.buf)
+        self.color = np.ndarray(self.color_shape, dtype=np.uint8, buffer=shm.buf, offset=color_offset)
+        self.depth = None
+        if self.depth_shape is not None:
+            self.depth = np.ndarray(self.depth_shape, dtype=np.uint16, buffer=shm.buf,
+                                    offset=color_offset + _aligned(color_size))
+
+    @staticmethod
+    def required_size(color_shape, depth_shape=None) -> int:
+        size = _aligned(FRAME_HEADER_DTYPE.itemsize) + _aligned(int(np.prod(color_shape)))
+        if depth_shape is not None:
+            size += int(np.prod(depth_shape)) * np.dtype(np.uint16).itemsize
+        return size
+
+    @classmethod
+    def create(cls, color_shape, depth_shape=None, ctx=None) -> 'SharedFrameBuffer':
+        """在主进程中按帧尺寸创建缓冲区"""
+        ctx = ctx or mp.get_context()
+        shm = shared_memory.SharedMemory(create=True, size=cls.required_size(color_shape, depth_shape))
+        buffer = cls(shm, ctx.Lock(), color_shape, depth_shape, owner=True)
+        buffer.header['sequence'] = 0
+        return buffer
+
+    @classmethod
+    def attach(cls, name: str, lock, color_shape, depth_shape=None) -> 'SharedFrameBuffer':
+        """在感知进程中按名字连接到已有缓冲区"""
+        return cls(shared_memory.SharedMemory(name=name), lock, color_shape, depth_shape, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    @property
+    def sequence(self) -> int:
+        return int(self.header['sequence'])
+
+    def write(self, color_frame: np.ndarray, depth_frame: Optional[np.ndarray] = None,
+              frame_info: Optional[dict] = None) -> int:
+        """
+        写入一帧（覆盖上一帧）
+
+        Returns:
+            本帧序号
+        """
+        if color_frame.shape != self.color_shape:
+            raise ValueError(f"彩色帧尺寸 {color_frame.shape} 与缓冲区 {self.color_shape} 不一致")
+        if depth_frame is not None and depth_frame.shape != self.depth_shape:
+            raise ValueError(f"深度帧尺寸 {depth_frame.shape} 与缓冲区 {self.depth_shape} 不一致")
+
+        with self.lock:
+            self.color[...] = color_frame
+            if depth_frame is not None:
+                self.depth[...] = depth_frame
+            self.header['has_depth'] = depth_frame is not None
+            self.header['frame_number'] = frame_info['frame_number'] if frame_info else -1
+            self.header['capture_time'] = frame_info['capture_time'] if frame_info else time.time()
+            self.header['sequence'] += 1
+            return int(self.header['sequence'])
+
+    def read(self, color_out: np.ndarray, depth_out: Optional[np.ndarray] = None) -> Optional[dict]:
+        """
+        把最新帧拷贝到调用方预分配的数组中（拷贝期间持锁，之后处理不阻塞写入）
+
+        Returns:
+            {'sequence', 'frame_number', 'capture_time', 'has_depth'}，尚无帧时为 None
+        """
+        with self.lock:
+            sequence = int(self.header['sequence'])
+            if sequence == 0:
+                return None
+            has_depth = bool(self.header['has_depth'])
+            color_out[...] = self.color
+            if has_depth and depth_out is not None:
+                depth_out[...] = self.depth
+            return {
+                'sequence': sequence,
+                'frame_number': int(self.header['frame_number']),
+                'capture_time': float(self.header['capture_time']),
+                'has_depth': has_depth,
+            }
+
+    def close(self):
+        """断开共享内存；创建者同时释放"""
+        self.header = self.color = self.depth = None
+        self.shm.close()
+        if self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+
+def run_perception_worker(frame_name: str, frame_lock, color_shape, depth_shape, frame_ready,
+                          slot_name: str, slot_lock, stop_event,
+                          detector_kwargs: Optional[dict] = None, tracker_kwargs: Optional[dict] = None):
+    """
+    感知进程入口：从共享帧缓冲取最新帧，执行避障检测与管道追踪，结果写入共享结果槽位
+
+    Args:
+        frame_name / frame_lock: 共享帧缓冲
+        color_shape / depth_shape: 帧尺寸（无深度时 depth_shape 为 None）
+        frame_ready: 主进程写入新帧后置位的事件
+        slot_name / slot_lock: 共享结果槽位
+        stop_event: 停止事件
+        detector_kwargs: ObstacleDetector 参数
+        tracker_kwargs: PipeTracker 参数（可含可序列化的 depth_sampler）
+    """
+    from .pipe_tracking import PipeTracker
+    from .obstacle_detection import ObstacleDetector
+
+    frames = SharedFrameBuffer.attach(frame_name, frame_lock, color_shape, depth_shape)
+    slot = SharedResultSlot.attach(slot_name, slot_lock)
+    try:
+        tracker = PipeTracker(visualize=False, **(tracker_kwargs or {}))
+        detector = ObstacleDetector(**(detector_kwargs or {}))
+
+        # 每帧复用同一组本地数组，不在共享内存上直接计算
+        color_frame = np.empty(color_shape, dtype=np.uint8)
+        depth_frame = np.empty(depth_shape, dtype=np.uint16) if depth_shape is not None else None
+        last_sequence = 0
+
+        while not stop_event.is_set():
+            if not frame_ready.wait(0.1):
+                continue
+            frame_ready.clear()
+            info = frames.read(color_frame, depth_frame)
+            if info is None or info['sequence'] == last_sequence:
+                continue
+            last_sequence = info['sequence']
+
+            try:
+                slot.write(*_perceive(detector, tracker, color_frame,
+                                      depth_frame if info['has_depth'] else None, info))
+            except Exception as e:
+                # 单帧失败不退出进程，主进程等不到本帧结果时按超时停车
+                logger.warning(f"感知进程单帧处理失败: {e}")
+    except Exception as e:
+        logger.error(f"感知进程异常退出: {e}")
+    finally:
+        frames.close()
+        slot.close()
+
+
+class PerceptionWorker:
+    """
+    独立感知进程：主进程只负责取帧、控制与I/O
+
+    帧经共享内存传给感知进程，结果以 RESULT_DTYPE 定长记录返回，
+    NumPy 计算与 Python 胶水代码不再与键盘/Web 线程争用主进程的GIL。
+    """
+
+    def __init__(self, color_shape, depth_shape=None, detector_kwargs: Optional[dict] = None,
+                 tracker_kwargs: Optional[dict] = None):
+        """
+        Args:
+            color_shape: 彩色帧尺寸 (h, w, 3)
+            depth_shape: 深度帧尺寸 (h, w)，无深度相机时为 None
+            detector_kwargs: ObstacleDetector 参数（需可序列化）
+            tracker_kwargs: PipeTracker 参数（需可序列化）
+        """
+        self.color_shape = tuple(color_shape)
+        self.depth_shape = tuple(depth_shape) if depth_shape is not None else None
+        self.detector_kwargs = detector_kwargs
+        self.tracker_kwargs = tracker_kwargs
+        self._ctx = mp.get_context('spawn')
+        self.frames: Optional[SharedFrameBuffer] = None
+        self.slot: Optional[SharedResultSlot] = None
+        self.process = None
+        self._frame_ready = None
+        self._stop_event = None
+        self._last_sequence = 0
+        self.stats = {'frames_submitted': 0, 'results_received': 0}
+
+    def start(self):
+        """创建共享内存并启动感知进程"""
+        self.frames = SharedFrameBuffer.create(self.color_shape, self.depth_shape, self._ctx)
+        self.slot = SharedResultSlot.create(self._ctx)
+        self._frame_ready = self._ctx.Event()
+        self._stop_event = self._ctx.Event()
+        self.process = self._ctx.Process(
+            target=run_perception_worker,
+            args=(self.frames.name, self.frames.lock, self.color_shape, self.depth_shape, self._frame_ready,
+                  self.slot.name, self.slot.lock, self._stop_event, self.detector_kwargs, self.tracker_kwargs),
+            name="perception",
+            daemon=True
+        )
+        self.process.start()
+        logger.info(f"感知进程已启动 (pid {self.process.pid})")
+
+    def submit(self, color_frame: np.ndarray, depth_frame: Optional[np.ndarray] = None,
+               frame_info: Optional[dict] = None) -> int:
+        """提交一帧（非阻塞，感知进程未取走的旧帧被覆盖），返回帧序号"""
+        sequence = self.frames.write(color_frame, depth_frame, frame_info)
+        self._frame_ready.set()
+        self.stats['frames_submitted'] += 1
+        return sequence
+
+    def get_result(self) -> Optional[dict]:
+        """取最新结果，没有比上次更新的结果时返回 None"""
+        result = self.slot.read()
+        if result is None or result['sequence'] == self._last_sequence:
+            return None
+        self._last_sequence = result['sequence']
+        self.stats['results_received'] += 1
+        return result
+
+    def wait_result(self, timeout: float = 1.0, poll_interval: float = 0.001) -> Optional[dict]:
+        """等待新结果，超时或感知进程退出时返回 None"""
+        deadline = time.time() + timeout
+        while True:
+            result = self.get_result()
+            if result is not None:
+                return result
+            if time.time() >= deadline or not self.is_alive():
+                return None
+            time.sleep(poll_interval)
+
+    def is_alive(self) -> bool:
+        return self.process is not None and self.process.is_alive()
+
+    def get_stats(self) -> dict:
+        """提交帧数、收到结果数（差值即被覆盖丢弃的帧）与最近一次感知耗时"""
+        stats = dict(self.stats)
+        latest = self.slot.read() if self.slot is not None else None
+        stats['alive'] = self.is_alive()
+        stats['process_ms'] = latest['process_ms'] if latest else None
+        return stats
+
+    def stop(self, timeout: float = 3.0):
+        """停止感知进程并释放共享内存"""
+        if self._stop_event is not None:
+            self._stop_event.set()
+        if self.process is not None:
+            self.process.join(timeout)
+            if self.process.is_alive():
+                logger.warning("感知进程未按时退出，强制终止")
+                self.process.terminate()
+                self.process.join(1.0)
+            self.process = None
+        for shared in (self.frames, self.slot):
+            if shared is not None:
+                shared.close()
+        self.frames = self.slot = None
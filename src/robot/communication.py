@@ -1,5 +1,6 @@
 import serial
 import time
+import threading
 
 def recv_data(ser_obj, timeout_sec=5):
     """
@@ -75,6 +76,8 @@ class RoboMasterCSerial:
         self.baudrate = baudrate
         self.timeout = timeout
         self.ser = None
+        # 避障监测线程与主循环、键盘线程都会发送命令，写串口需串行化
+        self._send_lock = threading.Lock()
         self.connect()
 
     def connect(self):
@@ -90,7 +93,8 @@ class RoboMasterCSerial:
             cmd (str): 要发送的命令
         """
         if self.ser and self.ser.isOpen():
-            send_data(cmd, self.ser)
+            with self._send_lock:
+                send_data(cmd, self.ser)
         else:
             raise Exception('串口未打开')
 
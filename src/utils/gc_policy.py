@@ -0,0 +1,165 @@
+"""
+垃圾回收策略
+控制 Python 循环垃圾回收发生的时机，避免回收停顿随机落在帧处理中途
+
+初始化完成后先完整回收一次并 gc.freeze()，相机、模型等长期对象移入永久代不再参与扫描；
+调高分代阈值减少自动回收，帧处理完成后若距下一帧还有空闲时间，就主动回收计数接近阈值的那一代。
+每次回收的停顿经 gc.callbacks 记录，自动回收与空闲时间主动回收分开统计。
+"""
+
+import gc
+import logging
+import time
+from collections import deque
+from typing import Optional, Tuple
+
+try:
+    from config import PerformanceConfig
+except ImportError:
+    class PerformanceConfig:
+        GARBAGE_COLLECTION_THRESHOLD = (10000, 20, 20)
+        GC_FREEZE_AFTER_INIT = True
+        GC_SLACK_FRACTION = 0.5
+
+# 停顿估计的平滑系数；只有空闲时间不少于估计停顿的 PAUSE_SAFETY 倍才主动回收
+PAUSE_ALPHA = 0.2
+PAUSE_SAFETY = 1.5
+
+
+class GCPolicy:
+    """在追踪循环中接管垃圾回收时机并统计回收停顿"""
+
+    def __init__(self, thresholds: Optional[Tuple[int, int, int]] = None, freeze: Optional[bool] = None,
+                 slack_fraction: Optional[float] = None):
+        """
+        Args:
+            thresholds: 分代阈值 (第0代, 第1代, 第2代)，默认 PerformanceConfig.GARBAGE_COLLECTION_THRESHOLD
+            freeze: 是否在 apply() 时冻结现存对象，默认 PerformanceConfig.GC_FREEZE_AFTER_INIT
+            slack_fraction: 某代计数达到其阈值的该比例后才主动回收，默认 PerformanceConfig.GC_SLACK_FRACTION
+        """
+        self.thresholds = tuple(thresholds or PerformanceConfig.GARBAGE_COLLECTION_THRESHOLD)
+        self.freeze = freeze if freeze is not None else PerformanceConfig.GC_FREEZE_AFTER_INIT
+        self.slack_fraction = slack_fraction if slack_fraction is not None else PerformanceConfig.GC_SLACK_FRACTION
+        self.logger = logging.getLogger(__name__)
+
+        self.active = False
+        # 最近回收停顿 (类别, 毫秒)，类别为 "gen{代}_{auto|slack}"；回收可能发生在任意线程持有任意锁时，
+        # 回调里只做 deque.append（原子操作），不能取锁
+        self._pauses = deque(maxlen=500)
+        self._pause_counts = {}
+        self._previous_thresholds = None
+        self._explicit = False
+        self._pause_start = None
+        self._estimates = [None, None, None]  # 各代回收停顿估计（秒）
+
+        self.stats = {
+            'frozen_objects': 0,
+            'slack_collections': 0,
+            'deferred': 0,  # 计数已到但空闲时间不够、推迟的次数
+            'collected': 0,
+        }
+
+    def apply(self):
+        """应用策略：完整回收一次后冻结现存对象，设置分代阈值并开始统计停顿"""
+        if self.active:
+            return
+        self._previous_thresholds = gc.get_threshold()
+        start = time.perf_counter()
+        gc.collect()
+        # 冻结前的完整回收扫描了全部对象，作为第2代停顿的保守初值
+        self._estimates[2] = time.perf_counter() - start
+        if self.freeze and hasattr(gc, 'freeze'):
+            gc.freeze()
+            self.stats['frozen_objects'] = gc.get_freeze_count()
+        gc.set_threshold(*self.thresholds)
+        gc.callbacks.append(self._on_gc)
+        self.active = True
+        self.logger.info(f"垃圾回收策略已应用: 阈值 {self.thresholds}, 冻结对象 {self.stats['frozen_objects']} 个")
+
+    def _on_gc(self, phase: str, info: dict):
+        """gc 回调：记录每次回收的停顿"""
+        if phase == 'start':
+            self._pause_start = time.perf_counter()
+            return
+        if self._pause_start is None:
+            return
+        pause = time.perf_counter() - self._pause_start
+        self._pause_start = None
+        generation = info['generation']
+        stage = f"gen{generation}_{'slack' if self._explicit else 'auto'}"
+        self._pauses.append((stage, pause * 1000.0))
+        self._pause_counts[stage] = self._pause_counts.get(stage, 0) + 1
+        self.stats['collected'] += info.get('collected', 0)
+
+        estimate = self._estimates[generation]
+        self._estimates[generation] = pause if estimate is None else estimate + PAUSE_ALPHA * (pause - estimate)
+
+    def collect_in_slack(self, slack: float) -> Optional[int]:
+        """
+        帧间空闲时主动回收：从老到新找计数接近阈值、且估计停顿放得进空闲时间的一代
+
+        Args:
+            slack: 本帧处理完成后距下一帧预算的剩余时间（秒）
+
+        Returns:
+            回收的代，未回收时为 None
+        """
+        if not self.active or slack <= 0:
+            return None
+        counts = gc.get_count()
+        for generation in (2, 1, 0):
+            if counts[generation] < self.thresholds[generation] * self.slack_fraction:
+                continue
+            if (self._estimates[generation] or 0.0) * PAUSE_SAFETY > slack:
+                self.stats['deferred'] += 1
+                continue
+            self._explicit = True
+            try:
+                gc.collect(generation)
+            finally:
+                self._explicit = False
+            self.stats['slack_collections'] += 1
+            return generation
+        return None
+
+    def get_pause_stats(self) -> dict:
+        """按类别统计最近回收停顿：总次数、平均、P95 与最大（毫秒）"""
+        samples = {}
+        for stage, pause_ms in list(self._pauses):
+            samples.setdefault(stage, []).append(pause_ms)
+        stats = {}
+        for stage, values in samples.items():
+            values.sort()
+            stats[stage] = {
+                'count': self._pause_counts.get(stage, len(values)),
+                'avg_ms': sum(values) / len(values),
+                'p95_ms': values[min(len(values) - 1, int(len(values) * 0.95))],
+                'max_ms': values[-1],
+            }
+        return stats
+
+    def get_stats(self) -> dict:
+        """回收停顿统计（按代与触发方式）与当前分代计数"""
+        pauses = self.get_pause_stats()
+        auto = [stats for stage, stats in pauses.items() if stage.endswith('_auto')]
+        return {
+            'active': self.active,
+            'thresholds': list(self.thresholds),
+            'counts': list(gc.get_count()),
+            'automatic_collections': sum(stats['count'] for stats in auto),
+            'max_automatic_pause_ms': max((stats['max_ms'] for stats in auto), default=None),
+            'estimated_pause_ms': [None if estimate is None else estimate * 1000 for estimate in self._estimates],
+            'pauses': pauses,
+            **self.stats,
+        }
+
+    def stop(self):
+        """停止接管：移除回调，恢复原分代阈值并解冻对象"""
+        if not self.active:
+            return
+        if self._on_gc in gc.callbacks:
+            gc.callbacks.remove(self._on_gc)
+        gc.set_threshold(*self._previous_thresholds)
+        if self.freeze and hasattr(gc, 'unfreeze'):
+            gc.unfreeze()
+        self.active = False
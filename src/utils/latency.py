@@ -0,0 +1,84 @@
+"""
+延迟统计模块
+记录从传感器曝光到串口写出命令的端到端延迟，用于核对控制回路延迟预算
+"""
+
+import threading
+from collections import deque
+from typing import Dict, Optional, List
+
+
+def _percentile(sorted_values: List[float], q: float) -> float:
+    """线性插值百分位（与 numpy.percentile 默认方法一致），避免为统计引入numpy"""
+    if len(sorted_values) == 1:
+        return sorted_values[0]
+    pos = (len(sorted_values) - 1) * q / 100.0
+    lower = int(pos)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (pos - lower)
+
+
+class LatencyTracker:
+    """按阶段统计最近 N 个样本的延迟（毫秒），线程安全"""
+
+    def __init__(self, window_size: int = 300):
+        """
+        Args:
+            window_size: 每个阶段保留的最近样本数
+        """
+        self.window_size = window_size
+        self._samples: Dict[str, deque] = {}
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, stage: str, start_time: Optional[float], end_time: float) -> Optional[float]:
+        """
+        记录一个阶段的延迟
+
+        Args:
+            stage: 阶段名，如 "capture_to_uart"
+            start_time: 起始时间（秒，与 end_time 同一时钟），None 时忽略
+            end_time: 结束时间（秒）
+
+        Returns:
+            本次延迟（毫秒），未记录时为 None
+        """
+        if start_time is None:
+            return None
+        latency_ms = (end_time - start_time) * 1000.0
+        if latency_ms < 0:
+            # 时钟域不一致（例如硬件时钟未与主机同步）时的样本没有意义
+            return None
+        with self._lock:
+            if stage not in self._samples:
+                self._samples[stage] = deque(maxlen=self.window_size)
+                self._counts[stage] = 0
+            self._samples[stage].append(latency_ms)
+            self._counts[stage] += 1
+        return latency_ms
+
+    def get_stats(self) -> Dict[str, dict]:
+        """各阶段的样本数、平均、P50、P95、最大与最近一次延迟（毫秒）"""
+        with self._lock:
+            snapshot = {stage: (list(samples), self._counts[stage]) for stage, samples in self._samples.items()}
+
+        stats = {}
+        for stage, (samples, count) in snapshot.items():
+            if not samples:
+                continue
+            ordered = sorted(samples)
+            stats[stage] = {
+                "count": count,
+                "avg_ms": sum(samples) / len(samples),
+                "p50_ms": _percentile(ordered, 50),
+                "p95_ms": _percentile(ordered, 95),
+                "max_ms": ordered[-1],
+                "last_ms": samples[-1],
+            }
+        return stats
+
+    def reset(self):
+        """清空所有样本"""
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
@@ -3,74 +3,228 @@
 提供统一的日志记录功能
 """
 
+import atexit
 import logging
 import os
+import queue
 import sys
-from logging.handlers import RotatingFileHandler
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
 
-def setup_logger(name: str, log_file: str = None, log_level: str = "INFO") -> logging.Logger:
+try:
+    from config import LogConfig
+except ImportError:
+    class LogConfig:
+        LOG_LEVEL = "INFO"
+        LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))),
+                               "output", "logs")
+        LOG_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+        DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+        MAX_LOG_SIZE = 10 * 1024 * 1024
+        BACKUP_COUNT = 5
+        LOG_ASYNC = True
+        LOG_QUEUE_SIZE = 10000
+        LOG_RATE_LIMIT_ENABLED = True
+        LOG_RATE_LIMIT_INTERVAL = 1.0
+        LOG_RATE_LIMIT_BURST = 2
+        LOG_RATE_LIMIT_MAX_LEVEL = "WARNING"
+
+LEVEL_MAP = {
+    "DEBUG": logging.DEBUG,
+    "INFO": logging.INFO,
+    "WARNING": logging.WARNING,
+    "ERROR": logging.ERROR,
+    "CRITICAL": logging.CRITICAL
+}
+
+class RateLimitFilter(logging.Filter):
     """
-    设置并返回一个配置好的logger
+    按消息键限频：每个键在 interval 秒窗口内最多放行 burst 条，其余丢弃并计数
     
-    Args:
-        name (str): logger名称
-        log_file (str): 日志文件路径，如果为None则使用默认路径
-        log_level (str): 日志级别
-        
-    Returns:
-        logging.Logger: 配置好的logger实例
+    键默认为调用位置（文件+行号），f-string 拼出的不同文本仍归为同一条消息；
+    也可通过 extra={'rate_key': ...} 指定。高于 max_level 的日志（错误）从不限频。
+    被抑制的条数附加在该键下一条放行的消息末尾。
     """
-    # 创建logger
-    logger = logging.getLogger(name)
     
-    # 如果已经配置过，直接返回
-    if logger.handlers:
-        return logger
+    def __init__(self, interval: float = 1.0, burst: int = 2, max_level: int = logging.WARNING):
+        super().__init__()
+        self.interval = interval
+        self.burst = burst
+        self.max_level = max_level
+        self._lock = threading.Lock()
+        self._windows = {}  # 键 -> [窗口起点, 窗口内放行数, 累计抑制数]
+        self.suppressed_total = 0
+    
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno > self.max_level:
+            return True
+        key = getattr(record, 'rate_key', None) or (record.pathname, record.lineno)
+        now = record.created
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.interval:
+                suppressed = window[2] if window is not None else 0
+                self._windows[key] = [now, 1, 0]
+            elif window[1] < self.burst:
+                window[1] += 1
+                suppressed, window[2] = window[2], 0
+            else:
+                window[2] += 1
+                self.suppressed_total += 1
+                return False
+        if suppressed:
+            record.msg = f"{record.getMessage()} (已抑制 {suppressed} 条同类日志)"
+            record.args = None
+        return True
+
+class _DroppingQueueHandler(QueueHandler):
+    """队列满时丢弃新日志并计数，而不是阻塞或抛错打断追踪回路"""
+    
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
     
-    # 设置日志级别
-    level_map = {
-        "DEBUG": logging.DEBUG,
-        "INFO": logging.INFO,
-        "WARNING": logging.WARNING,
-        "ERROR": logging.ERROR,
-        "CRITICAL": logging.CRITICAL
-    }
-    logger.setLevel(level_map.get(log_level.upper(), logging.INFO))
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+# 进程内共享的日志管线：根logger上挂一个 QueueHandler，后台线程中的 QueueListener 负责格式化与写出
+_pipeline_lock = threading.Lock()
+_listener = None
+_root_handler = None
+
+def _default_log_file() -> str:
+    return os.path.join(LogConfig.LOG_DIR, f"tiaozhanbei2_{datetime.now().strftime('%Y%m%d')}.log")
+
+def setup_logging(log_file: str = None, log_level: str = None) -> logging.Handler:
+    """
+    配置进程内的日志管线（只执行一次，重复调用直接返回）
+    
+    日志级别取 LogConfig.LOG_LEVEL；LOG_ASYNC 开启时热路径上只做入队，
+    控制台与文件写出在后台线程完成；按调用位置限频，避免每帧日志刷屏。
+    
+    Returns:
+        挂在根logger上的处理器
+    """
+    global _listener, _root_handler
+    with _pipeline_lock:
+        if _root_handler is not None:
+            return _root_handler
+        
+        formatter = logging.Formatter(LogConfig.LOG_FORMAT, datefmt=LogConfig.DATE_FORMAT)
+        handlers = []
+        
+        # 控制台处理器
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(formatter)
+        handlers.append(console_handler)
+        
+        # 文件处理器（带轮转）
+        if log_file is None:
+            log_file = _default_log_file()
+        try:
+            os.makedirs(os.path.dirname(log_file), exist_ok=True)
+            file_handler = RotatingFileHandler(
+                log_file,
+                maxBytes=LogConfig.MAX_LOG_SIZE,
+                backupCount=LogConfig.BACKUP_COUNT,
+                encoding='utf-8'
+            )
+            file_handler.setFormatter(formatter)
+            handlers.append(file_handler)
+        except Exception as e:
+            print(f"无法创建文件日志处理器: {e}", file=sys.stderr)
+        
+        if LogConfig.LOG_ASYNC:
+            _root_handler = _DroppingQueueHandler(queue.Queue(LogConfig.LOG_QUEUE_SIZE))
+            _listener = QueueListener(_root_handler.queue, *handlers, respect_handler_level=True)
+            _listener.start()
+            atexit.register(shutdown_logging)
+        else:
+            _root_handler = _FanOutHandler(handlers)
+        
+        if LogConfig.LOG_RATE_LIMIT_ENABLED:
+            _root_handler.addFilter(RateLimitFilter(
+                LogConfig.LOG_RATE_LIMIT_INTERVAL,
+                LogConfig.LOG_RATE_LIMIT_BURST,
+                LEVEL_MAP.get(LogConfig.LOG_RATE_LIMIT_MAX_LEVEL.upper(), logging.WARNING)
+            ))
+        
+        root = logging.getLogger()
+        root.addHandler(_root_handler)
+        root.setLevel(LEVEL_MAP.get((log_level or LogConfig.LOG_LEVEL).upper(), logging.INFO))
+        return _root_handler
+
+class _FanOutHandler(logging.Handler):
+    """同步模式下把一条记录交给多个处理器（限频过滤只需执行一次）"""
     
-    # 创建格式器
-    formatter = logging.Formatter(
-        '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
+    def __init__(self, handlers):
+        super().__init__()
+        self.handlers = handlers
     
-    # 控制台处理器
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(logging.INFO)
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
+    def emit(self, record):
+        for handler in self.handlers:
+            handler.handle(record)
     
-    # 文件处理器
-    if log_file is None:
-        # 使用默认路径
-        log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "output", "logs")
-        os.makedirs(log_dir, exist_ok=True)
-        log_file = os.path.join(log_dir, f"tiaozhanbei2_{datetime.now().strftime('%Y%m%d')}.log")
+    def close(self):
+        for handler in self.handlers:
+            handler.close()
+        super().close()
+
+def shutdown_logging():
+    """停止后台写出线程并写完队列中剩余的日志（进程退出时自动调用）"""
+    global _listener, _root_handler
+    with _pipeline_lock:
+        if _listener is not None:
+            _listener.stop()
+            for handler in _listener.handlers:
+                handler.close()
+            _listener = None
+        if _root_handler is not None:
+            logging.getLogger().removeHandler(_root_handler)
+            _root_handler.close()
+            _root_handler = None
+
+def set_log_level(log_level: str):
+    """运行时修改全局日志级别（如命令行 --verbose 在管线配置之后才解析）"""
+    logging.getLogger().setLevel(LEVEL_MAP.get(log_level.upper(), logging.INFO))
+
+def get_log_stats() -> dict:
+    """日志管线状态：队列积压与限频抑制条数"""
+    handler = _root_handler
+    if handler is None:
+        return {}
+    stats = {'async': isinstance(handler, QueueHandler), 'suppressed': 0}
+    if isinstance(handler, QueueHandler):
+        stats['queued'] = handler.queue.qsize()
+        stats['dropped'] = handler.dropped
+    for log_filter in handler.filters:
+        if isinstance(log_filter, RateLimitFilter):
+            stats['suppressed'] = log_filter.suppressed_total
+    return stats
+
+def setup_logger(name: str, log_file: str = None, log_level: str = None) -> logging.Logger:
+    """
+    设置并返回一个配置好的logger
     
-    try:
-        # 创建文件处理器（带轮转）
-        file_handler = RotatingFileHandler(
-            log_file, 
-            maxBytes=10*1024*1024,  # 10MB
-            backupCount=5,
-            encoding='utf-8'
-        )
-        file_handler.setLevel(logging.DEBUG)
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
-    except Exception as e:
-        logger.warning(f"无法创建文件日志处理器: {e}")
+    各logger不再单独挂处理器，记录沿层级传到根logger上的共享管线。
     
+    Args:
+        name (str): logger名称
+        log_file (str): 日志文件路径，如果为None则使用默认路径（只在首次配置管线时生效）
+        log_level (str): 该logger的日志级别，None 表示沿用 LogConfig.LOG_LEVEL
+        
+    Returns:
+        logging.Logger: 配置好的logger实例
+    """
+    setup_logging(log_file)
+    logger = logging.getLogger(name)
+    if log_level is not None:
+        logger.setLevel(LEVEL_MAP.get(log_level.upper(), logging.INFO))
     return logger
 
 def get_logger(name: str = None) -> logging.Logger:
@@ -85,9 +239,7 @@ def get_logger(name: str = None) -> logging.Logger:
     """
     if name is None:
         # 获取调用者的模块名
-        import inspect
-        frame = inspect.currentframe().f_back
-        name = frame.f_globals.get('__name__', 'unknown')
+        name = sys._getframe(1).f_globals.get('__name__', 'unknown')
     
     return setup_logger(name)
 
@@ -103,29 +255,34 @@ class LoggerMixin:
             self._logger = get_logger(self.__class__.__name__)
         return self._logger
 
-# 便捷函数
+# 创建默认logger
+default_logger = setup_logger("Tiaozhanbei2.0")
+
+# 便捷函数：直接使用默认logger，stacklevel 使记录的调用位置（也是限频键）指向调用者
 def debug(msg, *args, **kwargs):
     """记录DEBUG级别日志"""
-    get_logger().debug(msg, *args, **kwargs)
+    kwargs.setdefault('stacklevel', 2)
+    default_logger.debug(msg, *args, **kwargs)
 
 def info(msg, *args, **kwargs):
     """记录INFO级别日志"""
-    get_logger().info(msg, *args, **kwargs)
+    kwargs.setdefault('stacklevel', 2)
+    default_logger.info(msg, *args, **kwargs)
 
 def warning(msg, *args, **kwargs):
     """记录WARNING级别日志"""
-    get_logger().warning(msg, *args, **kwargs)
+    kwargs.setdefault('stacklevel', 2)
+    default_logger.warning(msg, *args, **kwargs)
 
 def error(msg, *args, **kwargs):
     """记录ERROR级别日志"""
-    get_logger().error(msg, *args, **kwargs)
+    kwargs.setdefault('stacklevel', 2)
+    default_logger.error(msg, *args, **kwargs)
 
 def critical(msg, *args, **kwargs):
     """记录CRITICAL级别日志"""
-    get_logger().critical(msg, *args, **kwargs)
-
-# 创建默认logger
-default_logger = setup_logger("Tiaozhanbei2.0")
+    kwargs.setdefault('stacklevel', 2)
+    default_logger.critical(msg, *args, **kwargs)
 
 if __name__ == "__main__":
     # 测试日志系统
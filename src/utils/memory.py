@@ -0,0 +1,195 @@
+"""
+内存遥测模块
+长时间运行时跟踪常驻内存（RSS）、每帧瞬时分配量与 tracemalloc 增长热点，内存持续增长时告警
+
+RSS 直接读 /proc/self/statm（无额外依赖，其他平台退回 psutil）；
+开启 tracemalloc 后，NumPy 数组的数据缓冲区也会被记录（NumPy 以独立 domain 上报），
+每帧瞬时分配量取该帧内追踪内存峰值与帧开始时的差值（需要 Python 3.9+ 的 reset_peak）。
+"""
+
+import logging
+import os
+import time
+import tracemalloc
+from collections import deque
+from typing import Callable, List, Optional
+
+try:
+    _PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = 4096
+
+# NumPy 数组缓冲区在 tracemalloc 中的 domain（numpy.lib.tracemalloc_domain）
+NUMPY_TRACEMALLOC_DOMAIN = 389047
+
+_MB = 1024.0 * 1024.0
+
+
+def read_rss_bytes() -> Optional[int]:
+    """当前进程常驻内存（字节），无法获取时为 None"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except Exception:
+        return None
+
+
+class MemoryTelemetry:
+    """
+    内存遥测：每帧记录瞬时分配量，按固定间隔采样 RSS 与 tracemalloc 快照差异
+
+    RSS 基线在预热期结束后的第一次检查时确定（相机管线、映射表缓存等一次性分配不计入增长），
+    相对基线增长每超过 growth_warn_mb 告警一次。
+    """
+
+    def __init__(self, interval: float = 60.0, warmup: float = 30.0, growth_warn_mb: float = 200.0,
+                 trace: bool = False, trace_frames: int = 1, top_n: int = 10,
+                 clock: Callable[[], float] = time.monotonic, rss_reader: Callable[[], Optional[int]] = read_rss_bytes):
+        """
+        Args:
+            interval: 周期检查间隔（秒）
+            warmup: 启动后多久确定 RSS 基线（秒）
+            growth_warn_mb: 相对基线每增长该值告警一次 (MB)
+            trace: 是否开启 tracemalloc（每帧分配量与增长热点，有一定开销）
+            trace_frames: tracemalloc 记录的调用栈深度
+            top_n: 每次检查报告的增长最多的分配位置数
+            clock: 时钟函数（测试时可注入）
+            rss_reader: RSS 读取函数（测试时可注入）
+        """
+        self.interval = interval
+        self.warmup = warmup
+        self.growth_warn_mb = growth_warn_mb
+        self.trace = trace
+        self.trace_frames = trace_frames
+        self.top_n = top_n
+        self.clock = clock
+        self.rss_reader = rss_reader
+        self.logger = logging.getLogger(__name__)
+
+        self._started_tracemalloc = False
+        self._start_time = None
+        self._last_check = None
+        self._last_snapshot = None
+        self._frame_base = None
+        self._frame_alloc = deque(maxlen=300)  # 最近各帧瞬时分配量（字节）
+        self._next_warn_mb = None
+
+        self.baseline_rss = None
+        self.peak_rss = 0
+        self.warnings = 0
+        self.last_report = None
+
+    def start(self):
+        """开始遥测（按需启动 tracemalloc）"""
+        self._start_time = self._last_check = self.clock()
+        if self.trace and not tracemalloc.is_tracing():
+            tracemalloc.start(self.trace_frames)
+            self._started_tracemalloc = True
+        if tracemalloc.is_tracing():
+            self._last_snapshot = self._take_snapshot()
+
+    def frame_start(self):
+        """帧处理开始"""
+        if tracemalloc.is_tracing() and hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+            self._frame_base = tracemalloc.get_traced_memory()[0]
+
+    def frame_end(self):
+        """帧处理结束：记录本帧瞬时分配量，到期时执行周期检查"""
+        if self._frame_base is not None and tracemalloc.is_tracing():
+            self._frame_alloc.append(tracemalloc.get_traced_memory()[1] - self._frame_base)
+            self._frame_base = None
+        if self._last_check is not None and self.clock() - self._last_check >= self.interval:
+            self.check()
+
+    def check(self) -> dict:
+        """立即采样 RSS 与 tracemalloc 差异，必要时告警"""
+        now = self.clock()
+        self._last_check = now
+        rss = self.rss_reader()
+        report = {'time': now - (self._start_time or now), 'rss_mb': None, 'growth_mb': None}
+        warned = False
+
+        if rss is not None:
+            self.peak_rss = max(self.peak_rss, rss)
+            report['rss_mb'] = rss / _MB
+            if self.baseline_rss is None and now - self._start_time >= self.warmup:
+                self.baseline_rss = rss
+                self._next_warn_mb = self.growth_warn_mb
+            if self.baseline_rss is not None:
+                growth_mb = (rss - self.baseline_rss) / _MB
+                report['growth_mb'] = growth_mb
+                elapsed_h = (now - self._start_time - self.warmup) / 3600.0
+                report['growth_mb_per_hour'] = growth_mb / elapsed_h if elapsed_h > 0 else None
+                if growth_mb >= self._next_warn_mb:
+                    self.warnings += 1
+                    warned = True
+                    self._next_warn_mb = (growth_mb // self.growth_warn_mb + 1) * self.growth_warn_mb
+                    self.logger.warning(f"内存持续增长: RSS {report['rss_mb']:.0f}MB，"
+                                        f"较基线增长 {growth_mb:.0f}MB")
+
+        if tracemalloc.is_tracing():
+            snapshot = self._take_snapshot()
+            report['numpy_mb'] = sum(stat.size for stat in snapshot.filter_traces(
+                [tracemalloc.DomainFilter(True, NUMPY_TRACEMALLOC_DOMAIN)]).statistics('filename')) / _MB
+            report['top_growth'] = self._top_growth(snapshot)
+            self._last_snapshot = snapshot
+            if warned and report['top_growth']:
+                locations = ", ".join(f"{row['location']} +{row['size_diff_kb']:.0f}KB"
+                                      for row in report['top_growth'][:3])
+                self.logger.warning(f"增长最多的分配位置: {locations}")
+
+        self.last_report = report
+        return report
+
+    def _take_snapshot(self):
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+
+    def _top_growth(self, snapshot) -> List[dict]:
+        """与上次快照相比增长最多的分配位置"""
+        if self._last_snapshot is None:
+            return []
+        rows = []
+        for stat in snapshot.compare_to(self._last_snapshot, 'lineno')[:self.top_n]:
+            if stat.size_diff <= 0:
+                continue
+            frame = stat.traceback[0]
+            rows.append({
+                'location': f"{os.path.basename(frame.filename)}:{frame.lineno}",
+                'size_kb': stat.size / 1024.0,
+                'size_diff_kb': stat.size_diff / 1024.0,
+                'count_diff': stat.count_diff,
+            })
+        return rows
+
+    def get_stats(self) -> dict:
+        """遥测摘要（供系统状态输出）"""
+        rss = self.rss_reader()
+        stats = {
+            'rss_mb': rss / _MB if rss is not None else None,
+            'peak_rss_mb': self.peak_rss / _MB if self.peak_rss else None,
+            'baseline_rss_mb': self.baseline_rss / _MB if self.baseline_rss is not None else None,
+            'growth_warnings': self.warnings,
+            'tracing': tracemalloc.is_tracing(),
+        }
+        if self._frame_alloc:
+            stats['frame_alloc_kb_avg'] = sum(self._frame_alloc) / len(self._frame_alloc) / 1024.0
+            stats['frame_alloc_kb_max'] = max(self._frame_alloc) / 1024.0
+        if self.last_report is not None:
+            stats['last_check'] = self.last_report
+        return stats
+
+    def stop(self):
+        """停止遥测（只停止由本对象启动的 tracemalloc）"""
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self._last_snapshot = None
@@ -0,0 +1,187 @@
+"""
+帧窗口性能剖析模块
+在正常追踪循环中对指定帧数做采样剖析（可叠加 cProfile），输出折叠栈与函数耗时表
+
+采样剖析由后台线程按固定间隔读取追踪线程的 Python 调用栈（sys._current_frames），
+不插桩、开销低，可在现场设备上直接运行；cProfile 统计精确调用次数但开销较大，按需开启。
+折叠栈每行为 "帧1;帧2;...;帧N 样本数"，可直接交给 flamegraph.pl / speedscope 生成火焰图。
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+PROFILE_MODES = ("sample", "cprofile")
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """后台线程按固定间隔采样目标线程的调用栈"""
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        """
+        Args:
+            thread_id: 被采样线程的 ident（通常为追踪循环所在线程）
+            interval: 采样间隔（秒）
+        """
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()  # 折叠栈（根在前） -> 样本数
+        self.samples = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="StackSampler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None or self.thread_id == own_id:
+                continue
+            labels = []
+            while frame is not None:
+                labels.append(_frame_label(frame.f_code))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def collapsed(self) -> str:
+        """折叠栈文本（按样本数降序）"""
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def function_table(self, limit: int = 40) -> List[Dict]:
+        """
+        按函数汇总：self 为位于栈顶的样本数，total 为出现在栈中的样本数（递归只计一次）
+
+        Returns:
+            [{'function', 'self', 'total', 'self_pct', 'total_pct'}, ...]，按 self 降序
+        """
+        self_counts, total_counts = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            self_counts[frames[-1]] += count
+            for label in set(frames):
+                total_counts[label] += count
+        total = max(self.samples, 1)
+        rows = [{
+            'function': label,
+            'self': self_counts[label],
+            'total': total_counts[label],
+            'self_pct': 100.0 * self_counts[label] / total,
+            'total_pct': 100.0 * total_counts[label] / total,
+        } for label in total_counts]
+        rows.sort(key=lambda row: (row['self'], row['total']), reverse=True)
+        return rows[:limit]
+
+
+class FrameProfiler:
+    """
+    对接下来的 N 帧做剖析，完成后把结果写入输出目录
+
+    在追踪循环所在线程中创建并调用 start()，每处理完一帧调用 frame_done()。
+    """
+
+    def __init__(self, frames: int, output_dir: str, mode: str = "sample",
+                 interval: float = 0.005, label: str = "profile"):
+        """
+        Args:
+            frames: 剖析的帧数
+            output_dir: 输出目录（通常为 LogConfig.LOG_DIR）
+            mode: "sample" 只做采样；"cprofile" 在采样之外叠加 cProfile
+            interval: 采样间隔（秒）
+            label: 输出文件名前缀
+        """
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"未知的剖析模式: {mode}")
+        if frames <= 0:
+            raise ValueError("剖析帧数必须为正数")
+        self.frames = frames
+        self.output_dir = output_dir
+        self.mode = mode
+        self.label = label
+        self.frames_done = 0
+        self.sampler = StackSampler(threading.get_ident(), interval)
+        self.cprofile = cProfile.Profile() if mode == "cprofile" else None
+        self.start_time = None
+        self.elapsed = 0.0
+        self.output_files = None
+
+    def start(self):
+        self.start_time = time.perf_counter()
+        self.sampler.start()
+        if self.cprofile is not None:
+            self.cprofile.enable()
+
+    def frame_done(self) -> bool:
+        """
+        记录一帧处理完成
+
+        Returns:
+            达到帧数、结果已写出时为 True
+        """
+        self.frames_done += 1
+        if self.frames_done < self.frames:
+            return False
+        self.stop()
+        return True
+
+    def stop(self) -> Optional[Dict[str, str]]:
+        """停止剖析并写出结果（可提前调用，重复调用无副作用）"""
+        if self.output_files is not None:
+            return self.output_files
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        self.sampler.stop()
+        self.elapsed = time.perf_counter() - self.start_time if self.start_time else 0.0
+        self.output_files = self._write_outputs()
+        return self.output_files
+
+    def _write_outputs(self) -> Dict[str, str]:
+        """写出折叠栈、函数耗时表（以及 cProfile 原始数据）"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"{self.label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
+        files = {'collapsed': f"{base}.collapsed", 'table': f"{base}_functions.txt"}
+
+        with open(files['collapsed'], 'w', encoding='utf-8') as f:
+            f.write(self.sampler.collapsed())
+
+        fps = self.frames_done / self.elapsed if self.elapsed > 0 else 0.0
+        lines = [
+            f"# {self.frames_done} 帧, {self.elapsed:.2f}s ({fps:.1f}fps), "
+            f"{self.sampler.samples} 个样本, 采样间隔 {self.sampler.interval * 1000:.1f}ms",
+            "",
+            f"{'self%':>7} {'total%':>7} {'self':>6} {'total':>6}  function",
+        ]
+        for row in self.sampler.function_table():
+            lines.append(f"{row['self_pct']:7.1f} {row['total_pct']:7.1f} {row['self']:6d} {row['total']:6d}  "
+                         f"{row['function']}")
+
+        if self.cprofile is not None:
+            files['pstats'] = f"{base}.prof"
+            self.cprofile.dump_stats(files['pstats'])
+            stream = io.StringIO()
+            pstats.Stats(self.cprofile, stream=stream).sort_stats("cumulative").print_stats(40)
+            lines += ["", "# cProfile（按累计耗时排序）", stream.getvalue()]
+
+        with open(files['table'], 'w', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+        return files
@@ -0,0 +1,170 @@
+"""
+质量调节器
+按 SoC 温度与帧处理耗时逐级调整处理质量：过热或处理耗时超出帧间隔时降一级，持续有余量时升一级
+
+质量档位由 JetsonConfig.QUALITY_LEVELS 定义（从高到低），每档给出四象限检测的金字塔层数
+与可视化刷新频率倍率。温度从 sysfs thermal_zone 文件读取（毫摄氏度），路径可注入，
+读不到温度时只按处理耗时调节。
+"""
+
+import logging
+import time
+from typing import Callable, List, Optional
+
+try:
+    from config import CameraConfig, JetsonConfig
+except ImportError:
+    class CameraConfig:
+        FPS = 30
+
+    class JetsonConfig:
+        THERMAL_ZONE_PATHS = [
+            "/sys/devices/virtual/thermal/thermal_zone0/temp",
+            "/sys/devices/virtual/thermal/thermal_zone1/temp"
+        ]
+        MAX_TEMPERATURE_CELSIUS = 85
+        TEMPERATURE_CHECK_INTERVAL = 30
+        THERMAL_THROTTLE_MARGIN = 10
+        THERMAL_RECOVER_HYSTERESIS = 5
+        QUALITY_LATENCY_HEADROOM = 0.6
+        QUALITY_STEP_INTERVAL = 2.0
+        QUALITY_RECOVER_HOLD = 10.0
+        QUALITY_LEVELS = [
+            {"name": "full", "pyramid_level": 0, "visualization_scale": 1.0},
+            {"name": "reduced_display", "pyramid_level": 0, "visualization_scale": 0.4},
+            {"name": "half_resolution", "pyramid_level": 1, "visualization_scale": 0.4},
+            {"name": "minimal", "pyramid_level": 1, "visualization_scale": 0.0},
+        ]
+
+# 帧处理耗时指数平滑系数
+LATENCY_ALPHA = 0.1
+
+
+def read_temperature_celsius(paths: List[str]) -> Optional[float]:
+    """读取各 thermal_zone 温度，返回最高值（摄氏度），均不可读时为 None"""
+    temperatures = []
+    for path in paths:
+        try:
+            with open(path) as f:
+                value = float(f.read().strip())
+        except (OSError, ValueError):
+            continue
+        temperatures.append(value / 1000.0 if value > 200 else value)  # sysfs 单位为毫摄氏度
+    return max(temperatures) if temperatures else None
+
+
+class QualityGovernor:
+    """
+    质量调节器：每帧调用 frame_done(处理耗时)，档位变化时回调 on_change(档位设置)
+
+    降级立即生效（受最短调整间隔限制）；升级要求温度低于降级温度一个回差、
+    且平滑耗时低于帧间隔的 latency_headroom 倍，并持续 recover_hold 秒。
+    """
+
+    def __init__(self, levels: Optional[List[dict]] = None, thermal_paths: Optional[List[str]] = None,
+                 max_temperature: Optional[float] = None, frame_budget: Optional[float] = None,
+                 on_change: Optional[Callable[[dict], None]] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            levels: 质量档位（从高到低），默认 JetsonConfig.QUALITY_LEVELS
+            thermal_paths: thermal_zone 温度文件路径，默认 JetsonConfig.THERMAL_ZONE_PATHS
+            max_temperature: 最大工作温度 (°C)，默认 JetsonConfig.MAX_TEMPERATURE_CELSIUS
+            frame_budget: 每帧处理耗时预算（秒），默认 1/CameraConfig.FPS
+            on_change: 档位变化回调 on_change(settings)
+            clock: 时钟函数（测试时可注入）
+        """
+        self.levels = levels or JetsonConfig.QUALITY_LEVELS
+        self.thermal_paths = thermal_paths if thermal_paths is not None else JetsonConfig.THERMAL_ZONE_PATHS
+        self.max_temperature = max_temperature if max_temperature is not None else JetsonConfig.MAX_TEMPERATURE_CELSIUS
+        self.frame_budget = frame_budget or 1.0 / CameraConfig.FPS
+        self.on_change = on_change
+        self.clock = clock
+        self.logger = logging.getLogger(__name__)
+
+        self.throttle_temperature = self.max_temperature - JetsonConfig.THERMAL_THROTTLE_MARGIN
+        self.recover_temperature = self.throttle_temperature - JetsonConfig.THERMAL_RECOVER_HYSTERESIS
+
+        self.level = 0
+        self.temperature = None
+        self.latency = None  # 平滑后的帧处理耗时（秒）
+        self._last_thermal_check = None
+        self._last_step = None
+        self._headroom_since = None
+
+        self.stats = {
+            'step_downs': 0,
+            'step_ups': 0,
+            'last_reason': None,
+        }
+
+    @property
+    def settings(self) -> dict:
+        """当前档位设置"""
+        return self.levels[self.level]
+
+    def frame_done(self, frame_time: float) -> bool:
+        """
+        记录一帧处理耗时，到期时读取温度并按需调整档位
+
+        Returns:
+            档位是否变化
+        """
+        if self.latency is None:
+            self.latency = frame_time
+        else:
+            self.latency += LATENCY_ALPHA * (frame_time - self.latency)
+
+        now = self.clock()
+        if self._last_thermal_check is None or now - self._last_thermal_check >= JetsonConfig.TEMPERATURE_CHECK_INTERVAL:
+            self._last_thermal_check = now
+            self.temperature = read_temperature_celsius(self.thermal_paths)
+        return self._evaluate(now)
+
+    def _evaluate(self, now: float) -> bool:
+        can_step = self._last_step is None or now - self._last_step >= JetsonConfig.QUALITY_STEP_INTERVAL
+        hot = self.temperature is not None and self.temperature >= self.throttle_temperature
+        slow = self.latency > self.frame_budget
+        if hot or slow:
+            self._headroom_since = None
+            if self.level < len(self.levels) - 1 and can_step:
+                reason = f"温度 {self.temperature:.1f}°C" if hot else f"帧处理耗时 {self.latency * 1000:.1f}ms"
+                return self._set_level(self.level + 1, reason, now)
+            return False
+
+        cool = self.temperature is None or self.temperature < self.recover_temperature
+        fast = self.latency < self.frame_budget * JetsonConfig.QUALITY_LATENCY_HEADROOM
+        if self.level == 0 or not (cool and fast):
+            self._headroom_since = None
+            return False
+        if self._headroom_since is None:
+            self._headroom_since = now
+        if now - self._headroom_since >= JetsonConfig.QUALITY_RECOVER_HOLD and can_step:
+            self._headroom_since = now  # 每升一级重新计时
+            return self._set_level(self.level - 1, "温度与耗时有余量", now)
+        return False
+
+    def _set_level(self, level: int, reason: str, now: float) -> bool:
+        step = 'step_downs' if level > self.level else 'step_ups'
+        self.stats[step] += 1
+        self.stats['last_reason'] = reason
+        self.level = level
+        self._last_step = now
+        log = self.logger.warning if step == 'step_downs' else self.logger.info
+        log(f"处理质量切换为 {self.settings['name']} (档位 {level}): {reason}")
+        if self.on_change is not None:
+            self.on_change(self.settings)
+        return True
+
+    def get_status(self) -> dict:
+        """调节器状态（供系统状态输出）"""
+        return {
+            'level': self.level,
+            'name': self.settings['name'],
+            'settings': dict(self.settings),
+            'temperature_c': self.temperature,
+            'throttle_temperature_c': self.throttle_temperature,
+            'latency_ms': self.latency * 1000 if self.latency is not None else None,
+            'budget_ms': self.frame_budget * 1000,
+            **self.stats,
+        }
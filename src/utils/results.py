@@ -0,0 +1,187 @@
+"""
+结果结构体模块
+追踪、避障与转向决策的定长结果类型，带紧凑二进制序列化
+
+使用 __slots__ 固定字段（不为每个实例分配 __dict__），字段只存 Python 原生类型，
+to_dict() 可直接 json.dumps，to_bytes()/from_bytes() 用于进程间传输、日志与重放。
+"""
+
+import math
+import struct
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# 威胁等级按严重程度排序，二进制中存序号
+THREAT_LEVELS = ("none", "caution", "warning", "critical")
+TURN_DIRECTIONS = ("left", "right", "straight", "unknown")
+CONTROL_MODES = ("auto", "manual")
+
+
+def _nan_if_none(value: Optional[float]) -> float:
+    return float('nan') if value is None else float(value)
+
+
+def _none_if_nan(value: float) -> Optional[float]:
+    return None if math.isnan(value) else value
+
+
+def line_coords(line) -> Optional[np.ndarray]:
+    """
+    四象限直线条目的坐标 [x1, y1, x2, y2]（float32）
+
+    None 或不是恰好 4 个值的条目（例如部分视角退回时放入的轮廓点集）返回 None，
+    序列化时按缺失处理，不能当作直线。
+    """
+    if line is None:
+        return None
+    coords = np.asarray(line, dtype=np.float32).ravel()
+    return coords if coords.size == 4 else None
+
+
+class _SlotsRecord:
+    """按 __slots__ 提供 to_dict / 比较 / repr 的基类"""
+
+    __slots__ = ()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return self.to_dict() == other.to_dict()
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class ObstacleAnalysis(_SlotsRecord):
+    """障碍物威胁分析结果（距离单位 mm）"""
+
+    __slots__ = ('threat_level', 'min_distance', 'total_obstacle_pixels', 'center_obstacle_pixels',
+                 'obstacle_density', 'center_obstacle_density', 'timestamp')
+
+    # 威胁序号, 最近距离, 障碍像素, 中央障碍像素, 密度, 中央密度, 时间戳(NaN 表示无)
+    _STRUCT = struct.Struct('<bdqqddd')
+
+    def __init__(self, threat_level: str = "none", min_distance: float = float('inf'),
+                 total_obstacle_pixels: int = 0, center_obstacle_pixels: int = 0,
+                 obstacle_density: float = 0.0, center_obstacle_density: float = 0.0,
+                 timestamp: Optional[float] = None):
+        if threat_level not in THREAT_LEVELS:
+            raise ValueError(f"未知的威胁等级: {threat_level}")
+        self.threat_level = threat_level
+        self.min_distance = float(min_distance)
+        self.total_obstacle_pixels = int(total_obstacle_pixels)
+        self.center_obstacle_pixels = int(center_obstacle_pixels)
+        self.obstacle_density = float(obstacle_density)
+        self.center_obstacle_density = float(center_obstacle_density)
+        self.timestamp = timestamp  # 深度帧曝光时刻（秒），由高频避障回路填写
+
+    @property
+    def severity(self) -> int:
+        """威胁严重程度序号，数值越大越危险"""
+        return THREAT_LEVELS.index(self.threat_level)
+
+    def to_bytes(self) -> bytes:
+        return self._STRUCT.pack(self.severity, self.min_distance, self.total_obstacle_pixels,
+                                 self.center_obstacle_pixels, self.obstacle_density,
+                                 self.center_obstacle_density, _nan_if_none(self.timestamp))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'ObstacleAnalysis':
+        level, distance, total, center, density, center_density, timestamp = cls._STRUCT.unpack(data)
+        return cls(THREAT_LEVELS[level], distance, total, center, density, center_density,
+                   _none_if_nan(timestamp))
+
+
+class TurnDecision(_SlotsRecord):
+    """转向控制决策"""
+
+    __slots__ = ('direction', 'confidence', 'mode', 'axis_angle', 'timestamp')
+
+    # 方向序号, 模式序号, 置信度, 轴线偏角, 时间戳（NaN 表示无）
+    _STRUCT = struct.Struct('<bbddd')
+
+    def __init__(self, direction: str, confidence: float, mode: str = "auto",
+                 axis_angle: Optional[float] = None, timestamp: Optional[float] = None):
+        self.direction = direction
+        self.confidence = float(confidence)
+        self.mode = mode
+        self.axis_angle = None if axis_angle is None else float(axis_angle)
+        self.timestamp = timestamp
+
+    def to_bytes(self) -> bytes:
+        return self._STRUCT.pack(TURN_DIRECTIONS.index(self.direction), CONTROL_MODES.index(self.mode),
+                                 self.confidence, _nan_if_none(self.axis_angle), _nan_if_none(self.timestamp))
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'TurnDecision':
+        direction, mode, confidence, axis_angle, timestamp = cls._STRUCT.unpack(data)
+        return cls(TURN_DIRECTIONS[direction], confidence, CONTROL_MODES[mode],
+                   _none_if_nan(axis_angle), _none_if_nan(timestamp))
+
+
+class TrackingResult(_SlotsRecord):
+    """
+    单帧管道追踪结果
+
+    line_params 为四象限直线 [[x1,y1,x2,y2] 或 None] * 4，global_axis 为 (N,3) 轴线点。
+    prediction_info 只在进程内使用，不参与二进制序列化。
+    """
+
+    __slots__ = ('line_params', 'global_axis', 'prediction_info', 'frame_number', 'capture_time')
+
+    # 帧号, 曝光时刻, 直线存在位掩码, 轴线点数；其后为 4x4 float32 直线与 N x 3 float32 轴线
+    _HEADER = struct.Struct('<qdBI')
+    _LINES_SIZE = 4 * 4 * 4
+
+    def __init__(self, line_params: Optional[List] = None, global_axis: Optional[np.ndarray] = None,
+                 prediction_info: Optional[dict] = None, frame_number: int = -1,
+                 capture_time: Optional[float] = None):
+        self.line_params = line_params
+        self.global_axis = global_axis
+        self.prediction_info = prediction_info
+        self.frame_number = int(frame_number)
+        self.capture_time = capture_time
+
+    @property
+    def has_axis(self) -> bool:
+        return self.global_axis is not None and len(self.global_axis) > 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        result = super().to_dict()
+        if self.global_axis is not None:
+            result['global_axis'] = np.asarray(self.global_axis).tolist()
+        return result
+
+    def to_bytes(self) -> bytes:
+        lines = np.full((4, 4), np.nan, dtype='<f4')
+        mask = 0
+        for i, line in enumerate((self.line_params or [])[:4]):
+            coords = line_coords(line)
+            if coords is not None:
+                lines[i] = coords
+                mask |= 1 << i
+        axis = (np.asarray(self.global_axis, dtype='<f4')[:, :3] if self.global_axis is not None
+                else np.empty((0, 3), dtype='<f4'))
+        header = self._HEADER.pack(self.frame_number, _nan_if_none(self.capture_time), mask, len(axis))
+        return header + lines.tobytes() + np.ascontiguousarray(axis).tobytes()
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'TrackingResult':
+        frame_number, capture_time, mask, axis_count = cls._HEADER.unpack_from(data)
+        offset = cls._HEADER.size
+        lines = np.frombuffer(data, dtype='<f4', count=16, offset=offset).reshape(4, 4)
+        offset += cls._LINES_SIZE
+
+        line_params = None
+        if mask:
+            line_params = [[float(v) for v in lines[i]] if mask & (1 << i) else None for i in range(4)]
+        global_axis = None
+        if axis_count:
+            global_axis = np.frombuffer(data, dtype='<f4', count=axis_count * 3,
+                                        offset=offset).reshape(-1, 3).astype(np.float64)
+        return cls(line_params, global_axis, None, frame_number, _none_if_nan(capture_time))
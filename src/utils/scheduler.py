@@ -0,0 +1,152 @@
+"""
+帧调度模块
+为每帧设定由相机帧率推出的截止时间，预计超时时降级处理，保证从曝光到下发命令的最坏延迟有界
+
+截止时间从帧的曝光时刻算起；各阶段（四象限追踪、含部分视角退回的追踪、可视化）的耗时按指数平滑预测，
+剩余时间不够时依次降级：跳过可视化 -> 禁止部分视角退回 -> 不追踪、复用上一帧轴线（连续复用次数有上限）。
+"""
+
+import time
+from typing import Callable, Dict, Optional
+
+try:
+    from config import CameraConfig, PerformanceConfig
+except ImportError:
+    class CameraConfig:
+        FPS = 30
+
+    class PerformanceConfig:
+        SCHEDULER_DEADLINE_FRAMES = 2.0
+        SCHEDULER_COST_MARGIN = 1.2
+        SCHEDULER_MAX_AXIS_REUSE = 2
+
+STAGES = ("track", "track_fallback", "visualize")
+DEGRADATIONS = ("skip_visualization", "skip_partial", "reuse_axis")
+
+# 阶段耗时指数平滑系数
+COST_ALPHA = 0.2
+# 曝光时刻与当前时刻相差超过该值（秒）或在未来时视为不可信（时钟域不一致），改从取到帧的时刻算起
+MAX_CAPTURE_AGE = 1.0
+
+
+class FramePlan:
+    """单帧处理计划"""
+
+    __slots__ = ('start', 'deadline', 'track', 'partial_fallback', 'visualize')
+
+    def __init__(self, start: float, deadline: float):
+        self.start = start  # 截止时间的起点（曝光时刻，秒）
+        self.deadline = deadline
+        self.track = True  # False 时不追踪，复用上一帧轴线
+        self.partial_fallback = True  # 是否允许部分视角退回
+        self.visualize = True  # 是否允许本帧生成可视化
+
+
+class FrameScheduler:
+    """
+    截止时间驱动的帧调度器
+
+    每帧取到图像后调用 plan(曝光时刻) 得到处理计划，各阶段完成后 record(阶段, 耗时)，
+    实际发生降级时 degraded(类别)，命令下发后 finish(plan) 统计是否超过截止时间。
+    """
+
+    def __init__(self, budget: Optional[float] = None, margin: Optional[float] = None,
+                 max_axis_reuse: Optional[int] = None, clock: Callable[[], float] = time.time):
+        """
+        Args:
+            budget: 每帧从曝光到下发命令的时间预算（秒），
+                    默认 PerformanceConfig.SCHEDULER_DEADLINE_FRAMES / CameraConfig.FPS
+            margin: 预测耗时的安全系数
+            max_axis_reuse: 最多连续复用上一帧轴线的帧数
+            clock: 时钟函数，须与帧曝光时刻同一时钟（time.time），测试时可注入
+        """
+        self.budget = budget or PerformanceConfig.SCHEDULER_DEADLINE_FRAMES / CameraConfig.FPS
+        self.margin = margin if margin is not None else PerformanceConfig.SCHEDULER_COST_MARGIN
+        self.max_axis_reuse = max_axis_reuse if max_axis_reuse is not None else PerformanceConfig.SCHEDULER_MAX_AXIS_REUSE
+        self.clock = clock
+
+        self.estimates: Dict[str, Optional[float]] = {stage: None for stage in STAGES}  # 各阶段预测耗时（秒）
+        self._consecutive_reuse = 0
+        self._frame_degraded = False
+
+        self.stats = {
+            'frames': 0,
+            'deadline_misses': 0,
+            'degraded_frames': 0,
+            'worst_latency_ms': 0.0,
+            'last_latency_ms': None,
+            **{name: 0 for name in DEGRADATIONS},
+        }
+
+    def _estimate(self, stage: str) -> float:
+        return (self.estimates[stage] or 0.0) * self.margin
+
+    def plan(self, capture_time: Optional[float] = None, can_reuse: bool = False) -> FramePlan:
+        """
+        为刚取到的帧制定处理计划
+
+        Args:
+            capture_time: 帧曝光时刻（秒，time.time 时钟），未知时从当前时刻算起
+            can_reuse: 是否有上一帧的轴线可以复用
+        """
+        self._frame_degraded = False
+        now = self.clock()
+        start = capture_time if capture_time is not None and 0.0 <= now - capture_time <= MAX_CAPTURE_AGE else now
+        plan = FramePlan(start, start + self.budget)
+        remaining = plan.deadline - now
+
+        track_cost = self._estimate('track')
+        if remaining < track_cost and can_reuse and self._consecutive_reuse < self.max_axis_reuse:
+            plan.track = False
+            plan.partial_fallback = False
+            self._consecutive_reuse += 1
+        else:
+            self._consecutive_reuse = 0
+            fallback_cost = max(self._estimate('track_fallback'), track_cost)
+            plan.partial_fallback = remaining >= fallback_cost
+            remaining -= track_cost
+        plan.visualize = remaining >= self._estimate('visualize')
+
+        if not plan.track:
+            self.degraded('reuse_axis')
+        return plan
+
+    def record(self, stage: str, seconds: float):
+        """记录一个阶段的实际耗时，更新预测"""
+        estimate = self.estimates[stage]
+        self.estimates[stage] = seconds if estimate is None else estimate + COST_ALPHA * (seconds - estimate)
+
+    def degraded(self, kind: str):
+        """记录一次实际发生的降级（跳过的可视化、被禁止的部分视角退回、复用的轴线）"""
+        self.stats[kind] += 1
+        self._frame_degraded = True
+
+    def finish(self, plan: FramePlan) -> bool:
+        """
+        本帧命令已下发：统计延迟与是否超过截止时间
+
+        Returns:
+            是否超过截止时间
+        """
+        now = self.clock()
+        latency_ms = (now - plan.start) * 1000.0
+        missed = now > plan.deadline
+        self.stats['frames'] += 1
+        self.stats['last_latency_ms'] = latency_ms
+        self.stats['worst_latency_ms'] = max(self.stats['worst_latency_ms'], latency_ms)
+        if missed:
+            self.stats['deadline_misses'] += 1
+        if self._frame_degraded:
+            self.stats['degraded_frames'] += 1
+        return missed
+
+    def get_stats(self) -> dict:
+        """调度统计：截止时间、超时与各类降级次数、各阶段预测耗时"""
+        frames = self.stats['frames']
+        return {
+            'budget_ms': self.budget * 1000.0,
+            'miss_rate': self.stats['deadline_misses'] / frames if frames else 0.0,
+            'estimates_ms': {stage: None if value is None else value * 1000.0
+                             for stage, value in self.estimates.items()},
+            **self.stats,
+        }
@@ -204,7 +204,7 @@ def test_perception_modules():
         detector = ObstacleDetector()
         mask = detector.detect(test_depth)
         analysis = detector.analyze_obstacle_threat(test_depth, mask)
-        print(f"   ✅ 障碍物检测: 威胁等级 {analysis['threat_level']}")
+        print(f"   ✅ 障碍物检测: 威胁等级 {analysis.threat_level}")
         
         # 测试管道追踪
         tracker = PipeTracker()
@@ -217,6 +217,1055 @@ def test_perception_modules():
         print(f"   ❌ 感知模块测试失败: {e}")
         return False
 
+def test_pipe_tracker_headless():
+    """测试管道追踪无头模式"""
+    print("🕶️ 测试管道追踪无头模式...")
+    
+    from src.perception.pipe_tracking import PipeTracker
+    
+    # 两条竖直管道边缘，贯穿四个象限
+    color = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.line(color, (200, 0), (220, 479), (255, 255, 255), 3)
+    cv2.line(color, (420, 0), (440, 479), (255, 255, 255), 3)
+    depth = np.full((480, 640), 1000, dtype=np.uint16)
+    
+    tracker = PipeTracker(visualize=False)
+    line_params, global_axis, vis_image, _ = tracker.track(color, depth)
+    assert vis_image is None
+    assert global_axis is not None
+    assert len(line_params) == 4
+    
+    # 可视化由独立消费者按需生成，且不修改原图
+    vis_image = tracker.render_visualization(color, line_params, global_axis, None)
+    assert vis_image.shape == color.shape and vis_image is not color
+    
+    # 有标定模型时输出去畸变坐标，绘制时映射回原始像素
+    from src.camera.undistort import CameraModel
+    model = CameraModel(np.array([[500.0, 0, 320.0], [0, 500.0, 240.0], [0, 0, 1]]),
+                        np.array([-0.2, 0.05, 0.0, 0.0, 0.0]), (640, 480))
+    queried = []
+    undistorting = PipeTracker(visualize=False, camera_model=model,
+                               depth_sampler=lambda d, p: queried.append(np.array(p)) or np.ones(len(p)))
+    control_lines, control_axis, _, _ = undistorting.track(color, depth)
+    assert np.allclose(queried[0], global_axis[:, :2])  # 深度按原始像素查询
+    assert np.allclose(control_lines[0], model.undistort_lines(line_params)[0])
+    image_lines, image_axis = undistorting._to_image_frame(control_lines, control_axis)
+    assert np.allclose(image_lines[0], line_params[0], atol=0.5)
+    assert np.allclose(image_axis[:, :2], global_axis[:, :2], atol=0.5)
+    
+    # 部分视角退回：轮廓点集（奇数个顶点）不按直线去畸变，轴线仍去畸变输出
+    partial = PipeTracker(visualize=False, camera_model=model)
+    partial.set_tracking_mode("partial_view")
+    blob = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.fillPoly(blob, [np.array([[200, 100], [420, 120], [380, 380]], dtype=np.int32)], (255, 255, 255))
+    partial_lines, partial_axis, _, _ = partial.track(blob)
+    assert partial.last_detection_method == "partial" and partial_axis is not None
+    assert partial_lines[0] is partial.last_partial_result['pipe_edges'][0]
+    odd_contour = np.array([[[10, 10]], [[20, 15]], [[30, 40]]], dtype=np.int32)
+    assert model.undistort_lines([odd_contour, [0, 0, 10, 10]])[0] is odd_contour
+    print("   ✅ 无头追踪只输出数值结果")
+    return True
+
+def test_usb_capture_rgb_tracking():
+    """测试USB采集后台取帧与纯RGB追踪路径（用录制视频代替真实相机）"""
+    print("📹 测试USB后台取帧与RGB追踪...")
+    
+    import tempfile
+    from src.camera.capture import USBCapture
+    from src.perception.pipe_tracking import PipeTracker
+    
+    color = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.line(color, (200, 0), (220, 479), (255, 255, 255), 3)
+    cv2.line(color, (420, 0), (440, 479), (255, 255, 255), 3)
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        video_path = os.path.join(tmp, "usb.avi")
+        writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (640, 480))
+        for _ in range(10):
+            writer.write(color)
+        writer.release()
+        
+        camera = USBCapture(video_path, threaded=True)
+        try:
+            frame, depth = camera.get_frames()
+            assert frame is not None and frame.shape == color.shape and depth is None
+            info = camera.get_frame_info()
+            assert info['timestamp_source'] == "arrival"
+            # 后台线程持续读帧，未被取走的旧帧计为跳过而不是排队
+            time.sleep(0.2)
+            stats = camera.get_frame_stats()
+            assert stats['frames'] == 10 and stats['skipped'] >= 1
+        finally:
+            camera.stop()
+    
+    # 无深度时追踪器走纯RGB路径
+    tracker = PipeTracker(visualize=False, depth_sampler=lambda d, p: np.ones(len(p)))
+    line_params, global_axis, _, _ = tracker.track(frame)
+    assert global_axis is not None and np.all(global_axis[:, 2] == 0)
+    print("   ✅ 最新帧采集与RGB追踪正常")
+    return True
+
+def test_turn_control_statistics():
+    """测试转向控制滚动统计"""
+    print("🧭 测试转向控制滚动统计...")
+    
+    from src.control.turn_control import TurnControlManager, TurnDirection
+    
+    controller = TurnControlManager(history_size=5, smoothing_window=3)
+    samples = [
+        (TurnDirection.LEFT, 0.9),
+        (TurnDirection.STRAIGHT, 0.7),
+        (TurnDirection.RIGHT, 0.8),
+        (TurnDirection.RIGHT, 0.6),
+        (TurnDirection.STRAIGHT, 0.7),
+        (TurnDirection.RIGHT, 0.9),
+        (TurnDirection.LEFT, 0.4),
+    ]
+    for direction, confidence in samples:
+        controller._update_turn_history(direction, confidence)
+        controller._update_statistics(direction, confidence)
+    
+    # 历史只保留最近5帧，平均置信度与逐项计算一致
+    recent = [c for _, c in samples[-5:]]
+    assert len(controller.turn_history) == 5
+    assert abs(controller.stats['average_confidence'] - sum(recent) / len(recent)) < 1e-9
+    
+    # 窗口(3帧): STRAIGHT 0.7, RIGHT 0.9, LEFT 0.4 -> RIGHT
+    direction, confidence = controller.get_smoothed_direction()
+    assert direction == TurnDirection.RIGHT and abs(confidence - 0.9) < 1e-9
+    
+    # 非配置窗口回退到逐项统计: 最近5帧 RIGHT 总置信度最高
+    direction, confidence = controller.get_smoothed_direction(window_size=5)
+    assert direction == TurnDirection.RIGHT and abs(confidence - (0.8 + 0.6 + 0.9) / 3) < 1e-9
+    
+    controller.reset_statistics()
+    assert controller.get_smoothed_direction() == (TurnDirection.UNKNOWN, 0.0)
+    print("   ✅ 滚动统计与逐项统计一致")
+    return True
+
+def test_turn_state_machine():
+    """测试转向状态机迟滞与决策重放"""
+    print("🔁 测试转向状态机...")
+    
+    from src.control.turn_control import TurnStateMachine, TurnDirection, TurnControlManager
+    
+    machine = TurnStateMachine(enter_angle=15, exit_angle=8, min_dwell_time=0.5, lost_hold_frames=2)
+    
+    # 阈值附近抖动不会进入转向
+    for i, angle in enumerate([5, 14, -14, 12]):
+        assert machine.update(angle, timestamp=i * 0.1) == TurnDirection.STRAIGHT
+    # 超过进入阈值，但驻留时间不足时保持原状态
+    assert machine.update(20, timestamp=0.45) == TurnDirection.STRAIGHT
+    assert machine.update(20, timestamp=0.6) == TurnDirection.RIGHT
+    # 回落到进入与退出阈值之间仍保持右转，低于退出阈值才回到直行
+    assert machine.update(10, timestamp=1.2) == TurnDirection.RIGHT
+    assert machine.update(3, timestamp=1.3) == TurnDirection.STRAIGHT
+    # 短暂丢失保持状态，持续丢失进入UNKNOWN
+    assert machine.update(None, timestamp=1.4) == TurnDirection.STRAIGHT
+    assert machine.update(None, timestamp=1.5) == TurnDirection.STRAIGHT
+    assert machine.update(None, timestamp=1.6) == TurnDirection.UNKNOWN
+    
+    # 决策日志可重放
+    log = machine.get_decision_log()
+    replayed = TurnStateMachine.replay(log, **machine.get_params())
+    assert replayed == [record['state'] for record in log]
+    
+    # 管理器从轴线点计算偏角：轴线向右上倾斜 -> 右转
+    controller = TurnControlManager()
+    axis = np.array([[300.0, 400.0, 0.0], [400.0, 200.0, 0.0]])
+    result = controller.process_frame(None, [[0, 0, 10, 10], None, None, None], axis, timestamp=0.0)
+    assert result.axis_angle > 15
+    result = controller.process_frame(None, None, axis, timestamp=1.0)
+    assert result.direction == 'right' and result.timestamp == 1.0
+    
+    # 无轴线时用直线平均偏角，与轴线偏角是同一物理量
+    lines = [[300, 400, 400, 200], None, None, [310, 400, 410, 200]]
+    assert abs(controller._line_heading(lines) - controller._axis_heading(axis)) < 1e-6
+    assert controller._line_heading([[0, 0, 0, -100], None, None, None]) == 0.0
+    assert controller._line_heading([np.zeros((5, 1, 2)), None, None, None]) is None  # 部分视角轮廓不是直线
+    print("   ✅ 迟滞、驻留时间与重放均符合预期")
+    return True
+
+def test_infrared_gray_tracking():
+    """测试红外灰度图直接追踪（与深度同视角，深度经降采样为一半分辨率）"""
+    print("🌑 测试红外灰度追踪...")
+    
+    from src.perception.pipe_tracking import PipeTracker
+    from src.camera.capture import sample_aligned_depth
+    
+    color = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.line(color, (200, 0), (220, 479), (255, 255, 255), 3)
+    cv2.line(color, (420, 0), (440, 479), (255, 255, 255), 3)
+    infrared = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY)
+    depth = np.full((240, 320), 1000, dtype=np.uint16)
+    
+    # 单通道输入与彩色输入得到相同的直线
+    color_lines, _, _, _ = PipeTracker(visualize=False).track(color, depth)
+    tracker = PipeTracker(visualize=False, depth_aligned=True)  # 红外与深度同视角
+    ir_lines, global_axis, _, _ = tracker.track(infrared, depth)
+    assert global_axis is not None and ir_lines == color_lines
+    vis_image = tracker.render_visualization(infrared, ir_lines, global_axis, None)
+    assert vis_image.shape == (480, 640, 3)
+    
+    # 图像坐标按降采样比例换算到深度图
+    depth[100, 250] = 650
+    sampled = sample_aligned_depth(depth, [[500, 200], [501, 201], [700, 200]], image_width=640)
+    assert np.isclose(sampled[0], 0.65) and np.isclose(sampled[1], 0.65) and np.isnan(sampled[2])
+    print("   ✅ 红外灰度图无需转换即可追踪")
+    return True
+
+def test_stream_profile_selection():
+    """测试按设备支持的配置直接选流与按序列号缓存"""
+    print("🚀 测试相机快速启动配置...")
+    import tempfile
+    from src.camera.capture import select_stream_config, plan_stream_configs, StreamProfileCache
+    
+    profiles = {("depth", 640, 480, 30), ("depth", 640, 480, 90), ("depth", 848, 480, 30),
+                ("color", 640, 480, 30), ("color", 848, 480, 30), ("color", 1280, 720, 15),
+                ("infrared", 640, 480, 30), ("infrared", 640, 480, 90)}
+    
+    # 请求配置可用时原样使用，深度帧率按设备支持
+    assert select_stream_config(profiles, 640, 480, 30, depth_fps=90) == (640, 480, 30, 90)
+    assert select_stream_config(profiles, 640, 480, 30, depth_fps=60) == (640, 480, 30, 30)
+    # 不可用时选最接近的分辨率（1280x720 没有同分辨率深度流）
+    assert select_stream_config(profiles, 1280, 720, 30) == (848, 480, 30, 30)
+    # 红外与深度同一传感器，帧率一致
+    assert select_stream_config(profiles, 640, 480, 30, depth_fps=90, stream="infrared") == (640, 480, 90, 90)
+    assert select_stream_config({("depth", 640, 480, 30)}, 640, 480, 30) is None
+    
+    # 配置已知时只尝试可用组合；未知时退回逐个尝试
+    assert plan_stream_configs(1280, 720, 30, profiles=profiles) == [(848, 480, 30, 30)]
+    assert len(plan_stream_configs(1280, 720, 30)) == 4
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = StreamProfileCache(os.path.join(tmp, "config", "profiles.json"))
+        request = ("color", 640, 480, 30, None)
+        assert cache.get("123", request) is None
+        cache.put("123", request, (848, 480, 30, 30))
+        assert cache.get("123", request) == (848, 480, 30, 30)
+        assert cache.get("123", ("color", 640, 480, 15, None)) is None  # 请求改变后失效
+        # 缓存配置排在最前
+        assert plan_stream_configs(640, 480, 30, profiles=profiles,
+                                   cached=cache.get("123", request))[0] == (848, 480, 30, 30)
+    print("   ✅ 无需试错即可选出启动配置")
+    return True
+
+def test_camera_watchdog():
+    """测试相机看门狗：退避、停车回调与后台重连"""
+    print("🐕 测试相机看门狗...")
+    
+    from src.camera.watchdog import CameraWatchdog
+    
+    class FakeCamera:
+        def __init__(self):
+            self.stopped = False
+        def stop(self):
+            self.stopped = True
+    
+    old_camera = FakeCamera()
+    attempts = []
+    def factory():
+        attempts.append(time.time())
+        if len(attempts) < 2:
+            raise RuntimeError("设备未就绪")
+        return FakeCamera()
+    
+    events = []
+    watchdog = CameraWatchdog(old_camera, factory, on_lost=lambda: events.append("lost"),
+                              on_restored=lambda camera: events.append(camera),
+                              max_failures=4, retry_backoff=(0.01, 0.03), reconnect_backoff=(0.05, 0.1))
+    try:
+        # 未达上限时按指数退避，成功一帧即清零
+        assert [watchdog.frame_failed() for _ in range(3)] == [0.01, 0.02, 0.03]
+        watchdog.frame_ok()
+        assert watchdog.get_status()['state'] == 'ok'
+        
+        # 连续失败达到上限：停车回调一次，后台重建（首次失败后退避重试）
+        for _ in range(3):
+            watchdog.frame_failed()
+        assert watchdog.frame_failed() == 0.0 and watchdog.is_reconnecting()
+        assert events == ["lost"] and watchdog.frame_failed() == 0.0
+        assert watchdog.wait_for_camera(timeout=5.0)
+        assert old_camera.stopped and len(attempts) == 2
+        assert attempts[1] - attempts[0] >= 0.04
+        assert isinstance(events[1], FakeCamera) and watchdog.camera is events[1]
+        status = watchdog.get_status()
+        assert status['state'] == 'ok' and status['reconnects'] == 1 and status['camera_lost'] == 1
+    finally:
+        watchdog.stop()
+    print(f"   ✅ 重连 {status['reconnect_attempts']} 次尝试后恢复，中断 {status['last_outage_s']:.2f}s")
+    return True
+
+def test_log_rate_limit():
+    """测试按调用位置的日志限频"""
+    print("🔇 测试日志限频...")
+    
+    import logging
+    from src.utils.logger import RateLimitFilter
+    
+    def record(lineno, created, level=logging.WARNING, msg="四象限检测失败，失败次数: %d", args=(1,)):
+        rec = logging.LogRecord("perception", level, "pipe_tracking.py", lineno, msg, args, None)
+        rec.created = created
+        return rec
+    
+    limiter = RateLimitFilter(interval=1.0, burst=2)
+    passed = [limiter.filter(record(10, 100.0 + i * 0.01)) for i in range(30)]
+    assert passed[:2] == [True, True] and not any(passed[2:])
+    assert limiter.filter(record(20, 100.2))  # 其他调用位置独立计数
+    assert limiter.filter(record(10, 100.5, logging.ERROR))  # 错误不限频
+    
+    # 下一窗口放行，并带上被抑制的条数
+    rec = record(10, 101.1)
+    assert limiter.filter(rec) and "已抑制 28 条" in rec.getMessage()
+    assert limiter.suppressed_total == 28
+    print("   ✅ 每处日志每秒最多输出2条")
+    return True
+
+def test_frame_profiler():
+    """测试帧窗口剖析输出折叠栈与函数耗时表"""
+    print("🔬 测试帧窗口剖析...")
+    
+    import tempfile
+    from src.utils.profiler import FrameProfiler
+    
+    def busy_frame():
+        end = time.perf_counter() + 0.02
+        while time.perf_counter() < end:
+            pass
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("sample", "cprofile"):
+            profiler = FrameProfiler(5, tmp, mode=mode, interval=0.001)
+            profiler.start()
+            done = [busy_frame() or profiler.frame_done() for _ in range(5)]
+            assert done == [False] * 4 + [True]
+            files = profiler.output_files
+            assert os.path.dirname(files['collapsed']) == tmp and ('pstats' in files) == (mode == "cprofile")
+            
+            with open(files['collapsed'], encoding='utf-8') as f:
+                stack, count = f.readline().rstrip().rsplit(" ", 1)
+            assert "busy_frame" in stack.split(";")[-1] and int(count) > 0
+            with open(files['table'], encoding='utf-8') as f:
+                table = f.read()
+            assert "5 帧" in table and "busy_frame" in table
+            assert profiler.stop() is files  # 重复调用不重复写出
+    print(f"   ✅ {profiler.sampler.samples} 个样本，热点为 busy_frame")
+    return True
+
+def test_memory_telemetry():
+    """测试内存遥测的基线、增长告警与 tracemalloc 热点"""
+    print("🧠 测试内存遥测...")
+    
+    import tracemalloc
+    from src.utils.memory import MemoryTelemetry, read_rss_bytes
+    
+    assert read_rss_bytes() > 0
+    mb = 1024 * 1024
+    now = [0.0]
+    rss = [500 * mb]
+    telemetry = MemoryTelemetry(interval=10.0, warmup=30.0, growth_warn_mb=100, trace=True,
+                                clock=lambda: now[0], rss_reader=lambda: rss[0])
+    telemetry.start()
+    try:
+        # 预热期内不定基线
+        now[0] = 10.0
+        assert telemetry.check()['growth_mb'] is None and telemetry.baseline_rss is None
+        now[0] = 30.0
+        telemetry.check()
+        assert telemetry.baseline_rss == 500 * mb
+        
+        # 每帧瞬时分配量：帧内临时数组计入峰值
+        leak = []
+        for _ in range(3):
+            telemetry.frame_start()
+            np.ones((512, 512), dtype=np.float64).sum()
+            leak.append(np.zeros(50000, dtype=np.uint8) + 1)
+            telemetry.frame_end()
+        stats = telemetry.get_stats()
+        if hasattr(tracemalloc, 'reset_peak'):
+            assert stats['frame_alloc_kb_max'] >= 2048
+        
+        # 跨过阈值告警一次，同一档内不重复告警；frame_end 到期自动检查
+        rss[0] = 650 * mb
+        now[0] = 45.0
+        telemetry.frame_end()
+        report = telemetry.last_report
+        assert telemetry.warnings == 1 and abs(report['growth_mb'] - 150) < 1e-6
+        assert any("test_system.py" in row['location'] for row in report['top_growth'])
+        now[0] = 60.0
+        rss[0] = 680 * mb
+        telemetry.check()
+        assert telemetry.warnings == 1
+        rss[0] = 720 * mb
+        telemetry.check()
+        assert telemetry.get_stats()['growth_warnings'] == 2
+    finally:
+        telemetry.stop()
+    assert not tracemalloc.is_tracing()
+    print(f"   ✅ 增长告警 {telemetry.warnings} 次，热点 {report['top_growth'][0]['location']}")
+    return True
+
+def test_quality_governor():
+    """测试质量调节器按温度/耗时降级与恢复，以及金字塔降采样检测"""
+    print("🌡️ 测试质量调节器...")
+    
+    import tempfile
+    from src.utils.quality import QualityGovernor, read_temperature_celsius, JetsonConfig
+    from src.perception.pipe_tracking import PipeTracker
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        # 伪造 sysfs thermal_zone 文件（毫摄氏度），不可读的路径被忽略
+        zones = [os.path.join(tmp, f"thermal_zone{i}") for i in range(2)]
+        
+        def set_temps(*values):
+            for path, value in zip(zones, values):
+                with open(path, 'w') as f:
+                    f.write(f"{value}\n")
+        
+        set_temps(45000, 52500)
+        assert read_temperature_celsius(zones + [os.path.join(tmp, "missing")]) == 52.5
+        
+        now = [0.0]
+        changes = []
+        governor = QualityGovernor(thermal_paths=zones, max_temperature=85, frame_budget=0.033,
+                                   on_change=changes.append, clock=lambda: now[0])
+        assert not governor.frame_done(0.010) and governor.level == 0
+        
+        # 过热：降一级，最短调整间隔内不连续降级
+        set_temps(45000, 80000)
+        now[0] = JetsonConfig.TEMPERATURE_CHECK_INTERVAL
+        assert governor.frame_done(0.010) and governor.level == 1
+        now[0] += 0.5
+        assert not governor.frame_done(0.010)
+        
+        # 降温但处理耗时超出帧间隔：继续降级直到最低档
+        set_temps(45000, 60000)
+        now[0] += JetsonConfig.TEMPERATURE_CHECK_INTERVAL
+        for _ in range(len(governor.levels) + 2):
+            governor.frame_done(0.200)
+            now[0] += JetsonConfig.QUALITY_STEP_INTERVAL
+        assert governor.level == len(governor.levels) - 1
+        assert changes[-1]['visualization_scale'] == 0.0 and governor.stats['step_downs'] == len(governor.levels) - 1
+        
+        # 有余量后需持续 QUALITY_RECOVER_HOLD 才升一级
+        for _ in range(60):
+            governor.frame_done(0.005)
+        assert governor.latency < 0.033 * JetsonConfig.QUALITY_LATENCY_HEADROOM
+        level = governor.level
+        now[0] += JetsonConfig.QUALITY_RECOVER_HOLD / 2
+        governor.frame_done(0.005)
+        assert governor.level == level
+        now[0] += JetsonConfig.QUALITY_RECOVER_HOLD
+        assert governor.frame_done(0.005) and governor.level == level - 1
+        status = governor.get_status()
+        assert status['temperature_c'] == 60.0 and status['step_ups'] == 1
+    
+    # 金字塔降采样后直线端点仍为原图坐标
+    color = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.line(color, (200, 0), (220, 479), (255, 255, 255), 3)
+    cv2.line(color, (420, 0), (440, 479), (255, 255, 255), 3)
+    tracker = PipeTracker(visualize=False)
+    tracker.pyramid_level = 1
+    line_params, global_axis, _, _ = tracker.track(color)
+    assert global_axis is not None
+    xs = [x for line in line_params if line is not None for x in (line[0], line[2])]
+    assert all(min(abs(x - 210), abs(x - 430)) <= 16 for x in xs) and max(xs) > 320
+    print(f"   ✅ 降级 {governor.stats['step_downs']} 次，恢复 {governor.stats['step_ups']} 次")
+    return True
+
+def test_gc_policy():
+    """测试垃圾回收策略：冻结、分代阈值、空闲时间回收与停顿统计"""
+    print("♻️ 测试垃圾回收策略...")
+    
+    import gc
+    from src.utils.gc_policy import GCPolicy
+    
+    class Node:
+        def __init__(self):
+            self.ref = self  # 自引用，只能由循环垃圾回收释放
+    
+    original = gc.get_threshold()
+    policy = GCPolicy(thresholds=(200, 5, 5), slack_fraction=0.5)
+    policy.apply()
+    try:
+        assert gc.get_threshold() == (200, 5, 5) and policy.stats['frozen_objects'] > 0
+        
+        # 计数达到阈值一半后，在空闲时间主动回收；没有空闲时间则不回收
+        for _ in range(150):
+            Node()
+        assert policy.collect_in_slack(0.0) is None
+        assert policy.collect_in_slack(1.0) is not None
+        assert policy.stats['slack_collections'] == 1 and policy.stats['collected'] >= 150
+        
+        # 不主动回收时由解释器按阈值自动回收，停顿同样被记录
+        for _ in range(1000):
+            Node()
+        stats = policy.get_stats()
+        assert stats['automatic_collections'] > 0 and stats['max_automatic_pause_ms'] >= 0
+        assert any(stage.endswith('_slack') for stage in stats['pauses'])
+        assert stats['estimated_pause_ms'][0] is not None
+    finally:
+        policy.stop()
+    assert gc.get_threshold() == original and policy._on_gc not in gc.callbacks
+    assert gc.get_freeze_count() == 0
+    print(f"   ✅ 空闲回收 {stats['slack_collections']} 次，自动回收 {stats['automatic_collections']} 次")
+    return True
+
+def test_frame_scheduler():
+    """测试截止时间帧调度：按预测耗时降级、复用轴线次数上限与超时统计"""
+    print("⏱️ 测试帧调度...")
+    
+    from src.utils.scheduler import FrameScheduler
+    from src.perception.pipe_tracking import PipeTracker
+    
+    now = [100.0]
+    scheduler = FrameScheduler(budget=0.066, margin=1.0, max_axis_reuse=2, clock=lambda: now[0])
+    
+    # 尚无耗时预测时完整处理；曝光时刻不可信（未来/过旧）时从当前时刻算起
+    plan = scheduler.plan(capture_time=now[0] + 5.0)
+    assert plan.track and plan.partial_fallback and plan.visualize and plan.start == now[0]
+    assert scheduler.plan(capture_time=now[0] - 10.0).start == now[0]
+    
+    scheduler.record("track", 0.020)
+    scheduler.record("track_fallback", 0.050)
+    scheduler.record("visualize", 0.020)
+    
+    # 剩余 36ms：追踪放得下，部分视角退回与可视化放不下
+    plan = scheduler.plan(capture_time=now[0] - 0.030, can_reuse=True)
+    assert plan.track and not plan.partial_fallback and not plan.visualize
+    now[0] += 0.040
+    assert scheduler.finish(plan) and scheduler.stats['deadline_misses'] == 1
+    
+    # 剩余时间连追踪都不够：复用上一帧轴线，连续复用不超过上限
+    reuse = [not scheduler.plan(capture_time=now[0] - 0.060, can_reuse=True).track for _ in range(4)]
+    assert reuse == [True, True, False, True]
+    assert scheduler.plan(capture_time=now[0] - 0.060, can_reuse=False).track
+    
+    # 充裕时完整处理，按时完成不计超时
+    plan = scheduler.plan(capture_time=now[0] - 0.005, can_reuse=True)
+    assert plan.track and plan.partial_fallback and plan.visualize
+    now[0] += 0.010
+    assert not scheduler.finish(plan)
+    stats = scheduler.get_stats()
+    assert stats['reuse_axis'] == 3 and stats['frames'] == 2 and abs(stats['worst_latency_ms'] - 70.0) < 1e-6
+    
+    # 追踪器禁止部分视角退回时直接返回失败并标记
+    tracker = PipeTracker(visualize=False)
+    tracker.quadrant_failure_count = tracker.max_failures_before_switch
+    blank = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.circle(blank, (320, 240), 80, (255, 255, 255), -1)
+    line_params, global_axis, _, _ = tracker.track(blank, allow_partial=False)
+    assert global_axis is None and tracker.last_partial_skipped and not tracker.last_partial_attempted
+    tracker.track(blank)
+    assert tracker.last_partial_attempted and tracker.last_detection_method == "partial"
+    print(f"   ✅ 超时 {stats['deadline_misses']}/{stats['frames']}，复用轴线 {stats['reuse_axis']} 次")
+    return True
+
+def test_camera_model_undistort():
+    """测试相机模型去畸变与映射表缓存"""
+    print("📐 测试相机模型去畸变...")
+    
+    import tempfile
+    from src.camera.undistort import CameraModel, load_camera_model
+    
+    mtx = np.array([[500.0, 0, 640.0], [0, 500.0, 480.0], [0, 0, 1]])
+    dist = np.array([[-0.2, 0.05, 0.0, 0.0, 0.0]])
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        calib_path = os.path.join(tmp, "intrinsics.npz")
+        np.savez(calib_path, mtx=mtx, dist=dist, image_size=np.array([1280, 960]))
+        
+        # 运行时分辨率减半，内参随之缩放，映射表缓存在标定文件旁
+        model = load_camera_model(calib_path, (640, 480))
+        assert np.allclose(model.intrinsics, [250.0, 250.0, 320.0, 240.0])
+        cache_path = model.map_cache_path()
+        assert os.path.exists(cache_path)
+        
+        cached = CameraModel.load(calib_path, (640, 480))
+        map1, map2 = cached.init_maps()
+        assert map1.dtype == np.int16 and map2.dtype == np.uint16
+        
+        # 稀疏端点去畸变与整图 remap 一致：把去畸变后的点重新投影回畸变图像
+        lines = [[120, 90, 560, 400], None]
+        undistorted = cached.undistort_lines(lines)
+        assert undistorted[1] is None
+        pts = np.array(undistorted[0], dtype=np.float64).reshape(-1, 2)
+        rays = np.column_stack([(pts - [320.0, 240.0]) / 250.0, np.ones(2)])
+        projected, _ = cv2.projectPoints(rays, np.zeros(3), np.zeros(3), cached.camera_matrix, cached.dist_coeffs)
+        assert np.allclose(projected.reshape(-1), lines[0], atol=0.5)
+        assert np.allclose(cached.distort_lines(undistorted)[0], lines[0], atol=0.5)  # 映射回原始像素用于绘制
+        
+        image = np.random.randint(0, 255, (480, 640), dtype=np.uint8)
+        assert cached.undistort_image(image).shape == image.shape
+    
+    print("   ✅ 内参缩放、映射表缓存与端点去畸变均正常")
+    return True
+
+def test_calibration_corner_cache():
+    """测试并行角点检测与角点缓存"""
+    print("🏁 测试标定角点并行检测与缓存...")
+    
+    import json
+    import tempfile
+    from src.camera import calibration
+    
+    # 7x5 内角点棋盘格，透视变换到 1280x960 的多个视角（宽度超过预检测宽度，先走缩小图快速检测）
+    board = np.full((560, 760), 255, dtype=np.uint8)
+    for r in range(6):
+        for c in range(8):
+            if (r + c) % 2 == 0:
+                board[40 + r * 80:40 + (r + 1) * 80, 60 + c * 80:60 + (c + 1) * 80] = 0
+    src_quad = np.float32([[0, 0], [760, 0], [760, 560], [0, 560]])
+    views = [
+        [[300, 200], [980, 220], [960, 740], [320, 760]],
+        [[200, 150], [900, 250], [880, 700], [220, 820]],
+        [[380, 180], [1100, 160], [1060, 780], [340, 740]],
+        [[250, 300], [950, 180], [1000, 800], [280, 700]],
+        [[320, 120], [1000, 200], [1050, 720], [300, 820]],
+        [[150, 220], [850, 160], [900, 760], [200, 800]],
+    ]
+    
+    with tempfile.TemporaryDirectory() as tmp:
+        images_dir = os.path.join(tmp, "images")
+        os.makedirs(images_dir)
+        for i, quad in enumerate(views):
+            warp = cv2.getPerspectiveTransform(src_quad, np.float32(quad))
+            image = cv2.warpPerspective(board, warp, (1280, 960), borderValue=255)
+            cv2.imwrite(os.path.join(images_dir, f"view_{i}.jpg"), image)
+        cv2.imwrite(os.path.join(images_dir, "blank.jpg"), np.full((960, 1280), 255, dtype=np.uint8))
+        
+        save_path = os.path.join(tmp, "out", "intrinsics.npz")
+        mtx, dist = calibration.calibrate_camera(images_dir, (7, 5), 0.025, save_path,
+                                                 show_corners=False, workers=2)
+        assert mtx is not None and os.path.exists(save_path)
+        with open(os.path.join(tmp, "out", calibration.CORNER_CACHE_FILENAME), encoding='utf-8') as f:
+            cache = json.load(f)
+        assert cache['detector_version'] == calibration.CORNER_DETECTOR_VERSION
+        assert sorted(entry['found'] for entry in cache['entries'].values()) == [False] + [True] * len(views)
+        
+        # 第二次标定全部命中缓存，不再检测
+        detect = calibration._detect_chessboard_corners
+        calibration._detect_chessboard_corners = None
+        try:
+            mtx_cached, _ = calibration.calibrate_camera(images_dir, (7, 5), 0.025, save_path,
+                                                         show_corners=False, workers=2)
+        finally:
+            calibration._detect_chessboard_corners = detect
+        assert np.allclose(mtx_cached, mtx)
+        
+        # 旧版本检测流程的缓存（可能含快速预检的漏检）不再使用
+        cache['detector_version'] = calibration.CORNER_DETECTOR_VERSION - 1
+        cache_path = os.path.join(tmp, "out", calibration.CORNER_CACHE_FILENAME)
+        with open(cache_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f)
+        assert calibration._load_corner_cache(cache_path, (7, 5)) == {}
+    
+    print("   ✅ 并行检测、缓存命中与缓存失效均正常")
+    return True
+
+def test_depth_color_projection():
+    """测试未对齐深度上的稀疏像素投影"""
+    print("🎯 测试深度-彩色稀疏投影...")
+    
+    from src.camera.projection import StreamIntrinsics, DepthColorProjector
+    from src.camera.capture import sample_aligned_depth
+    
+    depth_intr = StreamIntrinsics(640, 480, 390.0, 390.0, 320.0, 240.0)
+    color_intr = StreamIntrinsics(640, 480, 600.0, 600.0, 330.0, 235.0)
+    # 深度相机在彩色相机左侧 5.9cm
+    projector = DepthColorProjector(depth_intr, color_intr, (np.eye(3), [-0.059, 0.0, 0.0]))
+    
+    # 1.5米处的正对平面，右半部分是0.8米处的障碍物
+    depth = np.full((480, 640), 1500, dtype=np.uint16)
+    depth[:, 400:] = 800
+    depth[:100, :] = 0  # 顶部无效
+    
+    pixels = np.array([[100.0, 200.0], [330.0, 235.0], [600.0, 300.0], [300.0, 5.0]])
+    depths = projector.depth_at_color_pixels(depth, pixels)
+    assert np.allclose(depths[:2], 1.5, atol=1e-3)
+    assert np.isclose(depths[2], 0.8, atol=1e-3)
+    assert np.isnan(depths[3])
+    
+    # 查询像素的深度图对应点满足 u_d = (u_c - cx_c) * fx_d / fx_c + cx_d - fx_d * tx / z
+    depth_pixels = projector.color_to_depth_pixels(depth, pixels[:1])
+    expected_u = (100.0 - 330.0) * 390.0 / 600.0 + 320.0 + 390.0 * 0.059 / 1.5
+    assert abs(depth_pixels[0, 0] - expected_u) <= 1.0
+    
+    # 已对齐模式直接取值
+    aligned = sample_aligned_depth(depth, [[10, 200], [500, 200], [700, 200]])
+    assert np.isclose(aligned[0], 1.5) and np.isclose(aligned[1], 0.8) and np.isnan(aligned[2])
+    print("   ✅ 只投影查询像素即可得到正确深度")
+    return True
+
+def test_depth_filter_chain():
+    """测试深度滤波链顺序、耗时统计及降采样深度下的障碍物检测"""
+    print("🧹 测试深度滤波链...")
+    
+    from src.camera.capture import DepthFilterChain
+    from src.perception.obstacle_detection import ObstacleDetector
+    
+    calls = []
+    
+    class FakeFilter:
+        def __init__(self, name, options):
+            self.name = name
+            self.options = options
+        
+        def process(self, frame):
+            calls.append(self.name)
+            return frame[::2, ::2] if self.name == "decimation" else frame
+    
+    specs = [("decimation", {"filter_magnitude": 2}), ("threshold", {}), ("threshold", {"max_distance": 4.0})]
+    chain = DepthFilterChain(specs, filter_factory=FakeFilter)
+    depth = np.full((480, 640), 2000, dtype=np.uint16)
+    depth[200:300, 300:400] = 400
+    filtered = chain.process(depth)
+    assert filtered.shape == (240, 320)
+    assert calls == ["decimation", "threshold", "threshold"]
+    
+    stats = chain.get_stats()
+    assert list(stats) == ["decimation", "threshold", "threshold#2"]
+    assert all(entry["count"] == 1 and entry["avg_ms"] >= 0 for entry in stats.values())
+    
+    # 降采样后的深度直接检测，面积阈值与叠加显示随分辨率换算
+    detector = ObstacleDetector(depth_threshold=1000, denoise=False)
+    mask = detector.detect(filtered)
+    assert np.sum(mask > 0) == 50 * 50
+    assert detector.scaled_area(100, mask) == 25
+    analysis = detector.analyze_obstacle_threat(filtered, mask)
+    assert analysis.threat_level == "critical"
+    overlay = detector.draw_obstacles(np.zeros((480, 640, 3), dtype=np.uint8), mask, analysis)
+    assert overlay.shape == (480, 640, 3)
+    print("   ✅ 滤波顺序、耗时统计和降采样检测均正常")
+    return True
+
+def test_obstacle_monitor():
+    """测试高频避障回路的抢占、限频与丢帧统计"""
+    print("🛑 测试高频障碍物监测...")
+    
+    from src.perception.obstacle_detection import ObstacleDetector
+    from src.perception.obstacle_monitor import ObstacleMonitor
+    
+    threats = []
+    detector = ObstacleDetector(depth_threshold=1000, critical_distance=500, warning_distance=1500)
+    monitor = ObstacleMonitor(detector, on_threat=threats.append, hold_time=0.3, command_interval=0.2)
+    
+    clear = np.full((240, 320), 3000, dtype=np.uint16)
+    blocked = clear.copy()
+    blocked[100:160, 130:190] = 400
+    
+    assert monitor.process(clear).threat_level == 'none'
+    assert not monitor.is_preempting() and threats == []
+    
+    # 危险帧立即回调并进入抢占；连续危险帧按间隔限频
+    assert monitor.process(blocked).threat_level == 'critical'
+    monitor.process(blocked)
+    assert monitor.is_preempting() and len(threats) == 1
+    assert monitor.is_preempting(now=time.time() + 1.0) is False
+    
+    # 只保留最新一帧，未处理的旧帧计为丢弃
+    monitor.submit(clear)
+    monitor.submit(blocked)
+    assert monitor.get_stats()['frames_dropped'] == 1
+    
+    # 线程模式处理最新帧
+    monitor.start()
+    stamp = time.time()
+    monitor.submit(clear, timestamp=stamp)
+    deadline = time.time() + 2.0
+    while monitor.get_latest()[2] != stamp and time.time() < deadline:
+        time.sleep(0.01)
+    monitor.stop()
+    mask, analysis, timestamp = monitor.get_latest()
+    assert timestamp == stamp
+    assert analysis.threat_level == 'none' and mask.shape == clear.shape
+    
+    # 比当前帧早超过 max_age 的结果（监测停滞）不再使用，由调用方自行检测
+    assert monitor.get_fresh(stamp + monitor.max_age / 2)[1] is analysis
+    mask, analysis, age = monitor.get_fresh(stamp + monitor.max_age * 3)
+    assert mask is None and analysis is None and abs(age - monitor.max_age * 3) < 1e-6
+    stats = monitor.get_stats()
+    assert stats['stale_results'] == 1 and stats['result_age_ms'] >= 0
+    print("   ✅ 抢占、限频、丢帧统计与过期结果拒绝均正常")
+    return True
+
+def test_frame_latency_accounting():
+    """测试帧号丢帧统计与端到端延迟统计"""
+    print("⏱️ 测试帧时间戳与延迟统计...")
+    
+    from src.camera.capture import CameraInterface
+    from src.utils.latency import LatencyTracker
+    
+    camera = CameraInterface()
+    for frame_number in [10, 11, 14, 15, 3, 4]:  # 12、13丢失；回到3视为相机重启
+        camera._count_frame(frame_number)
+    stats = camera.get_frame_stats()
+    assert stats['frames'] == 6 and stats['dropped'] == 2
+    
+    tracker = LatencyTracker(window_size=100)
+    for i in range(1, 101):
+        assert abs(tracker.record("capture_to_uart", 10.0, 10.0 + i / 1000.0) - i) < 1e-6
+    assert tracker.record("capture_to_uart", 10.0, 9.0) is None  # 时钟域不一致的样本被忽略
+    assert tracker.record("capture_to_uart", None, 9.0) is None
+    latency = tracker.get_stats()["capture_to_uart"]
+    assert latency["count"] == 100 and latency["max_ms"] == latency["last_ms"]
+    assert abs(latency["p50_ms"] - float(np.percentile(np.arange(1, 101), 50))) < 1e-6
+    assert abs(latency["p95_ms"] - float(np.percentile(np.arange(1, 101), 95))) < 1e-6
+    print("   ✅ 丢帧计数与延迟分位数正确")
+    return True
+
+def test_multi_camera_workers():
+    """测试多相机工作进程的共享内存结果与融合"""
+    print("🎥 测试多相机工作进程...")
+    
+    import tempfile
+    from src.perception.worker import SharedResultSlot, MultiCameraManager, fuse_results
+    from src.utils.results import ObstacleAnalysis, TrackingResult
+    
+    # 共享内存槽位往返
+    slot = SharedResultSlot.create()
+    try:
+        assert slot.read() is None
+        axis = np.array([[1.0, 2.0, 0.5], [3.0, 4.0, 0.6], [5.0, 6.0, 0.7]])
+        analysis = ObstacleAnalysis("warning", 800.0, 120, 40, 0.25, 0.5)
+        tracking = TrackingResult([[0, 0, 10, 10], None, None, [5, 5, 20, 20]], axis,
+                                  frame_number=7, capture_time=12.5)
+        slot.write(tracking, analysis, 3.0)
+        result = slot.read()
+        assert result['sequence'] == 1 and result['tracking'].frame_number == 7
+        assert result['tracking'].line_params[1] is None and result['tracking'].line_params[3] == [5, 5, 20, 20]
+        assert np.allclose(result['tracking'].global_axis, axis[[0, -1]])
+        assert result['obstacle_analysis'] == analysis and not result['camera_lost']
+        # 相机丢失：丢失记录覆盖最后一帧结果
+        slot.mark_lost()
+        lost = slot.read()
+        assert lost['sequence'] == 2 and lost['camera_lost']
+        assert not lost['tracking'].has_axis and lost['obstacle_analysis'] is None
+        
+        # 部分视角退回：line_params[0] 是轮廓点集，按缺失直线写入，不让工作进程崩溃
+        from src.perception.pipe_tracking import PipeTracker
+        partial_tracker = PipeTracker(visualize=False)
+        partial_tracker.set_tracking_mode("partial_view")
+        blob = np.zeros((480, 640, 3), dtype=np.uint8)
+        cv2.circle(blob, (320, 240), 80, (255, 255, 255), -1)
+        line_params, global_axis, _, _ = partial_tracker.track(blob)
+        assert partial_tracker.last_detection_method == "partial" and np.asarray(line_params[0]).size != 4
+        slot.write(TrackingResult(line_params, global_axis, capture_time=13.0), None, 5.0)
+        partial = slot.read()
+        assert partial['tracking'].line_params is None and partial['tracking'].has_axis
+    finally:
+        slot.close()
+    
+    # 融合：只有前向相机门控前进与提供轴线，后向威胁单独给出
+    roles = {'front': 'forward', 'rear': 'rear'}
+    front = {'tracking': TrackingResult(capture_time=1.0), 'camera_lost': False,
+             'obstacle_analysis': ObstacleAnalysis("caution", 2000.0, 10, 5)}
+    rear = {'tracking': TrackingResult([[0, 0, 1, 1]], axis, capture_time=1.1), 'camera_lost': False,
+            'obstacle_analysis': analysis}
+    fused = fuse_results({'front': front, 'rear': rear, 'side': None}, primary='front', roles=roles,
+                         max_age=0.5, now=1.2)
+    assert fused['obstacle_analysis'].threat_level == "caution" and fused['threat_source'] == 'front'
+    assert fused['obstacle_analysis'].min_distance == 2000.0
+    assert fused['other_threats']['rear'].threat_level == "warning"
+    assert fused['tracking_source'] == 'front' and not fused['tracking'].has_axis  # 不退回后向相机的轴线
+    front['tracking'].global_axis = axis
+    assert fuse_results({'front': front, 'rear': rear}, primary='front', roles=roles,
+                        max_age=0.5, now=1.2)['tracking_source'] == 'front'
+    
+    # 过期：前向工作进程停止更新后不再融合其最后结果
+    fused = fuse_results({'front': front, 'rear': rear}, primary='front', roles=roles, max_age=0.5, now=1.55)
+    assert fused['stale'] == ['front'] and fused['tracking_source'] is None
+    assert not fused['tracking'].has_axis and fused['obstacle_analysis'] is None
+    fused = fuse_results({'front': lost, 'rear': rear}, primary='front', roles=roles, max_age=0.5,
+                         now=lost['tracking'].capture_time)
+    assert fused['lost'] == ['front'] and fused['tracking_source'] is None
+    
+    # 真实工作进程：用录制视频充当USB相机
+    color = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.line(color, (200, 0), (220, 479), (255, 255, 255), 3)
+    cv2.line(color, (420, 0), (440, 479), (255, 255, 255), 3)
+    with tempfile.TemporaryDirectory() as tmp:
+        video_path = os.path.join(tmp, "cam.avi")
+        writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"MJPG"), 30, (640, 480))
+        for _ in range(30):
+            writer.write(color)
+        writer.release()
+        
+        manager = MultiCameraManager([{'name': 'front', 'type': 'usb', 'camera_index': video_path,
+                                       'threaded': False}], primary='front')
+        manager.start()
+        try:
+            results = manager.wait_for_update(timeout=30.0)
+            assert results is not None and results['front']['tracking'].has_axis
+            assert manager.read_fused()['tracking_source'] == 'front'
+        finally:
+            manager.stop()
+        assert not manager.processes
+    print("   ✅ 共享内存结果与多相机融合正常")
+    return True
+
+def test_perception_worker_process():
+    """测试独立感知进程：共享内存帧缓冲与结果回传"""
+    print("🧵 测试独立感知进程...")
+    
+    from src.perception.worker import SharedFrameBuffer, PerceptionWorker
+    
+    color = np.zeros((480, 640, 3), dtype=np.uint8)
+    cv2.line(color, (200, 0), (220, 479), (255, 255, 255), 3)
+    cv2.line(color, (420, 0), (440, 479), (255, 255, 255), 3)
+    depth = np.full((240, 320), 3000, dtype=np.uint16)
+    depth[:, 95:115] = depth[:, 205:225] = 1000  # 管壁在深度带内
+    depth[100:140, 140:180] = 400  # 正前方0.4m处的障碍物
+    
+    # 帧缓冲往返：读到调用方预分配的数组中
+    frames = SharedFrameBuffer.create(color.shape, depth.shape)
+    try:
+        color_out, depth_out = np.empty_like(color), np.empty_like(depth)
+        assert frames.read(color_out, depth_out) is None
+        assert frames.write(color, depth, {'frame_number': 3, 'capture_time': 1.5}) == 1
+        info = frames.read(color_out, depth_out)
+        assert info['frame_number'] == 3 and info['has_depth']
+        assert np.array_equal(color_out, color) and np.array_equal(depth_out, depth)
+    finally:
+        frames.close()
+    
+    worker = PerceptionWorker(color.shape, depth.shape, tracker_kwargs={'depth_threshold': 1.5})
+    worker.start()
+    try:
+        worker.submit(color, depth, {'frame_number': 42, 'capture_time': time.time()})
+        result = worker.wait_result(timeout=30.0)
+        assert result is not None and result['tracking'].frame_number == 42
+        assert result['tracking'].has_axis
+        assert result['obstacle_analysis'].threat_level == "critical"
+        assert worker.get_result() is None  # 没有新帧就没有新结果
+    finally:
+        worker.stop()
+    assert not worker.is_alive()
+    print("   ✅ 帧经共享内存送入感知进程，结果正确返回")
+    return True
+
+def test_result_structs():
+    """测试结果结构体的字段约束与二进制往返"""
+    print("📦 测试结果结构体...")
+    
+    import json
+    from src.utils.results import ObstacleAnalysis, TurnDecision, TrackingResult
+    
+    analysis = ObstacleAnalysis("critical", 420.0, 2500, 900, 0.01, 0.05, timestamp=12.5)
+    assert ObstacleAnalysis.from_bytes(analysis.to_bytes()) == analysis
+    assert ObstacleAnalysis.from_bytes(ObstacleAnalysis().to_bytes()).timestamp is None
+    assert not hasattr(analysis, '__dict__')  # __slots__：不能随意添加字段
+    try:
+        analysis.extra = 1
+        assert False, "slots 对象不应接受新字段"
+    except AttributeError:
+        pass
+    
+    decision = TurnDecision("left", 0.8, "auto", axis_angle=-20.0, timestamp=3.0)
+    assert TurnDecision.from_bytes(decision.to_bytes()) == decision
+    assert TurnDecision.from_bytes(TurnDecision("unknown", 0.0).to_bytes()).axis_angle is None
+    
+    axis = np.array([[320.0, 400.0, 0.5], [322.0, 240.0, 0.6], [324.0, 80.0, 0.7]])
+    tracking = TrackingResult([[1, 2, 3, 4], None, [5, 6, 7, 8], None], axis, {'direction': 'left'}, 9, 1.25)
+    restored = TrackingResult.from_bytes(tracking.to_bytes())
+    assert restored.line_params == tracking.line_params and np.allclose(restored.global_axis, axis)
+    assert restored.frame_number == 9 and restored.capture_time == 1.25
+    assert restored.prediction_info is None  # 预测信息只在进程内使用
+    assert TrackingResult.from_bytes(TrackingResult().to_bytes()).global_axis is None
+    # 部分视角的轮廓点集不是直线，序列化为缺失
+    contour = np.array([[[10, 10]], [[20, 15]], [[30, 40]]], dtype=np.int32)
+    assert TrackingResult.from_bytes(TrackingResult([contour, None, None, None], axis).to_bytes()).line_params is None
+    
+    # to_dict 只含原生类型，可直接写JSON
+    json.dumps({'analysis': analysis.to_dict(), 'decision': decision.to_dict(), 'tracking': tracking.to_dict()})
+    print("   ✅ 结构体序列化往返正确")
+    return True
+
+def test_adaptive_edge_thresholds():
+    """测试Canny中值自适应阈值与霍夫阈值反馈调节"""
+    print("🎚️ 测试自适应边缘/直线阈值...")
+    
+    from src.perception.pipe_tracking import PipeTracker, HoughThresholdController, canny_thresholds
+    
+    # 中值自适应：亮画面阈值随之升高，暗画面不低于下限
+    bright = np.full((100, 100), 180, dtype=np.uint8)
+    dark = np.full((100, 100), 10, dtype=np.uint8)
+    assert canny_thresholds(bright) == (120, 240)
+    low, high = canny_thresholds(dark)
+    assert low == 20 and high >= 2 * low
+    
+    # 线段过多时提高阈值、过少时降低阈值，且限制在范围内
+    controller = HoughThresholdController(num_regions=1, initial=50, target=10, threshold_range=(15, 200))
+    assert controller.update(0, 200) > 50
+    for _ in range(50):
+        controller.update(0, 1000)
+    assert controller.threshold(0) == 200
+    for _ in range(50):
+        controller.update(0, 0)
+    assert controller.threshold(0) == 15
+    
+    # 杂乱背景下每象限候选线段数被拉向目标值
+    rng = np.random.default_rng(0)
+    clutter = np.zeros((480, 640, 3), dtype=np.uint8)
+    for _ in range(400):
+        x1, y1, x2, y2 = rng.integers(0, [640, 480, 640, 480])
+        cv2.line(clutter, (int(x1), int(y1)), (int(x2), int(y2)), (255, 255, 255), 1)
+    tracker = PipeTracker(visualize=False)
+    tracker.track(clutter)
+    initial_counts = tracker.get_edge_params()['hough_segment_counts']
+    for _ in range(20):
+        tracker.track(clutter)
+    params = tracker.get_edge_params()
+    target = tracker.hough_controller.target
+    assert all(t > 50 for t in params['hough_thresholds'])
+    assert all(target / 2 <= c <= target * 2 for c in params['hough_segment_counts'])
+    print(f"   ✅ 候选线段数 {initial_counts} -> {params['hough_segment_counts']}")
+    return True
+
+def test_depth_gated_edges():
+    """测试管道深度带边缘门限与深度不连续边缘"""
+    print("🧱 测试深度门限边缘图...")
+    
+    from src.perception.pipe_tracking import PipeTracker, PerceptionConfig
+    
+    # 0.8m 处两条管壁，3m 外的背景上布满杂线
+    rng = np.random.default_rng(1)
+    color = np.zeros((480, 640, 3), dtype=np.uint8)
+    for _ in range(200):
+        x1, y1, x2, y2 = rng.integers(0, [640, 480, 640, 480])
+        cv2.line(color, (int(x1), int(y1)), (int(x2), int(y2)), (255, 255, 255), 1)
+    cv2.line(color, (200, 0), (200, 479), (255, 255, 255), 3)
+    cv2.line(color, (440, 0), (440, 479), (255, 255, 255), 3)
+    depth = np.full((240, 320), 3000, dtype=np.uint16)
+    depth[:, 95:105] = depth[:, 215:225] = 800
+    gray = cv2.cvtColor(color, cv2.COLOR_BGR2GRAY)
+    
+    tracker = PipeTracker(depth_threshold=1.5, visualize=False, depth_aligned=True)
+    ungated = cv2.countNonZero(tracker._edge_map(gray, None))
+    # 未对齐的原始深度与彩色视场不同，不做门限
+    assert cv2.countNonZero(PipeTracker(depth_threshold=1.5, visualize=False)._edge_map(gray, depth)) == ungated
+    gated_map = tracker._edge_map(gray, depth)
+    gated = cv2.countNonZero(gated_map)
+    assert 0 < gated < ungated / 3
+    assert gated_map[240, 196:205].any() and gated_map[240, 436:445].any()  # 管壁边缘保留
+    assert 0 < tracker.get_edge_params()['depth_gate_coverage'] < 0.2
+    
+    # 深度全部缺失时不做门限
+    assert cv2.countNonZero(tracker._edge_map(gray, np.zeros_like(depth))) == ungated
+    
+    # 深度不连续边缘：纯色画面中只有深度跳变处产生边缘
+    flat = np.zeros((480, 640), dtype=np.uint8)
+    original = PerceptionConfig.PIPE_DEPTH_EDGES_ENABLED
+    PerceptionConfig.PIPE_DEPTH_EDGES_ENABLED = True
+    try:
+        depth_edges = tracker._edge_map(flat, depth)
+    finally:
+        PerceptionConfig.PIPE_DEPTH_EDGES_ENABLED = original
+    cols = np.nonzero(depth_edges.any(axis=0))[0]
+    assert len(cols) > 0 and all(min(abs(c - 190), abs(c - 210), abs(c - 430), abs(c - 450)) <= 6 for c in cols)
+    print(f"   ✅ 边缘像素 {ungated} -> {gated}")
+    return True
+
 def test_config_loading():
     """测试配置加载"""
     print("⚙️ 测试配置加载...")
@@ -258,6 +1307,30 @@ def main():
         ("RealSense相机", test_realsense_camera),
         ("串口设备", test_serial_ports),
         ("感知模块", test_perception_modules),
+        ("无头追踪", test_pipe_tracker_headless),
+        ("USB采集与RGB追踪", test_usb_capture_rgb_tracking),
+        ("转向控制统计", test_turn_control_statistics),
+        ("转向状态机", test_turn_state_machine),
+        ("相机去畸变", test_camera_model_undistort),
+        ("稀疏深度投影", test_depth_color_projection),
+        ("深度滤波链", test_depth_filter_chain),
+        ("高频避障", test_obstacle_monitor),
+        ("帧延迟统计", test_frame_latency_accounting),
+        ("多相机工作进程", test_multi_camera_workers),
+        ("独立感知进程", test_perception_worker_process),
+        ("结果结构体", test_result_structs),
+        ("自适应边缘阈值", test_adaptive_edge_thresholds),
+        ("红外灰度追踪", test_infrared_gray_tracking),
+        ("相机快速启动", test_stream_profile_selection),
+        ("相机看门狗", test_camera_watchdog),
+        ("日志限频", test_log_rate_limit),
+        ("帧窗口剖析", test_frame_profiler),
+        ("内存遥测", test_memory_telemetry),
+        ("质量调节器", test_quality_governor),
+        ("垃圾回收策略", test_gc_policy),
+        ("帧调度", test_frame_scheduler),
+        ("深度门限边缘", test_depth_gated_edges),
+        ("标定角点缓存", test_calibration_corner_cache),
         ("Web API", test_web_api),
     ]
     
@@ -5,6 +5,7 @@ Tiaozhanbei2.0 简化Web控制界面
 """
 
 from flask import Flask, render_template, request, jsonify
+import signal
 import subprocess
 import threading
 import time
@@ -63,6 +64,18 @@ class SystemState:
 # 创建全局状态实例
 system_state = SystemState()
 
+def get_python_command():
+    """
+    获取启动追踪进程的Python命令
+    
+    默认直接使用当前解释器启动（毫秒级）；设置环境变量 TIAO_CONDA_ENV 时
+    才通过 `conda run` 启动，后者每次会额外花费数秒解析环境。
+    """
+    conda_env = os.environ.get('TIAO_CONDA_ENV')
+    if conda_env:
+        return ["conda", "run", "-n", conda_env, "python"]
+    return [sys.executable]
+
 @app.route('/')
 def index():
     """主页面"""
@@ -112,14 +125,9 @@ def start_system(mode):
         script_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
         
         # 移除demo模式，只保留实用模式
-        if mode == 'track':
-            cmd = ["conda", "run", "-n", "tiao", "python", "-m", "src.main", "--mode", "track", "--display", "--save"]
-        elif mode == 'calib':
-            cmd = ["conda", "run", "-n", "tiao", "python", "-m", "src.main", "--mode", "calib", "--display", "--save"]
-        elif mode == 'test':
-            cmd = ["conda", "run", "-n", "tiao", "python", "-m", "src.main", "--mode", "test", "--display", "--save"]
-        else:
+        if mode not in ('track', 'calib', 'test'):
             return jsonify({'success': False, 'message': f'不支持的模式: {mode}'})
+        cmd = get_python_command() + ["-m", "src.main", "--mode", mode, "--display", "--save"]
         
         # 启动后台进程
         system_state.current_process = subprocess.Popen(
@@ -210,6 +218,31 @@ def stop_system():
     except Exception as e:
         return jsonify({'success': False, 'message': f'停止失败: {str(e)}'})
 
+@app.route('/api/profile', methods=['GET', 'POST'])
+def profile_system():
+    """剖析运行中的追踪进程（POST 发送 SIGUSR1 触发），GET 列出已生成的剖析结果"""
+    log_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'output', 'logs')
+    
+    if request.method == 'GET':
+        files = []
+        if os.path.isdir(log_dir):
+            for name in sorted(os.listdir(log_dir), reverse=True):
+                if name.startswith('profile_'):
+                    path = os.path.join(log_dir, name)
+                    files.append({'name': name, 'size': os.path.getsize(path),
+                                  'time': datetime.fromtimestamp(os.path.getmtime(path)).isoformat()})
+        return jsonify({'success': True, 'files': files})
+    
+    if not system_state.is_running or not system_state.current_process:
+        return jsonify({'success': False, 'message': '系统未在运行'})
+    if not hasattr(signal, 'SIGUSR1'):
+        return jsonify({'success': False, 'message': '当前平台不支持信号触发剖析'})
+    try:
+        system_state.current_process.send_signal(signal.SIGUSR1)
+        return jsonify({'success': True, 'message': f'已触发剖析，结果将写入 {log_dir}'})
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'触发剖析失败: {str(e)}'})
+
 @app.route('/api/image')
 def get_latest_image():
     """获取最新图像API"""